@@ -1,85 +1,259 @@
 """ Functions to analyze the results of the simulation """
+import csv
+import heapq
+from collections import Counter
+from itertools import groupby
+from typing import Optional
 
-import pandas as pd
-
+from monopoly.core.game_config import GameConfig
+from monopoly.core.game_result import GameResult
 from monopoly.log_settings import LogSettings
-from settings import SimulationSettings, GameSettings
 
 
 class Analyzer:
-    """ Functions to analyze games after the simulation is finished
-    data is read from the bankruptcies.tsv log file
+    """ Functions to analyze games, during or after the simulation.
+    Games are consumed one at a time, either from GameResults returned by the workers
+    (add_game_result) or streamed from the bankruptcies.tsv log file (Analyzer.from_file).
+    Only bounded-size counters are kept (nothing per game), so the results
+    can be printed at any point of the simulation.
+    config is the GameConfig of the games (players, turn limit), the current settings by default
     """
 
-    def __init__(self):
-        self.df = pd.read_csv(LogSettings.BANKRUPTCIES_PATH, sep='\t')
+    def __init__(self, config: Optional[GameConfig] = None):
+        if config is None:
+            config = GameConfig.from_settings()
+        self.player_names = [player_name for player_name, _ in config.players]
+        self.n_players = len(self.player_names)
+        self.n_moves = config.n_moves
+        # Number of games seen so far
+        self.n_games = 0
+        # Number of bankruptcies {player_name: games lost}
+        self.losses = Counter()
+        # Number of players remaining by the end of the game {remaining players: games}
+        self.remaining = Counter()
+        # Length of the finished games (with a single winner) {turns: games}.
+        # Game length is limited by `n_moves`, so this is enough for an exact median
+        self.finished_lengths = Counter()
+        # Game end reasons {EndReason: games}
+        self.end_reasons = Counter()
+        # Sum of final net worth {player_name: $}
+        self.net_worth_total = Counter()
+        # Who went bankrupt in the same game {frozenset of player names: games},
+        # for statistics that pair players' results within a game (see survival_difference)
+        self.losers = Counter()
+
+    @classmethod
+    def from_file(cls, file_name=LogSettings.BANKRUPTCIES_PATH, config: Optional[GameConfig] = None):
+        """ Create an Analyzer by streaming the bankruptcies.tsv log file line by line.
+        Lines of one game go together, as the log is written in whole-game chunks.
+        Log does not have games without bankruptcies, so the number of games comes from the config
+        (the current settings by default)
+        """
+        if config is None:
+            config = GameConfig.from_settings()
+        analyzer = cls(config)
+        with open(file_name, encoding="utf-8") as log_file:
+            rows = csv.DictReader(log_file, delimiter="\t")
+            for _, game_rows in groupby(rows, key=lambda row: row["game_number"]):
+                analyzer.add_bankruptcies([(row["player_bankrupt"], int(row["turn"])) for row in game_rows])
+
+        # Add games without bankruptcies
+        games_without_bankruptcies = max(0, config.n_games - analyzer.n_games)
+        analyzer.n_games += games_without_bankruptcies
+        analyzer.remaining[analyzer.n_players] += games_without_bankruptcies
+        analyzer.losers[frozenset()] += games_without_bankruptcies
+        return analyzer
+
+    def add_game_result(self, game_result: GameResult):
+        """ Fold one game's result into the aggregates """
+        self.add_bankruptcies(game_result.bankruptcies)
+        self.end_reasons[game_result.end_reason] += 1
+        self.net_worth_total.update(game_result.net_worth)
+
+    def add_bankruptcies(self, bankruptcies):
+        """ Fold one game's list of bankruptcies [(player_name, turn), ...] into the aggregates """
+        self.n_games += 1
+        for player_name, _ in bankruptcies:
+            self.losses[player_name] += 1
+        self.losers[frozenset(player_name for player_name, _ in bankruptcies)] += 1
+        self.remaining[self.n_players - len(bankruptcies)] += 1
+        # Game length is the highest bankruptcy turn of a finished game
+        if len(bankruptcies) == self.n_players - 1:
+            self.finished_lengths[max(turn for _, turn in bankruptcies)] += 1
 
     def run_all(self):
-        """ Run all analysis functions """
+        """ Run all analysis functions (can be called mid-simulation for interim results) """
+        if self.n_games == 0:
+            print("No games to analyze yet")
+            return
         self.remaining_players()
         self.game_length()
+        self.end_reason()
         self.winning_rate()
+        self.net_worth()
 
     def remaining_players(self):
         """ number of games that had a clear winner, how many players remain at the end
         """
-        grouped = self.df.groupby('game_number').size().reset_index(name='Losers')
-        result = grouped['Losers'].value_counts().reset_index()
-        result.columns = ['Losers', 'count']
-
-        # {remaining players: games}
-        remaining_players = {len(GameSettings.players_list) - row['Losers']: row['count'] for index, row in
-                             result.iterrows()}
-        # Add games with no losers (all players remained)
-        remaining_players[len(GameSettings.players_list)] = \
-            SimulationSettings.n_games - sum(remaining_players.values())
-
         # Games with a clear winner (just a single player remains)
-        clear_winner = 0
-        if 1 in remaining_players:
-            clear_winner = remaining_players[1]
-        print(f"Games that had clear winner: {clear_winner} / {SimulationSettings.n_games} " +
-              f"({100 * clear_winner / SimulationSettings.n_games:.1f}%)")
+        clear_winner = self.remaining[1]
+        print(f"Games that had clear winner: {clear_winner} / {self.n_games} " +
+              f"({100 * clear_winner / self.n_games:.1f}%)")
 
         # Number of players by the end of simulation
-        print(f"Number of remaining players after: {SimulationSettings.n_moves} turns:")
-        for remaining, count in sorted(remaining_players.items()):
-            print(f"  - {remaining}: {count} ({count * 100 / SimulationSettings.n_games:.1f}%)")
+        print(f"Number of remaining players after: {self.n_moves} turns:")
+        for remaining, count in sorted(self.remaining.items()):
+            print(f"  - {remaining}: {count} ({count * 100 / self.n_games:.1f}%)")
 
     def game_length(self):
         """ Median game length (for all finite games)
         """
-        # Calculate median game length, which is the highest bankruptcy turn within a game
-        grouped = self.df.groupby('game_number')
-        filtered_groups = grouped.filter(lambda x: len(x) == len(GameSettings.players_list) - 1)
-        lengths_df = filtered_groups.groupby('game_number')['turn'].max().reset_index()
-        lengths = sorted(lengths_df["turn"].tolist())
-        all_lengths = lengths + [SimulationSettings.n_moves
-                                 for _ in range(SimulationSettings.n_games - len(lengths))]
-        if lengths:
-            print(f"Median game length (for finished games): {lengths[len(lengths) // 2]}")
-        print(f"Median game length (for all games): {all_lengths[len(all_lengths) // 2]}")
+        # Median game length, where games that were not finished count as `n_moves` long
+        finished_games = sum(self.finished_lengths.values())
+        if finished_games:
+            print(f"Median game length (for finished games): {self._median(self.finished_lengths)}")
+        print(f"Median game length (for all games): {self._median(self._all_lengths())}")
 
         # Calculate average survival time (for those who goes bankrupt)
-        survival_average = lengths_df["turn"].mean()
+        survival_average = float("nan")
+        if finished_games:
+            survival_average = sum(turns * count for turns, count in self.finished_lengths.items()) / finished_games
         print(f"Average survival time (for bankrupt players): {survival_average:.1f} turns")
 
+    def _all_lengths(self):
+        """ Game lengths histogram, where games that were not finished count as `n_moves` long """
+        all_lengths = self.finished_lengths.copy()
+        all_lengths[self.n_moves] += self.n_games - sum(self.finished_lengths.values())
+        return all_lengths
+
+    @staticmethod
+    def _median(histogram):
+        """ Median (the upper one, for an even count) of values in a {value: count} histogram """
+        middle = sum(histogram.values()) // 2
+        seen = 0
+        for value, count in sorted(histogram.items()):
+            seen += count
+            if seen > middle:
+                return value
+        return None
+
+    def end_reason(self):
+        """ Why games ended (only known when analyzing GameResults)
+        """
+        if not self.end_reasons:
+            return
+        print("Game end reasons:")
+        for reason, count in self.end_reasons.most_common():
+            print(f"  - {reason.name}: {count} ({count * 100 / self.n_games:.1f}%)")
+        stalled = sum(count for reason, count in self.end_reasons.items() if reason.is_stall)
+        if stalled:
+            print(f"Games ended early as stalled: {stalled} ({stalled * 100 / self.n_games:.1f}%)")
+
     def winning_rate(self):
         """ Display winning (survival) rate of players
         """
-        loses_counts = self.df.groupby('player_bankrupt').size().reset_index(name='count')
-
-        # {player: games_survived}
-        loses_dict = {row['player_bankrupt']: row['count'] for index, row in loses_counts.iterrows()}
         print("Players' survival rate:")
 
-        for player in GameSettings.players_list:
-            player_name = player[0]
-            loses = loses_dict.get(player_name, 0)
-            survivals = SimulationSettings.n_games - loses
-
-            survival_rate = survivals / SimulationSettings.n_games
-            margin = 1.96 * (survival_rate * (1 - survival_rate) / SimulationSettings.n_games) ** 0.5
+        for player_name, (survivals, survival_rate, margin) in self.survival_rates().items():
             print(f"  - {player_name}: {survivals} " +
                   f"({survival_rate * 100:.1f} "
                   f"+- {margin * 100:.1f}%)")
+
+    def survival_rates(self):
+        """ {player_name: (games survived, survival rate, 95% confidence margin)} """
+        survival_rates = {}
+        for player_name in self.player_names:
+            loses = self.losses[player_name]
+            survivals = self.n_games - loses
+
+            survival_rate = survivals / self.n_games
+            margin = 1.96 * (survival_rate * (1 - survival_rate) / self.n_games) ** 0.5
+            survival_rates[player_name] = (survivals, survival_rate, margin)
+        return survival_rates
+
+    def survival_difference(self, player_name):
+        """ Difference between the player's survival rate and the average survival rate of the other players,
+        with its 95% confidence margin: (difference, margin).
+        Players of the same game are not independent, so the margin comes from the per-game differences
+        """
+        other_players = [other_name for other_name in self.player_names if other_name != player_name]
+        total = total_squares = 0
+        for losers, count in self.losers.items():
+            others_survived = sum(other_name not in losers for other_name in other_players)
+            difference = (player_name not in losers) - others_survived / len(other_players)
+            total += difference * count
+            total_squares += difference ** 2 * count
+        mean = total / self.n_games
+        variance = max(0, total_squares / self.n_games - mean ** 2)
+        return mean, 1.96 * (variance / self.n_games) ** 0.5
+
+    def summary(self):
+        """ Main results as a list of rows (dicts), one per player,
+        with the game-level results repeated in each row (for tables, see sweep.py)
+        """
+        rows = []
+        for player_name, (_, survival_rate, margin) in self.survival_rates().items():
+            rows.append({
+                "games": self.n_games,
+                "clear_winner_rate": round(self.remaining[1] / self.n_games, 4),
+                "median_length": self._median(self._all_lengths()),
+                "player": player_name,
+                "survival_rate": round(survival_rate, 4),
+                "survival_margin": round(margin, 4),
+                "average_net_worth": round(self.net_worth_total[player_name] / self.n_games),
+            })
+        return rows
+
+    def net_worth(self):
+        """ Average final net worth of players (only known when analyzing GameResults)
+        """
+        if not self.net_worth_total:
+            return
+        print("Players' average final net worth:")
+        for player_name in self.player_names:
+            print(f"  - {player_name}: ${self.net_worth_total[player_name] / self.n_games:.0f}")
+
+
+class PhaseTimings:
+    """ Phase timings of the games (see monopoly/core/phase_timer.py), merged over all games:
+    time and calls of each phase, and the slowest games (to replay them)
+    """
+
+    def __init__(self, slowest_to_keep=5):
+        self.n_games = 0
+        # Total time and calls of each phase {phase: seconds}, {phase: calls}
+        self.seconds = Counter()
+        self.calls = Counter()
+        # The slowest games: heap of (seconds, game_number, game_seed)
+        self.slowest = []
+        self.slowest_to_keep = slowest_to_keep
+
+    def add_game_result(self, game_result: GameResult):
+        """ Fold one game's timings into the totals (games without timings are skipped) """
+        if game_result.timings is None:
+            return
+        self.n_games += 1
+        for phase, (seconds, calls) in game_result.timings.items():
+            self.seconds[phase] += seconds
+            self.calls[phase] += calls
+        game = (sum(seconds for seconds, _ in game_result.timings.values()),
+                game_result.game_number, game_result.game_seed)
+        if len(self.slowest) < self.slowest_to_keep:
+            heapq.heappush(self.slowest, game)
+        else:
+            heapq.heappushpop(self.slowest, game)
+
+    def report(self):
+        """ Print time per phase and the slowest games """
+        if self.n_games == 0:
+            return
+        total_seconds = sum(self.seconds.values())
+        print(f"Time per phase ({total_seconds:.1f}s in {self.n_games} games, " +
+              "not counting the phases inside a phase):")
+        for phase, seconds in self.seconds.most_common():
+            calls = self.calls[phase]
+            print(f"  - {phase}: {seconds:.2f}s ({seconds * 100 / total_seconds:.1f}%), " +
+                  f"{calls / self.n_games:.1f} calls per game, {seconds * 1_000_000 / calls:.1f} us per call")
+        print("Slowest games (replay with simulate.py --replay GAME_NUMBER):")
+        for seconds, game_number, game_seed in sorted(self.slowest, reverse=True):
+            print(f"  - Game {game_number} (seed = {game_seed}): {seconds * 1000:.1f} ms")
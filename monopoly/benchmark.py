@@ -0,0 +1,225 @@
+""" Benchmarks: games per second of the whole simulation, and time per call of the busiest
+player and board methods. Everything runs with fixed settings (the defaults, not settings.py)
+and fixed seeds, so results of different versions of the code can be compared.
+Results are a list of records {"name", "value", "unit", "higher_is_better"},
+saved as JSON, and compared with a saved baseline by compare_results().
+"""
+import copy
+import json
+import platform
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+from monopoly.core.card import CHANCE_CARDS, COMMUNITY_CHEST_CARDS
+from monopoly.core.cell import BOARD_LAYOUT
+from monopoly.core.game import monopoly_games_batch, derive_game_seed, setup_game, setup_players
+from monopoly.core.game_config import GameConfig
+from settings import GameMechanics, StandardPlayerSettings
+
+# Master seed of all benchmark games
+BENCHMARK_SEED = 0
+# Games per worker task in throughput benchmarks
+BENCHMARK_BATCH_SIZE = 25
+
+
+def benchmark_config(keep_game_log=False, events_log_path="events.log") -> GameConfig:
+    """ Fixed settings for benchmarks: standard rules, four standard players """
+    return GameConfig(
+        mechanics=GameMechanics(),
+        players=tuple((player_name, StandardPlayerSettings()) for player_name in ("P1", "P2", "P3", "P4")),
+        shuffle_players=True,
+        starting_money=1500,
+        starting_properties={},
+        board_layout=BOARD_LAYOUT,
+        chance_cards=tuple(CHANCE_CARDS),
+        community_chest_cards=tuple(COMMUNITY_CHEST_CARDS),
+        n_games=0,
+        n_moves=1000,
+        never_bankrupt_cash=5000,
+        stall_detectors=(),
+        check_running_totals=False,
+        keep_game_log=keep_game_log,
+        events_log_path=events_log_path,
+    )
+
+
+def measure_throughput(config: GameConfig, n_games: int, workers: int) -> float:
+    """ Games per second, playing games 1..n_games with `workers` processes
+    (0: in this process, without a process pool)
+    """
+    batches = [(first_game, min(first_game + BENCHMARK_BATCH_SIZE - 1, n_games), BENCHMARK_SEED, config)
+               for first_game in range(1, n_games + 1, BENCHMARK_BATCH_SIZE)]
+    start = time.perf_counter()
+    if workers == 0:
+        for batch in batches:
+            monopoly_games_batch(batch)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(monopoly_games_batch, batches))
+    return n_games / (time.perf_counter() - start)
+
+
+def find_game_state(config: GameConfig, condition, max_games=100):
+    """ Play benchmark games until, at the end of some turn, condition(player, board, alive players) is True.
+    Return that game state: (board, players, dice, log, the player)
+    """
+    for game_number in range(1, max_games + 1):
+        board, dice, log = setup_game(game_number, derive_game_seed(BENCHMARK_SEED, game_number), config)
+        players = setup_players(board, dice, config)
+        for _ in range(config.n_moves):
+            for player in players:
+                if not player.is_bankrupt:
+                    player.make_a_move(board, players, dice, log)
+            alive = [player for player in players if not player.is_bankrupt]
+            if len(alive) < 2:
+                break
+            for player in alive:
+                if condition(player, board, alive):
+                    return board, players, dice, log, player
+    raise RuntimeError(f"No game state for the benchmark in {max_games} games")
+
+
+def can_trade(player, board, alive):
+    """ Someone wants the player's property, and has one the player wants """
+    return any(other_player is not player and
+               player.wants_to_buy & other_player.wants_to_sell and
+               other_player.wants_to_buy & player.wants_to_sell
+               for other_player in alive)
+
+
+def can_improve(player, board, alive):
+    """ The player has a monopoly without hotels, and money to build """
+    return player.money > player.settings.unspendable_cash + 500 and \
+        any(cell.group in player.buildable_groups and not cell.has_hotel for cell in player.owned)
+
+
+def has_houses(player, board, alive):
+    """ The player has houses to sell """
+    return any(cell.has_houses for cell in player.owned)
+
+
+def has_monopoly(player, board, alive):
+    return bool(player.buildable_groups)
+
+
+def any_state(player, board, alive):
+    return True
+
+
+def payee(player, alive):
+    """ Another player to pay to """
+    return next(other_player for other_player in alive if other_player is not player)
+
+
+# Micro-benchmarks: name -> (condition for the game state, function of the state to time,
+# does it change the state (then every call gets a fresh copy))
+MICRO_BENCHMARKS = {
+    "Player.do_a_two_way_trade": (
+        can_trade,
+        lambda board, players, dice, log, player: player.do_a_two_way_trade(players, board, log),
+        True),
+    "Player.improve_properties": (
+        can_improve,
+        lambda board, players, dice, log, player: player.improve_properties(board, log),
+        True),
+    "Player.raise_money": (
+        has_houses,
+        lambda board, players, dice, log, player: player.raise_money(
+            (player.money + player.max_raisable_money()) // 2, board, log),
+        True),
+    "Player.pay_money": (
+        has_houses,
+        lambda board, players, dice, log, player: player.pay_money(
+            (player.money + player.max_raisable_money()) // 2,
+            payee(player, [other for other in players if not other.is_bankrupt]), board, log),
+        True),
+    "Board.recalculate_monopoly_multipliers": (
+        has_monopoly,
+        lambda board, players, dice, log, player: board.recalculate_monopoly_multipliers(
+            next(cell for cell in player.owned if cell.group in player.buildable_groups)),
+        False),
+    "Dice.roll": (
+        any_state,
+        lambda board, players, dice, log, player: dice.roll(),
+        False),
+}
+
+
+def measure_call(state, function, changes_state, number, repeat) -> float:
+    """ Time per call (in microseconds, the best of `repeat` rounds of `number` calls) """
+    timings = []
+    for _ in range(repeat):
+        # Copies are made before the timing starts
+        states = [copy.deepcopy(state) for _ in range(number)] if changes_state else [state] * number
+        start = time.perf_counter()
+        for state_copy in states:
+            function(*state_copy)
+        timings.append((time.perf_counter() - start) / number * 1_000_000)
+    return min(timings)
+
+
+def run_benchmarks(n_games=200, max_workers=4, number=200, repeat=5) -> List[Dict[str, Any]]:
+    """ Run all benchmarks, return the list of results """
+    results = []
+    worker_counts = sorted({0, max_workers} | {2 ** power for power in range(max_workers.bit_length())
+                                               if 2 ** power <= max_workers})
+    with tempfile.TemporaryDirectory() as log_dir:
+        for keep_game_log in (False, True):
+            config = benchmark_config(keep_game_log, Path(log_dir) / "events.log")
+            for workers in worker_counts:
+                games_per_second = measure_throughput(config, n_games, workers)
+                results.append({
+                    "name": f"monopoly_game log={'on' if keep_game_log else 'off'} " +
+                            (f"workers={workers}" if workers else "in-process"),
+                    "value": round(games_per_second, 1),
+                    "unit": "games/s",
+                    "higher_is_better": True,
+                })
+
+    config = benchmark_config()
+    for name, (condition, function, changes_state) in MICRO_BENCHMARKS.items():
+        state = find_game_state(config, condition)
+        results.append({
+            "name": name,
+            "value": round(measure_call(state, function, changes_state, number, repeat), 3),
+            "unit": "us/call",
+            "higher_is_better": False,
+        })
+    return results
+
+
+def save_results(results: List[Dict[str, Any]], file_name):
+    """ Save the results as JSON, with the Python version and platform they were measured on """
+    with open(file_name, "w", encoding="utf-8") as results_file:
+        json.dump({"python": platform.python_version(),
+                   "platform": platform.platform(),
+                   "results": results}, results_file, indent=2)
+
+
+def load_results(file_name) -> List[Dict[str, Any]]:
+    with open(file_name, encoding="utf-8") as results_file:
+        return json.load(results_file)["results"]
+
+
+def compare_results(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+                    tolerance=0.1) -> List[Dict[str, Any]]:
+    """ Compare results with the baseline: one row per benchmark, with the change (in %, positive is better)
+    and "REGRESSION" if it is worse than the baseline by more than `tolerance` (a share)
+    """
+    baseline_values = {record["name"]: record["value"] for record in baseline}
+    rows = []
+    for record in results:
+        row = {"benchmark": record["name"], "unit": record["unit"],
+               "baseline": baseline_values.get(record["name"], "-"), "current": record["value"],
+               "change": "-", "status": "new"}
+        if record["name"] in baseline_values:
+            ratio = record["value"] / baseline_values[record["name"]]
+            improvement = ratio - 1 if record["higher_is_better"] else 1 / ratio - 1
+            row["change"] = f"{improvement * 100:+.1f}%"
+            row["status"] = "REGRESSION" if improvement < -tolerance else "ok"
+        rows.append(row)
+    return rows
+
@@ -0,0 +1,55 @@
+""" Checkpoints of a running simulation, to resume it after an interruption.
+Games are played in order (the results come back in the order of game numbers),
+so the finished games are always the first N, and a checkpoint is:
+how many games are done, the aggregated results so far, and where the bankruptcies log ended.
+"""
+import dataclasses
+import os
+import pickle
+from dataclasses import dataclass
+
+from monopoly.analytics import Analyzer
+from monopoly.core.game_config import GameConfig
+
+# GameConfig fields that do not change the results of the games: logs, instrumentation,
+# and the number of games (a finished simulation can be resumed to play more games)
+UNCHECKED_FIELDS = ("n_games", "keep_game_log", "events_log_path", "structured_events_log",
+                    "phase_timings", "profile_dir")
+
+
+@dataclass
+class Checkpoint:
+    # Settings the games were played with (resuming with different ones would mix up results)
+    seed: int
+    game_config: GameConfig
+    # Games 1..games_done are finished
+    games_done: int
+    analyzer: Analyzer
+    # Size of bankruptcies.tsv (in bytes) with the finished games only
+    bankruptcies_log_size: int
+
+
+def save_checkpoint(checkpoint: Checkpoint, file_name):
+    """ Save the checkpoint (write a temporary file first, so an interruption
+    in the middle of writing does not spoil the previous checkpoint)
+    """
+    temp_file_name = f"{file_name}.tmp"
+    with open(temp_file_name, "wb") as checkpoint_file:
+        pickle.dump(checkpoint, checkpoint_file)
+    os.replace(temp_file_name, file_name)
+
+
+def load_checkpoint(file_name, seed, game_config) -> Checkpoint:
+    """ Load the checkpoint, check that it is from a simulation with the same settings
+    """
+    with open(file_name, "rb") as checkpoint_file:
+        checkpoint = pickle.load(checkpoint_file)
+    if checkpoint.seed != seed:
+        raise ValueError(f"Checkpoint {file_name} is from a simulation with a different seed: {checkpoint.seed}")
+    changed = [config_field.name for config_field in dataclasses.fields(GameConfig)
+               if config_field.name not in UNCHECKED_FIELDS and
+               getattr(checkpoint.game_config, config_field.name) != getattr(game_config, config_field.name)]
+    if changed:
+        raise ValueError(f"Checkpoint {file_name} is from a simulation with different settings: " +
+                         ", ".join(changed))
+    return checkpoint
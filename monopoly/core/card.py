@@ -0,0 +1,225 @@
+""" Chance and Community Chest cards.
+Each card is an object with its text and a pre-bound effect (apply method),
+so acting on a drawn card is a single method call.
+Decks are plain lists of cards (see CHANCE_CARDS and COMMUNITY_CHEST_CARDS at the bottom),
+so custom or house-rule decks can be put together in settings.py.
+"""
+from monopoly.core.constants import RAILROADS, UTILITIES
+from monopoly.core.move_result import MoveResult
+
+
+class Card:
+    """ Base class for all cards.
+    Card objects are static: they are shared between all games and never change
+    """
+
+    def __init__(self, text):
+        self.text = text
+
+    def __str__(self):
+        return self.text
+
+    def __eq__(self, other):
+        """ Cards are equal if they are the same kind of card with the same parameters
+        (to compare decks, for example of a resumed simulation with its checkpoint)
+        """
+        return type(self) is type(other) and vars(self) == vars(other)
+
+    def __hash__(self):
+        return hash((type(self), self.text))
+
+    def apply(self, player, deck, board, players, log):
+        """ Act on the card, drawn by the player from the deck.
+        Return MoveResult.END_MOVE if the move should be over (go to jail)
+        """
+
+
+class AdvanceToCard(Card):
+    """ Go to a certain cell, collecting salary if passing GO
+    """
+
+    def __init__(self, text, target):
+        super().__init__(text)
+        self.target = target
+
+    def apply(self, player, deck, board, players, log):
+        log.add("{} goes to {}", player, board.cells[self.target])
+        board.advance_to(player, self.target, log)
+
+
+class AdvanceToNearestCard(Card):
+    """ Go to the nearest cell of a group, collecting salary if passing GO.
+    rent_note is the player's note that changes the rent there ("double rent", "10 times dice")
+    """
+
+    def __init__(self, text, group, rent_note):
+        super().__init__(text)
+        self.group = group
+        self.rent_note = rent_note
+
+    def apply(self, player, deck, board, players, log):
+        nearest = board.nearest_in_group[self.group][player.position]
+        log.add("{} goes to {}", player, board.cells[nearest])
+        board.advance_to(player, nearest, log)
+        player.other_notes = self.rent_note
+
+
+class GoBackCard(Card):
+    """ Go back a few cells
+    """
+
+    def __init__(self, text, spaces):
+        super().__init__(text)
+        self.spaces = spaces
+
+    def apply(self, player, deck, board, players, log):
+        player.position = (player.position - self.spaces) % len(board.cells)
+        log.add("{} goes to {}", player, board.cells[player.position])
+
+
+class GoToJailCard(Card):
+    """ Go directly to jail, message is for the log
+    """
+
+    def __init__(self, text, message):
+        super().__init__(text)
+        self.message = message
+
+    def apply(self, player, deck, board, players, log):
+        player.handle_going_to_jail(self.message, board, log)
+        return MoveResult.END_MOVE
+
+
+class GetOutOfJailFreeCard(Card):
+    """ The player keeps the card (it is removed from the deck until used)
+    """
+
+    def apply(self, player, deck, board, players, log):
+        log.add("{} now has a 'Get Out of Jail Free' card", player)
+        # Remove the card from the deck, the player keeps it with its place in the deck
+        card_index = deck.remove(self)
+        if deck is board.chance:
+            player.get_out_of_jail_chance = (self, card_index)
+        else:
+            player.get_out_of_jail_comm_chest = (self, card_index)
+
+
+class CollectCard(Card):
+    """ Receive money from the bank
+    """
+
+    def __init__(self, text, amount):
+        super().__init__(text)
+        self.amount = amount
+
+    def apply(self, player, deck, board, players, log):
+        log.add("{} gets ${}", player, self.amount)
+        player.money += self.amount
+
+
+class PayCard(Card):
+    """ Pay money to the bank
+    """
+
+    def __init__(self, text, amount):
+        super().__init__(text)
+        self.amount = amount
+
+    def apply(self, player, deck, board, players, log):
+        player.pay_money(self.amount, "bank", board, log)
+
+
+class RepairsCard(Card):
+    """ Pay the bank for each house and hotel the player has
+    """
+
+    def __init__(self, text, per_house, per_hotel):
+        super().__init__(text)
+        self.per_house = per_house
+        self.per_hotel = per_hotel
+
+    def apply(self, player, deck, board, players, log):
+        repair_cost = sum(cell.has_houses * self.per_house + cell.has_hotel * self.per_hotel
+                          for cell in player.owned)
+        log.add("Repair cost: ${}", repair_cost)
+        player.pay_money(repair_cost, "bank", board, log)
+
+
+class PayEachPlayerCard(Card):
+    """ Pay money to each other (not bankrupt) player
+    """
+
+    def __init__(self, text, amount):
+        super().__init__(text)
+        self.amount = amount
+
+    def apply(self, player, deck, board, players, log):
+        for other_player in players:
+            if other_player != player and not other_player.is_bankrupt:
+                player.pay_money(self.amount, other_player, board, log)
+                if not player.is_bankrupt:
+                    log.add("{} pays {} ${}", player, other_player, self.amount)
+
+
+class CollectFromEachPlayerCard(Card):
+    """ Receive money from each other (not bankrupt) player
+    """
+
+    def __init__(self, text, amount):
+        super().__init__(text)
+        self.amount = amount
+
+    def apply(self, player, deck, board, players, log):
+        for other_player in players:
+            if other_player != player and not other_player.is_bankrupt:
+                other_player.pay_money(self.amount, player, board, log)
+                if not other_player.is_bankrupt:
+                    log.add("{} pays {} ${}", other_player, player, self.amount)
+
+
+# Standard decks
+
+CHANCE_CARDS = (
+    AdvanceToCard("Advance to Boardwalk", 39),
+    AdvanceToCard("Advance to Go (Collect $200)", 0),
+    AdvanceToCard("Advance to Illinois Avenue. If you pass Go, collect $200", 24),
+    AdvanceToCard("Advance to St. Charles Place. If you pass Go, collect $200", 11),
+    AdvanceToNearestCard("Advance to the nearest Railroad. If owned, pay owner twice " +
+                         "the rental to which they are otherwise entitled", RAILROADS, "double rent"),
+    AdvanceToNearestCard("Advance to the nearest Railroad. If owned, pay owner twice " +
+                         "the rental to which they are otherwise entitled", RAILROADS, "double rent"),
+    AdvanceToNearestCard("Advance token to nearest Utility. " +
+                         "If owned, throw dice and pay owner a total ten times amount thrown.",
+                         UTILITIES, "10 times dice"),
+    CollectCard("Bank pays you dividend of $50", 50),
+    GetOutOfJailFreeCard("Get Out of Jail Free"),
+    GoBackCard("Go Back 3 Spaces", 3),
+    GoToJailCard("Go to Jail. Go directly to Jail, do not pass Go, do not collect $200",
+                 "got GTJ Chance card"),
+    RepairsCard("Make general repairs on all your property. For each house pay $25. " +
+                "For each hotel pay $100", 25, 100),
+    PayCard("Speeding fine $15", 15),
+    AdvanceToCard("Take a trip to Reading Railroad. If you pass Go, collect $200", 5),
+    PayEachPlayerCard("You have been elected Chairman of the Board. Pay each player $50", 50),
+    CollectCard("Your building loan matures. Collect $150", 150),
+)
+
+COMMUNITY_CHEST_CARDS = (
+    AdvanceToCard("Advance to Go (Collect $200)", 0),
+    CollectCard("Bank error in your favor. Collect $200", 200),
+    PayCard("Doctor's fee. Pay $50", 50),
+    CollectCard("From sale of stock you get $50", 50),
+    GetOutOfJailFreeCard("Get Out of Jail Free"),
+    GoToJailCard("Go to Jail. Go directly to jail, do not pass Go, do not collect $200",
+                 "got GTJ Community Chest card"),
+    CollectCard("Holiday fund matures. Receive $100", 100),
+    CollectCard("Income tax refund. Collect $20", 20),
+    CollectFromEachPlayerCard("It is your birthday. Collect $10 from every player", 10),
+    CollectCard("Life insurance matures. Collect $100", 100),
+    PayCard("Pay hospital fees of $100", 100),
+    PayCard("Pay school fees of $50", 50),
+    CollectCard("Receive $25 consultancy fee", 25),
+    RepairsCard("You are assessed for street repair. $40 per house. $115 per hotel", 40, 115),
+    CollectCard("You have won second prize in a beauty contest. Collect $10", 10),
+    CollectCard("You inherit $100", 100),
+)
@@ -1,49 +1,80 @@
-from monopoly.core.constants import UTILITIES
+from monopoly.core.constants import INDIGO, GREEN, YELLOW, RED, ORANGE, PINK, LIGHTBLUE, BROWN, RAILROADS, UTILITIES
 
 
 class Cell:
-    """Base class for all board cells."""
+    """Base class for all board cells.
+    landing_handler is the name of the Player's method to call when the player lands on the cell
+    (None if nothing happens, like on GO or in Jail)
+    Cells (and other objects created for every game) use __slots__: they are small and
+    there are a lot of them, so no need for a per-object __dict__
+    """
+    __slots__ = ("name", "position")
+    landing_handler = None
 
     def __init__(self, name):
         self.name = name
+        # Index of the cell on the board (set up by the Board)
+        self.position = None
 
     def __str__(self):
         return self.name
 
 
+class Jail(Cell):
+    """ Class for Jail (or Just Visiting), where Go To Jail sends players
+    """
+    __slots__ = ()
+
+
 class GoToJail(Cell):
     """ Class for Go To Jail cell
     not much going on here
     """
+    __slots__ = ()
+    landing_handler = "handle_landing_on_go_to_jail"
 
 
 class LuxuryTax(Cell):
     """ Class for LuxuryTax
     """
+    __slots__ = ()
+    landing_handler = "handle_landing_on_luxury_tax"
 
 
 class IncomeTax(Cell):
     """ Class for IncomeTax
     """
+    __slots__ = ()
+    landing_handler = "handle_landing_on_income_tax"
 
 
 class FreeParking(Cell):
     """ Class for Free Parking """
+    __slots__ = ()
+    landing_handler = "handle_landing_on_free_parking"
 
 
 class Chance(Cell):
     """ Class for Chance
     """
+    __slots__ = ()
+    landing_handler = "handle_landing_on_chance"
 
 
 class CommunityChest(Cell):
     """ Class for Community Chest
     """
+    __slots__ = ()
+    landing_handler = "handle_landing_on_community_chest"
 
 
 class Property(Cell):
     """ Property Class (for Properties, Rails, Utilities)
     """
+    __slots__ = ("cost_base", "rent_base", "cost_house", "rent_house", "group",
+                 "mortgage_price", "unmortgage_cost", "mortgaged_worth",
+                 "owner", "is_mortgaged", "monopoly_multiplier", "has_houses", "has_hotel")
+    landing_handler = "handle_landing_on_property"
 
     def __init__(self, name, cost_base, rent_base, cost_house, rent_house, group):
         """
@@ -64,6 +95,14 @@ class Property(Cell):
         # Group of the property (color, or "Railroads", "Utilities")
         self.group = group
 
+        # Depend on the rules (set up by the Board):
+        # Cash from mortgaging the property
+        self.mortgage_price = None
+        # Cost to unmortgage it (with the fee)
+        self.unmortgage_cost = None
+        # Net worth of the property when mortgaged
+        self.mortgaged_worth = None
+
         # Current state of the property
         # Owner of the property (Will be a Player object or None if not owned)
         self.owner = None
@@ -98,3 +137,59 @@ class Property(Cell):
         # Utilities: Dice roll * 4/10
         _, dice_sum, _ = dice.roll()
         return dice_sum * self.monopoly_multiplier
+
+
+# Standard board layout: cell class and its parameters, for each position.
+# The parameters (names, costs, rent tables) are shared between all games,
+# only the cell objects holding the state of the game are created for each game.
+# The layout is a tuple (hashable), so tables derived from it can be cached (see board.py)
+BOARD_LAYOUT = (
+    # 0-4
+    (Cell, ("GO",)),
+    (Property, ("A1 Mediterranean Avenue", 60, 2, 50, (10, 30, 90, 160, 250), BROWN)),
+    (CommunityChest, ("COM1 Community Chest",)),
+    (Property, ("A2 Baltic Avenue", 60, 4, 50, (20, 60, 180, 320, 450), BROWN)),
+    (IncomeTax, ("IT Income Tax",)),
+    # 5-9
+    (Property, ("R1 Reading Railroad", 200, 25, 0, (0, 0, 0, 0, 0), RAILROADS)),
+    (Property, ("B1 Oriental Avenue", 100, 6, 50, (30, 90, 270, 400, 550), LIGHTBLUE)),
+    (Chance, ("CH1 Chance",)),
+    (Property, ("B2 Vermont Avenue", 100, 6, 50, (30, 90, 270, 400, 550), LIGHTBLUE)),
+    (Property, ("B3 Connecticut Avenue", 120, 8, 50, (40, 100, 300, 450, 600), LIGHTBLUE)),
+    # 10-14
+    (Jail, ("JL Jail",)),
+    (Property, ("C1 St. Charles Place", 140, 10, 100, (50, 150, 450, 625, 750), PINK)),
+    (Property, ("U1 Electric Company", 150, 0, 0, (0, 0, 0, 0, 0), UTILITIES)),
+    (Property, ("C2 States Avenue", 140, 10, 100, (50, 150, 450, 625, 750), PINK)),
+    (Property, ("C3 Virginia Avenue", 160, 12, 100, (60, 180, 500, 700, 900), PINK)),
+    # 15-19
+    (Property, ("R2 Pennsylvania Railroad", 200, 25, 0, (0, 0, 0, 0, 0), RAILROADS)),
+    (Property, ("D1 St. James Place", 180, 14, 100, (70, 200, 550, 700, 950), ORANGE)),
+    (CommunityChest, ("COM2 Community Chest",)),
+    (Property, ("D2 Tennessee Avenue", 180, 14, 100, (70, 200, 550, 700, 950), ORANGE)),
+    (Property, ("D3 New York Avenue", 200, 16, 100, (80, 220, 600, 800, 1000), ORANGE)),
+    # 20-24
+    (FreeParking, ("FP Free Parking",)),
+    (Property, ("E1 Kentucky Avenue", 220, 18, 150, (90, 250, 700, 875, 1050), RED)),
+    (Chance, ("CH2 Chance",)),
+    (Property, ("E2 Indiana Avenue", 220, 18, 150, (90, 250, 700, 875, 1050), RED)),
+    (Property, ("E3 Illinois Avenue", 240, 20, 150, (100, 300, 750, 925, 1100), RED)),
+    # 25-29
+    (Property, ("R3 B&O Railroad", 200, 25, 0, (0, 0, 0, 0, 0), RAILROADS)),
+    (Property, ("F1 Atlantic Avenue", 260, 22, 150, (110, 330, 800, 975, 1150), YELLOW)),
+    (Property, ("F2 Ventnor Avenue", 260, 22, 150, (110, 330, 800, 975, 1150), YELLOW)),
+    (Property, ("U2 Waterworks", 150, 0, 0, (0, 0, 0, 0, 0), UTILITIES)),
+    (Property, ("F3 Marvin Gardens", 280, 24, 150, (120, 360, 850, 1025, 1200), YELLOW)),
+    # 30-34
+    (GoToJail, ("GTJ Go To Jail",)),
+    (Property, ("G1 Pacific Avenue", 300, 26, 200, (130, 390, 900, 1100, 1275), GREEN)),
+    (Property, ("G2 North Carolina Avenue", 300, 26, 200, (130, 390, 900, 1100, 1275), GREEN)),
+    (CommunityChest, ("COM3 Community Chest",)),
+    (Property, ("G3 Pennsylvania Avenue", 320, 28, 200, (150, 450, 1000, 1200, 1400), GREEN)),
+    # 35-39
+    (Property, ("R4 Short Line", 200, 25, 0, (0, 0, 0, 0, 0), RAILROADS)),
+    (Chance, ("CH3 Chance",)),
+    (Property, ("H1 Park Place", 350, 35, 200, (175, 500, 1100, 1300, 1500), INDIGO)),
+    (LuxuryTax, ("LT Luxury Tax",)),
+    (Property, ("H2 Boardwalk", 400, 50, 200, (200, 600, 1400, 1700, 2000), INDIGO)),
+)
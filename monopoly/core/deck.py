@@ -1,33 +1,56 @@
 class Deck:
     """ Parent for Community Chest and Chance cards
     """
+    __slots__ = ("cards", "pointer", "last_drawn", "withheld")
 
     def __init__(self, cards):
-        # List of cards
+        # List of cards (the order is set once, by shuffling, and never changes)
         self.cards = cards
         # Pointer to the next card to draw
         self.pointer = 0
+        # Index of the last drawn card
+        self.last_drawn = None
+        # Cards that are out of the deck (GOOJF cards kept by players):
+        # bitmask, bit N is set if the card N is out
+        self.withheld = 0
 
     def draw(self):
         """ Draw one card from the deck and put it underneath.
         Actually, we don't manipulate cards, just shuffle them once
-        and then move the pointer through the deck.
+        and then move the pointer through the deck, skipping withheld cards.
         """
-        drawn_card = self.cards[self.pointer]
-        self.pointer += 1
-        if self.pointer == len(self.cards):
-            self.pointer = 0
-        return drawn_card
+        if self.withheld == (1 << len(self.cards)) - 1:
+            raise IndexError("Draw from a deck with all cards out of it")
+        while True:
+            index = self.pointer
+            self.pointer += 1
+            if self.pointer == len(self.cards):
+                self.pointer = 0
+            if not self.withheld >> index & 1:
+                self.last_drawn = index
+                return self.cards[index]
 
     def remove(self, card_to_remove):
-        """ Remove a card (used for GOOJF card)
+        """ Take the card that has just been drawn out of the deck (used for GOOJF card).
+        Return its index, to put it back with add()
         """
-        self.cards.remove(card_to_remove)
-        # Make sure the pointer is still okay
-        if self.pointer == len(self.cards):
-            self.pointer = 0
+        if self.last_drawn is None or self.cards[self.last_drawn] is not card_to_remove:
+            raise ValueError(f"Only the last drawn card can be removed, not {card_to_remove}")
+        self.withheld |= 1 << self.last_drawn
+        return self.last_drawn
 
-    def add(self, card_to_add):
-        """ Add card (to put the removed GOOJF card back in once it's been used)
+    def add(self, card_index):
+        """ Put the removed card back (to put the removed GOOJF card back in once it's been used).
+        card_index is what remove() returned: the card goes back to its place in the deck
         """
-        self.cards.insert(self.pointer - 1, card_to_add)
+        if not self.withheld >> card_index & 1:
+            raise ValueError(f"{self.cards[card_index]} is not out of the deck")
+        self.withheld &= ~(1 << card_index)
+
+    def snapshot(self):
+        """ State of the deck (the order of the cards does not change after shuffling) """
+        return self.pointer, self.last_drawn, self.withheld
+
+    def restore(self, snapshot):
+        """ Go back to the state saved by snapshot() """
+        self.pointer, self.last_drawn, self.withheld = snapshot
@@ -5,15 +5,39 @@ that can:
 """
 
 import random
+from functools import lru_cache
+from itertools import product
+
+# Number of rolls drawn at once in the bulk mode
+BULK_ROLLS = 256
+# Most possible rolls (dice_sides ** dice_count) for the bulk mode to draw from,
+# with more of them the dice are rolled one die at a time (legacy)
+MAX_BULK_TABLE = 10_000
 
 
 def is_dice_are_double(cast):
     return len(set(cast)) == 1
 
 
+@lru_cache(maxsize=None)
+def all_possible_rolls(dice_count, dice_sides):
+    """ All equally likely rolls: tuples of (cast, score, is it a double),
+    for the bulk mode to draw from (there are dice_sides ** dice_count of them).
+    Casts are tuples, as the rolls are shared by all the games
+    """
+    return tuple((cast, sum(cast), is_dice_are_double(cast))
+                 for cast in product(range(1, dice_sides + 1), repeat=dice_count))
+
+
 class Dice:
-    """ Class to have dice settings, in case we want to play with that """
-    def __init__(self, seed, dice_count, dice_sides, log):
+    """ Class to have dice settings, in case we want to play with that
+    bulk: draw rolls BULK_ROLLS at a time (faster), instead of one die at a time (legacy),
+    if there are at most MAX_BULK_TABLE possible rolls.
+    Both are reproducible for a given seed, but produce different games
+    """
+    __slots__ = ("dice_count", "dice_sides", "local_random", "log", "bulk", "rolls", "rolls_pointer")
+
+    def __init__(self, seed, dice_count, dice_sides, log, bulk=False):
         self.dice_count = dice_count
         self.dice_sides = dice_sides
         
@@ -22,14 +46,39 @@ class Dice:
         self.local_random.seed(seed)
         
         self.log = log
+
+        # Rolls drawn in advance (bulk mode) and the next one to use
+        self.bulk = bulk and dice_sides ** dice_count <= MAX_BULK_TABLE
+        self.rolls = []
+        self.rolls_pointer = 0
     
     def roll(self):
         """ Cast dice and return: return raw cast, the score, is it a double """
-        cast = [self.local_random.randint(1, self.dice_sides) for _ in range(self.dice_count)]
-        self.log.add(f"roll: {sum(cast)}, ({cast}{',double' if is_dice_are_double(cast) else ''})")
-        
+        if self.bulk:
+            return self.roll_from_bulk()
+        # randrange(1, dice_sides + 1) is what randint(1, dice_sides) calls, so the numbers are the same
+        randrange, dice_end = self.local_random.randrange, self.dice_sides + 1
+        cast = [randrange(1, dice_end) for _ in range(self.dice_count)]
+        dice_sum = sum(cast)
         # if values are the same (double in case of 2 dice)
-        return cast, sum(cast), is_dice_are_double(cast)
+        is_double = is_dice_are_double(cast)
+        self.log.add("roll: {}, ({}{})", dice_sum, cast, ",double" if is_double else "")
+
+        return cast, dice_sum, is_double
+
+    def roll_from_bulk(self):
+        """ Take the next roll from the ones drawn in advance (draw more if they run out) """
+        if self.rolls_pointer == len(self.rolls):
+            self.rolls = self.local_random.choices(all_possible_rolls(self.dice_count, self.dice_sides),
+                                                   k=BULK_ROLLS)
+            self.rolls_pointer = 0
+        cast, dice_sum, is_double = self.rolls[self.rolls_pointer]
+        self.rolls_pointer += 1
+        # Logged as a list, the way legacy rolls are
+        if self.log.enabled:
+            self.log.add("roll: {}, ({}{})", dice_sum, list(cast), ",double" if is_double else "")
+
+        return cast, dice_sum, is_double
 
     def shuffle(self, object_to_shuffle):
         """ Copy of random.shuffle, but with local random generator (thread safe) """
@@ -3,42 +3,62 @@
 2. Players
 3. Making moves by all players
 """
-from typing import Tuple
+import cProfile
+import os
+import random
+from typing import List, Tuple
 
 from monopoly.core.move_result import MoveResult
 from monopoly.core.board import Board
 from monopoly.core.dice import Dice
+from monopoly.core.game_config import GameConfig
+from monopoly.core.game_result import EndReason, GameResult
 from monopoly.core.game_utils import assign_property, _check_end_conditions, log_players_and_board_state
+from monopoly.core.phase_timer import PhaseTimer, TimedPlayer, TimedDice
 from monopoly.core.player import Player
+from monopoly.core.stall_detectors import create_stall_detectors
+from monopoly.event_stream import StructuredLog
 from monopoly.log import Log
-from monopoly.log_settings import LogSettings
-from settings import SimulationSettings, GameSettings, GameMechanics
 
 
-def monopoly_game(game_number_and_seeds: Tuple[int,int]) -> None:
+def monopoly_game(game_number_and_seeds: Tuple[int,int], config: GameConfig) -> GameResult:
     """ Simulation of one game.
     For convenience to set up a multi-thread,
     parameters are packed into a tuple: (game_number, game_seed):
     - "game number" is here to print out in the game log
     - "game_seed" to initialize random generator for the game
+    config is the GameConfig with all the settings the game uses
+    Return the game's GameResult (bankruptcies, length, end reason, net worth)
     """
     game_number, game_seed = game_number_and_seeds
-    board, dice, events_log, bankruptcies_log = setup_game(game_number, game_seed)
+    # Time of the game that is not in any other phase (setup, end conditions, logging) goes to "game"
+    timer = PhaseTimer() if config.phase_timings else None
+    if timer is not None:
+        timer.start("game")
+    board, dice, events_log = setup_game(game_number, game_seed, config, timer)
+    bankruptcies = []
 
     # Set up players with their behavior settings, starting money and properties.
-    players = setup_players(board, dice)
+    players = setup_players(board, dice, config, timer)
+    stall_detectors = create_stall_detectors(config.stall_detectors)
 
     # Play the game until:
     # 1. Win: Only 1 player did not bankrupt
     # 2. Several survivors: All non-bankrupt players have more cash than `never_bankrupt_cash`
-    # 3. Turn limit reached
-    for turn_n in range(1, SimulationSettings.n_moves + 1):
-        events_log.add(f"\n== GAME {game_number} Turn {turn_n} ===")
+    # 3. Stalled: a stall detector says there will be no more bankruptcies
+    # 4. Turn limit reached
+    end_reason, turns_played = EndReason.TURN_LIMIT, config.n_moves
+    for turn_n in range(1, config.n_moves + 1):
+        events_log.turn = turn_n
+        events_log.add("\n== GAME {} Turn {} ===", game_number, turn_n)
         log_players_and_board_state(board, events_log, players)
         board.log_board_state(events_log)
         events_log.add("")
 
-        if _check_end_conditions(players, events_log, game_number, turn_n):
+        end_condition = _check_end_conditions(players, events_log, game_number, turn_n, config,
+                                              board, stall_detectors)
+        if end_condition is not None:
+            end_reason, turns_played = end_condition, turn_n - 1
             break
 
         # Players make their moves
@@ -47,25 +67,76 @@ def monopoly_game(game_number_and_seeds: Tuple[int,int]) -> None:
                 continue
             move_result = player.make_a_move(board, players, dice, events_log)
             if move_result == MoveResult.BANKRUPT:
-                bankruptcies_log.add(f"{game_number}\t{player}\t{turn_n}")
+                bankruptcies.append((player.name, turn_n))
 
     # log the final game state
     board.log_current_map(events_log)
     events_log.save()
-    if bankruptcies_log.content:
-        bankruptcies_log.save()
+    if timer is not None:
+        timer.stop()
+
+    return GameResult(
+        game_number=game_number,
+        game_seed=game_seed,
+        turns=turns_played,
+        end_reason=end_reason,
+        bankruptcies=bankruptcies,
+        net_worth={player.name: 0 if player.is_bankrupt else player.net_worth() for player in players},
+        timings=timer.results() if timer is not None else None)
+
+
+def derive_game_seed(master_seed: int, game_number: int) -> int:
+    """ Seed for a game, derived from the simulation's seed and the game number only,
+    so a worker can compute the seeds of its games by itself, regardless of
+    how the games are split between workers
+    """
+    return random.Random(master_seed * 2 ** 32 + game_number).getrandbits(32)
 
 
-def setup_players(board, dice):
-    players = [Player(player_name, player_setting)
-               for player_name, player_setting in GameSettings.players_list]
+def monopoly_games_batch(batch: Tuple[int, int, int, GameConfig]) -> List[GameResult]:
+    """ Play a range of games in one worker task.
+    Parameters are packed into a tuple: (first_game_number, last_game_number, master_seed, config),
+    game seeds are derived from the master seed with derive_game_seed().
+    Return results of all games in the range (sent back as one message).
+    With config.profile_dir, the batch is profiled, and the profile is saved there
+    (to be merged with the other batches' profiles by the simulation).
+    With config.lockstep_engine, the batch is played by the lockstep engine (lockstep_games_batch).
+    """
+    first_game_number, last_game_number, master_seed, config = batch
+    if config.lockstep_engine:
+        # The lockstep engine needs NumPy, it is imported only when it is used
+        from monopoly.core.lockstep import lockstep_games_batch
+        return lockstep_games_batch(batch)
+
+    def play_games():
+        return [monopoly_game((game_number, derive_game_seed(master_seed, game_number)), config)
+                for game_number in range(first_game_number, last_game_number + 1)]
+
+    if config.profile_dir is None:
+        return play_games()
+    profiler = cProfile.Profile()
+    game_results = profiler.runcall(play_games)
+    profiler.dump_stats(os.path.join(config.profile_dir, f"games_{first_game_number}.pstats"))
+    return game_results
+
+
+def setup_players(board, dice, config, timer=None):
+    if timer is None:
+        players = [Player(player_name, player_setting)
+                   for player_name, player_setting in config.players]
+    else:
+        players = [TimedPlayer(player_name, player_setting, timer)
+                   for player_name, player_setting in config.players]
+    for player in players:
+        player.check_running_totals = config.check_running_totals
 
-    if GameSettings.shuffle_players:
+    if config.shuffle_players:
         dice.shuffle(players)  # dice has a thread-safe copy of random.shuffle
+    board.players = players
 
     # Set up players starting money according to the game settings:
     # Supports either a dict (money per-player) or single value
-    starting_money = GameSettings.starting_money
+    starting_money = config.starting_money
     if isinstance(starting_money, dict):
         for player in players:
             player.money = starting_money.get(player.name, 0)
@@ -76,22 +147,28 @@ def setup_players(board, dice):
 
     # set up players' initial properties
     for player in players:
-        property_indices = GameSettings.starting_properties.get(player.name, [])
+        property_indices = config.starting_properties.get(player.name, [])
         for cell_index in property_indices:
             assign_property(player, board.cells[cell_index], board)
 
     return players
 
 
-def setup_game(game_number, game_seed):
-    events_log = Log(LogSettings.EVENTS_LOG_PATH, disabled=not LogSettings.KEEP_GAME_LOG)
-    events_log.add(f"= GAME {game_number} of {SimulationSettings.n_games} (seed = {game_seed}) =")
-
-    bankruptcies_log = Log(LogSettings.BANKRUPTCIES_PATH)
+def setup_game(game_number, game_seed, config, timer=None):
+    if config.structured_events_log:
+        events_log = StructuredLog(config.events_log_path, game_number, disabled=not config.keep_game_log)
+    else:
+        events_log = Log(config.events_log_path, disabled=not config.keep_game_log)
+    events_log.add("= GAME {} of {} (seed = {}) =", game_number, config.n_games, game_seed)
 
     # Initialize the board (plots, chance, community chest etc.)
-    board = Board(GameSettings)
-    dice = Dice(game_seed, GameMechanics.dice_count, GameMechanics.dice_sides, events_log)
+    board = Board(config)
+    if timer is None:
+        dice = Dice(game_seed, config.mechanics.dice_count, config.mechanics.dice_sides, events_log,
+                    bulk=config.mechanics.bulk_dice)
+    else:
+        dice = TimedDice(game_seed, config.mechanics.dice_count, config.mechanics.dice_sides, events_log, timer,
+                         bulk=config.mechanics.bulk_dice)
     dice.shuffle(board.chance.cards)
     dice.shuffle(board.chest.cards)
-    return board, dice, events_log, bankruptcies_log
+    return board, dice, events_log
@@ -0,0 +1,102 @@
+""" Everything a game needs to know about the settings, in one picklable object.
+The game gets it as a parameter (instead of reading the settings module),
+so one worker process can play games with different settings (see sweep.py)
+"""
+import dataclasses
+from dataclasses import dataclass
+from os import PathLike
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from monopoly.log_settings import LogSettings
+from settings import SimulationSettings, GameSettings, GameMechanics, StandardPlayerSettings
+
+
+@dataclass(frozen=True)
+class GameConfig:
+    # Rules of the game
+    mechanics: GameMechanics
+    # (player name, player behavior settings)
+    players: Tuple[Tuple[str, StandardPlayerSettings], ...]
+    shuffle_players: bool
+    starting_money: Union[int, Dict[str, int]]
+    starting_properties: Dict[str, List[int]]
+    board_layout: tuple
+    chance_cards: tuple
+    community_chest_cards: tuple
+
+    # Simulation settings the game uses
+    n_games: int
+    n_moves: int
+    never_bankrupt_cash: int
+    stall_detectors: tuple
+    check_running_totals: bool
+
+    # Events log
+    keep_game_log: bool
+    events_log_path: Union[str, PathLike]
+    # Write events as binary records instead of text (see event_stream.py)
+    structured_events_log: bool = False
+
+    # Instrumentation: time the phases of the games (see phase_timer.py),
+    # profile the games and save profiles to this directory
+    phase_timings: bool = False
+    profile_dir: Optional[Union[str, PathLike]] = None
+
+    # Play the games with the lockstep batch engine (see lockstep.py)
+    lockstep_engine: bool = False
+
+    @classmethod
+    def from_settings(cls, simulation_settings=SimulationSettings, game_settings=GameSettings,
+                      log_settings=LogSettings):
+        """ Take the current values from the settings (classes or instances) """
+        return cls(
+            mechanics=game_settings.mechanics,
+            # Player settings in the players list may be classes (then default values are used)
+            players=tuple((player_name, player_settings() if isinstance(player_settings, type) else player_settings)
+                          for player_name, player_settings in game_settings.players_list),
+            shuffle_players=game_settings.shuffle_players,
+            starting_money=game_settings.starting_money,
+            starting_properties=game_settings.starting_properties,
+            board_layout=game_settings.board_layout,
+            chance_cards=tuple(game_settings.chance_cards),
+            community_chest_cards=tuple(game_settings.community_chest_cards),
+            n_games=simulation_settings.n_games,
+            n_moves=simulation_settings.n_moves,
+            never_bankrupt_cash=simulation_settings.never_bankrupt_cash,
+            stall_detectors=tuple(simulation_settings.stall_detectors),
+            check_running_totals=simulation_settings.check_running_totals,
+            keep_game_log=log_settings.KEEP_GAME_LOG,
+            events_log_path=log_settings.STRUCTURED_EVENTS_LOG_PATH if log_settings.STRUCTURED_EVENTS_LOG
+            else log_settings.EVENTS_LOG_PATH,
+            structured_events_log=log_settings.STRUCTURED_EVENTS_LOG,
+            phase_timings=simulation_settings.phase_timings,
+            lockstep_engine=simulation_settings.lockstep_engine,
+        )
+
+    def with_overrides(self, overrides: Dict[str, Any]) -> "GameConfig":
+        """ Copy of the config with some settings changed: {"Class.attribute": value}, where Class is:
+        - GameMechanics: rules of the game
+        - a player settings class (StandardPlayerSettings, HeroPlayerSettings...):
+          changes the settings of all players with exactly this class of settings
+        - SimulationSettings or GameSettings: the config's field of the same name
+        """
+        config = self
+        for name, value in overrides.items():
+            class_name, attribute = name.split(".")
+            if class_name == "GameMechanics":
+                mechanics = dataclasses.replace(config.mechanics, **{attribute: value})
+                config = dataclasses.replace(config, mechanics=mechanics)
+            elif class_name in ("SimulationSettings", "GameSettings"):
+                if attribute not in {config_field.name for config_field in dataclasses.fields(config)}:
+                    raise AttributeError(f"Unknown setting {name}")
+                config = dataclasses.replace(config, **{attribute: value})
+            else:
+                players = []
+                for player_name, player_settings in config.players:
+                    if type(player_settings).__name__ == class_name:
+                        player_settings = dataclasses.replace(player_settings, **{attribute: value})
+                    players.append((player_name, player_settings))
+                if all(type(player_settings).__name__ != class_name for _, player_settings in players):
+                    raise AttributeError(f"No players with {class_name} for {name}")
+                config = dataclasses.replace(config, players=tuple(players))
+        return config
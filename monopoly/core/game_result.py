@@ -0,0 +1,37 @@
+""" Compact record of one game's outcome,
+returned by the workers so the main process can aggregate results
+without going through the log files
+"""
+from dataclasses import dataclass, field
+from enum import Enum, auto
+from typing import Dict, List, Optional, Tuple
+
+
+class EndReason(Enum):
+    ONE_PLAYER_LEFT = auto()  # Fewer than 2 players remain (a clear winner)
+    ALL_RICH = auto()  # All remaining players have more than `never_bankrupt_cash`
+    TURN_LIMIT = auto()  # Reached `n_moves` turns
+    # Ended early by a stall detector (see stall_detectors.py)
+    NO_MONOPOLIES = auto()  # No monopolies and no trades that can make one
+    CASH_TRENDING_UP = auto()  # All players' cash keeps growing
+    LOW_BANKRUPTCY_RISK = auto()  # Another bankruptcy is very unlikely
+
+    @property
+    def is_stall(self):
+        """ Was the game ended early by a stall detector """
+        return self in (EndReason.NO_MONOPOLIES, EndReason.CASH_TRENDING_UP, EndReason.LOW_BANKRUPTCY_RISK)
+
+
+@dataclass
+class GameResult:
+    game_number: int
+    game_seed: int
+    # Number of turns played
+    turns: int
+    end_reason: EndReason
+    # (player_name, turn) in the order players went bankrupt
+    bankruptcies: List[Tuple[str, int]] = field(default_factory=list)
+    # {player_name: net worth at the end of the game}, 0 for bankrupt players
+    net_worth: Dict[str, int] = field(default_factory=dict)
+    # {phase: (seconds, calls)} if the game was timed (see phase_timer.py)
+    timings: Optional[Dict[str, Tuple[float, int]]] = None
@@ -1,23 +1,25 @@
-from typing import List
+from typing import List, Optional
 
+from monopoly.core.game_result import EndReason
 from monopoly.core.player import Player
 from monopoly.log import Log
-from settings import SimulationSettings
 
 
 def assign_property(player, property_to_assign, board):
-    """ Assigns a property to a player and updates the board state and check if a multiplier needs to be updated."""
-    property_to_assign.owner = player
-    player.owned.append(property_to_assign)
-    board.recalculate_monopoly_multipliers(property_to_assign)
-    player.update_lists_of_properties_to_trade(board)
+    """ Assigns a property to a player and updates the board state
+    (monopoly multipliers, players' trade wishlists)."""
+    player.add_property(property_to_assign)
+    board.set_owner(property_to_assign, player)
 
 
-def _check_end_conditions(players: List[Player], log: Log, game_number, turn_n) -> bool:
+def _check_end_conditions(players: List[Player], log: Log, game_number, turn_n, config,
+                          board=None, stall_detectors=()) -> Optional[EndReason]:
     """
-    Return True when:
+    Return the EndReason when:
       1) fewer than 2 players remain, or
-      2) all rich: all non-bankrupt players have > never_bankrupt_cash.
+      2) all rich: all non-bankrupt players have > never_bankrupt_cash, or
+      3) one of the stall detectors says the game is stalled.
+    Return None if the game goes on.
     Logs the reason before returning.
     """
     alive = [p for p in players if not p.is_bankrupt]
@@ -25,25 +27,36 @@ def _check_end_conditions(players: List[Player], log: Log, game_number, turn_n)
 
     # 1) fewer than 2 players left
     if n_alive < 2:
-        log.add(f"Only {n_alive} alive player remains, game over")
-        return True
+        log.add("Only {} alive player remains, game over", n_alive)
+        return EndReason.ONE_PLAYER_LEFT
 
     # 2) everyone is above the never_bankrupt_cash threshold
-    threshold = SimulationSettings.never_bankrupt_cash
+    threshold = config.never_bankrupt_cash
     if all(p.money > threshold for p in alive):
-        log.add(f"== All Rich ==: GAME {game_number}, Turn {turn_n}: all non-bankrupt players have more than {threshold}$, this game will never end")
-        return True
-    return False
+        log.add("== All Rich ==: GAME {}, Turn {}: all non-bankrupt players have more than {}$, this game will never end",
+                game_number, turn_n, threshold)
+        return EndReason.ALL_RICH
+
+    # 3) stall detectors (all of them are checked, as they may keep track of the game's history)
+    turns_left = config.n_moves - turn_n + 1
+    stalled = [detector for detector in stall_detectors
+               if detector.is_stalled(board, alive, turn_n, turns_left)]
+    if stalled:
+        log.add("== Stalled ==: GAME {}, Turn {}: {}, ending the game", game_number, turn_n, stalled[0].describe())
+        return stalled[0].end_reason
+    return None
 
 
 def log_players_and_board_state(board, log, players):
     """ Current player's position, money and net worth, looks like this:
          For example: Player 'Hero': $1220 (net $1320), at 21 (E1 Kentucky Avenue)"""
+    # Skip the whole thing (including net worth calculation) if the log is off
+    if not log.enabled:
+        return
     for player_n, player in enumerate(players):
         if not player.is_bankrupt:
 
-            log.add(f"- {player.name}: " +
-                    f"${int(player.money)} (net ${player.net_worth()}), " +
-                    f"at position {player.position} ({board.cells[player.position].name})")
+            log.add("- {}: ${} (net ${}), at position {} ({})", player, int(player.money),
+                    player.net_worth(), player.position, board.cells[player.position])
         else:
-            log.add(f"- Player {player_n}, '{player.name}': Bankrupt")
+            log.add("- Player {}, '{}': Bankrupt", player_n, player)
@@ -0,0 +1,1061 @@
+""" Lockstep batch engine: plays a whole batch of games at once.
+Instead of Board and Player objects, the state of all games is kept in NumPy arrays,
+one row per game (positions, cash, owners, houses, mortgages, jail...), and all games advance
+together, turn by turn and player by player, in the order of the game.
+The steps most moves take (dice, movement, salary, cards, taxes, buying, rent, building, unmortgaging),
+and selling and mortgaging to pay, are done for all games in one go. The rare and complex branches
+go back to the Player's logic: fair trade deals (Player.fair_deal, worked out once per kind of deal),
+and the liquidation that raises exactly all the player can (Player.plan_liquidation, on a scratch
+Board and Player loaded with the game's state).
+
+The rules and players' behavior are the same as in monopoly_game (see player.py), so the results
+(GameResults, bankruptcies.tsv) of the two engines can be compared statistically, but the games
+are not the same: dice rolls and shuffles come from one NumPy generator per batch, seeded by
+the master seed and the batch's first game number. Games can't be replayed one by one,
+stall detectors and phase timings are not supported, and there is no events log.
+Games are played with this engine with config.lockstep_engine (see monopoly_games_batch).
+It is faster with large batches (up to SLOTS games at a time): a step takes almost as long for a few games
+as for hundreds of them.
+NumPy (2.0 or later, for bitwise_count) is only needed for this engine, lockstep_games_batch checks for it.
+"""
+import cProfile
+import os
+from typing import List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from monopoly.core.board import Board, movement_tables, mortgage_tables
+from monopoly.core.card import AdvanceToCard, AdvanceToNearestCard, GoBackCard, GoToJailCard, \
+    GetOutOfJailFreeCard, CollectCard, PayCard, RepairsCard, PayEachPlayerCard, CollectFromEachPlayerCard
+from monopoly.core.cell import Property
+from monopoly.core.constants import BROWN, INDIGO, RAILROADS, UTILITIES
+from monopoly.core.game import derive_game_seed
+from monopoly.core.game_config import GameConfig
+from monopoly.core.game_result import EndReason, GameResult
+from monopoly.core.player import Player
+
+# Games played at the same time by one worker task (a finished game's slot goes to the next game of the batch)
+SLOTS = 30_000
+# Fewer games than this are liquidated one by one (Player.plan_liquidation)
+FEW_GAMES = 16
+
+# What happens on landing on a cell, by the cell's landing handler
+NOTHING, PROPERTY, CHANCE, CHEST, GO_TO_JAIL, LUXURY_TAX, INCOME_TAX, FREE_PARKING = range(8)
+LANDING_KINDS = {
+    None: NOTHING,
+    "handle_landing_on_property": PROPERTY,
+    "handle_landing_on_chance": CHANCE,
+    "handle_landing_on_community_chest": CHEST,
+    "handle_landing_on_go_to_jail": GO_TO_JAIL,
+    "handle_landing_on_luxury_tax": LUXURY_TAX,
+    "handle_landing_on_income_tax": INCOME_TAX,
+    "handle_landing_on_free_parking": FREE_PARKING,
+}
+# Decks, by the cell kind
+DECKS = {CHANCE: 0, CHEST: 1}
+
+# What a card does, by the card's class
+ADVANCE_TO, ADVANCE_TO_NEAREST, GO_BACK, GO_TO_JAIL_CARD, GET_OUT_OF_JAIL, COLLECT, PAY, REPAIRS, \
+    PAY_EACH_PLAYER, COLLECT_FROM_EACH_PLAYER = range(10)
+CARD_KINDS = {
+    AdvanceToCard: ADVANCE_TO,
+    AdvanceToNearestCard: ADVANCE_TO_NEAREST,
+    GoBackCard: GO_BACK,
+    GoToJailCard: GO_TO_JAIL_CARD,
+    GetOutOfJailFreeCard: GET_OUT_OF_JAIL,
+    CollectCard: COLLECT,
+    PayCard: PAY,
+    RepairsCard: REPAIRS,
+    PayEachPlayerCard: PAY_EACH_PLAYER,
+    CollectFromEachPlayerCard: COLLECT_FROM_EACH_PLAYER,
+}
+# Player's note from AdvanceToNearestCard, that changes the rent (see Player.handle_landing_on_property)
+NO_NOTE, DOUBLE_RENT, TEN_TIMES_DICE = range(3)
+RENT_NOTES = {"double rent": DOUBLE_RENT, "10 times dice": TEN_TIMES_DICE}
+
+# Owner of a property nobody owns
+NOBODY = -1
+# Payee of the payments to the bank
+BANK = -1
+# Houses of a property with a hotel (so a hotel is "the most houses" when building evenly)
+HOTEL = 5
+# Larger than any order of acquisition, to pick the cheapest property and then the one owned earlier
+ACQUIRED_LIMIT = 1 << 32
+# Larger than any of these keys (cost of a house * ACQUIRED_LIMIT + order of acquisition)
+KEY_LIMIT = 1 << 62
+
+
+class DeckTables:
+    """ Cards of a deck as arrays, by the card's number (in the deck as it is in the settings) """
+
+    def __init__(self, cards, group_numbers):
+        self.size = len(cards)
+        try:
+            self.kind = np.array([CARD_KINDS[type(card)] for card in cards], dtype=np.int64)
+        except KeyError as error:
+            raise ValueError(f"The lockstep engine does not know this kind of card: {error}") from None
+        # Parameters of the cards: target cell (or the group, for the nearest one), amount (or spaces,
+        # or amount per house), amount per hotel, rent note
+        self.target = np.array([card.target if isinstance(card, AdvanceToCard) else
+                                group_numbers[card.group] if isinstance(card, AdvanceToNearestCard) else 0
+                                for card in cards], dtype=np.int64)
+        self.amount = np.array([card.spaces if isinstance(card, GoBackCard) else
+                                card.per_house if isinstance(card, RepairsCard) else
+                                getattr(card, "amount", 0)
+                                for card in cards], dtype=np.int64)
+        self.per_hotel = np.array([getattr(card, "per_hotel", 0) for card in cards], dtype=np.int64)
+        self.rent_note = np.array([RENT_NOTES.get(getattr(card, "rent_note", None), NO_NOTE)
+                                   for card in cards], dtype=np.int64)
+        self.kinds = sorted(set(self.kind.tolist()))
+
+
+class Rules:
+    """ Everything the engine needs from the GameConfig, as arrays: board by position,
+    decks by card, players' settings by the player's number in config.players.
+    Also keeps the fair deals worked out for the batch (they are the same for all games)
+    """
+
+    def __init__(self, config: GameConfig):
+        if config.stall_detectors:
+            raise ValueError("The lockstep engine does not support stall detectors")
+        if config.phase_timings:
+            raise ValueError("The lockstep engine does not support phase timings")
+        if config.keep_game_log:
+            raise ValueError("The lockstep engine does not keep the events log, turn off LogSettings.KEEP_GAME_LOG")
+        self.config = config
+        mechanics = config.mechanics
+
+        # Cells of the board (the properties are the templates for the fair deals)
+        self.cells = [cell_class(*parameters) for cell_class, parameters in config.board_layout]
+        self.n_cells = len(self.cells)
+        # Sets of cells are bitmasks in int64
+        if self.n_cells > 63:
+            raise ValueError(f"The lockstep engine plays boards of up to 63 cells, not {self.n_cells}")
+        for position, cell in enumerate(self.cells):
+            cell.position = position
+        try:
+            self.kind = np.array([LANDING_KINDS[cell.landing_handler] for cell in self.cells], dtype=np.int64)
+        except KeyError as error:
+            raise ValueError(f"The lockstep engine does not know this landing handler: {error}") from None
+        self.landing_kinds = sorted(set(self.kind.tolist()) - {NOTHING})
+        self.jail_position, nearest_in_group = movement_tables(config.board_layout)
+        self.bits = np.left_shift(1, np.arange(self.n_cells, dtype=np.int64))
+
+        # Properties: prices, rents (base rent, then with 1-4 houses and a hotel), mortgage amounts
+        properties = [cell if isinstance(cell, Property) else None for cell in self.cells]
+        self.cost_base = np.array([cell.cost_base if cell else 0 for cell in properties], dtype=np.int64)
+        self.cost_house = np.array([cell.cost_house if cell else 0 for cell in properties], dtype=np.int64)
+        self.rent = np.array([(cell.rent_base, *cell.rent_house) if cell else (0,) * 6 for cell in properties],
+                             dtype=np.int64)
+        self.is_utility = np.array([cell is not None and cell.group == UTILITIES for cell in properties])
+        mortgage_amounts = [amounts or (0, 0, 0)
+                            for amounts in mortgage_tables(config.board_layout, mechanics)]
+        self.mortgage_price = np.array([amounts[0] for amounts in mortgage_amounts], dtype=np.int64)
+        self.unmortgage_cost = np.array([amounts[1] for amounts in mortgage_amounts], dtype=np.float64)
+        self.mortgaged_worth = np.array([amounts[2] for amounts in mortgage_amounts], dtype=np.int64)
+        self.min_unmortgage_cost = self.unmortgage_cost[[cell is not None for cell in properties]] \
+            .min(initial=np.inf)
+
+        # Groups: positions of the group's properties, their bitmask, can houses be built there
+        groups = {}
+        for position, cell in enumerate(properties):
+            if cell is not None:
+                groups.setdefault(cell.group, []).append(position)
+        self.groups = [(np.array(positions), int(self.bits[positions].sum()), group not in (RAILROADS, UTILITIES))
+                       for group, positions in groups.items()]
+        self.group_masks = {group: int(self.bits[positions].sum()) for group, positions in groups.items()}
+        # Properties of the groups that are never traded on their own (Player.fair_deal)
+        self.not_traded_alone = sum(self.group_masks.get(group, 0) for group in (UTILITIES, INDIGO, BROWN))
+        # Bitmask of the cell's group, and rent multipliers by the number of properties of the group the owner has
+        largest_group = max(len(positions) for positions in groups.values())
+        self.group_mask = np.zeros(self.n_cells, dtype=np.int64)
+        self.multiplier = np.ones((self.n_cells, largest_group + 1), dtype=np.int64)
+        for group, positions in groups.items():
+            multipliers = Board.monopoly_multipliers_by_count(group, len(positions))
+            self.group_mask[positions] = self.group_masks[group]
+            self.multiplier[positions, :len(multipliers)] = multipliers
+        self.min_cost_house = min((int(self.cost_house[positions].min())
+                                   for positions, _, buildable in self.groups if buildable), default=0)
+        # Properties houses can be built on, their groups (as columns of this list, padded with its length),
+        # and the group of each of them
+        buildable_groups = [positions.tolist() for positions, _, buildable in self.groups if buildable]
+        self.buildable = np.array(sorted(sum(buildable_groups, [])), dtype=np.int64)
+        column = {position: column for column, position in enumerate(self.buildable.tolist())}
+        self.buildable_groups = np.full((len(buildable_groups), largest_group), self.buildable.size, dtype=np.int64)
+        self.buildable_group = np.zeros(self.buildable.size, dtype=np.int64)
+        for group, positions in enumerate(buildable_groups):
+            self.buildable_groups[group, :len(positions)] = [column[position] for position in positions]
+            self.buildable_group[[column[position] for position in positions]] = group
+
+        # Nearest property of a group, by the group's number and the position
+        group_numbers = {group: number for number, group in enumerate(nearest_in_group)}
+        self.nearest = np.array([nearest_in_group[group] for group in nearest_in_group], dtype=np.int64)
+        self.decks = (DeckTables(config.chance_cards, group_numbers),
+                      DeckTables(config.community_chest_cards, group_numbers))
+
+        # Players: names, settings, starting money and properties
+        self.names = [player_name for player_name, _ in config.players]
+        self.settings = [player_settings for _, player_settings in config.players]
+        self.n_players = len(self.names)
+        self.unspendable = np.array([settings.unspendable_cash for settings in self.settings], dtype=np.int64)
+        self.ignored = np.array([sum(self.group_masks.get(group, 0) for group in settings.ignore_property_groups)
+                                 for settings in self.settings], dtype=np.int64)
+        self.willing = np.array([settings.is_willing_to_make_trades for settings in self.settings])
+        starting_money = config.starting_money
+        self.starting_money = np.array([starting_money.get(player_name, 0) if isinstance(starting_money, dict)
+                                        else starting_money for player_name in self.names], dtype=np.float64)
+        self.starting_properties = [config.starting_properties.get(player_name, [])
+                                    for player_name in self.names]
+
+        # Fair deals worked out so far {(gives, receives, player, other player): deal}
+        self.fair_deals = {}
+
+    def fair_deal(self, gives, receives, player, other_player):
+        """ The deal (Player.fair_deal) when the player (by number in config.players) wants to give
+        and receive these properties (bitmasks) to and from the other player:
+        (positions to give, positions to receive, price difference), or None if there is no deal
+        """
+        key = (gives, receives, player, other_player)
+        if key not in self.fair_deals:
+            player_gives, player_receives = Player.fair_deal(
+                self.cells_of(gives), self.cells_of(receives), self.settings[player], self.settings[other_player])
+            deal = None
+            if player_gives and player_receives:
+                price_difference, _, _ = Player.get_price_difference(player_gives, player_receives)
+                deal = (tuple(cell.position for cell in player_gives),
+                        tuple(cell.position for cell in player_receives), price_difference)
+            self.fair_deals[key] = deal
+        return self.fair_deals[key]
+
+    def cells_of(self, mask):
+        """ Cells of the bitmask, in the board order """
+        return [cell for position, cell in enumerate(self.cells) if mask >> position & 1]
+
+    def members(self, masks):
+        """ Cells of the bitmasks, as a row of booleans (by position) for each bitmask """
+        return masks[:, np.newaxis] & self.bits != 0
+
+
+class Games:
+    """ State of several games in arrays (a row per game, a column per player or cell),
+    and the game's steps on them. Players of a game are in the order they move,
+    `order` has their numbers in config.players.
+    Functions of the steps take `games` (array of rows) and `player` (column): a step is
+    done for the same player in all these games
+    """
+
+    def __init__(self, rules: Rules, master_seed: int, first_game_number: int, n_slots: int):
+        self.rules = rules
+        self.master_seed = master_seed
+        # Dice and shuffles of all the games
+        self.generator = np.random.default_rng((master_seed, first_game_number))
+        mechanics = rules.config.mechanics
+        self.dice_count, self.dice_sides = mechanics.dice_count, mechanics.dice_sides
+        n_players, n_cells = rules.n_players, rules.n_cells
+
+        # Games: game number, turn, is the slot playing a game, bankruptcies [(name, turn)]
+        self.game_number = np.zeros(n_slots, dtype=np.int64)
+        self.turn = np.zeros(n_slots, dtype=np.int64)
+        self.active = np.zeros(n_slots, dtype=bool)
+        self.bankruptcies = [[] for _ in range(n_slots)]
+
+        # Players
+        self.order = np.zeros((n_slots, n_players), dtype=np.int64)
+        self.position = np.zeros((n_slots, n_players), dtype=np.int64)
+        self.money = np.zeros((n_slots, n_players), dtype=np.float64)
+        self.bankrupt = np.zeros((n_slots, n_players), dtype=bool)
+        self.in_jail = np.zeros((n_slots, n_players), dtype=bool)
+        self.days_in_jail = np.zeros((n_slots, n_players), dtype=np.int64)
+        self.had_doubles = np.zeros((n_slots, n_players), dtype=np.int64)
+        # Place in the deck of the GOOJF card the player keeps, for each deck (-1 if none)
+        self.get_out_of_jail = np.full((n_slots, n_players, 2), -1, dtype=np.int64)
+        # Player's settings (from config.players by `order`)
+        self.unspendable = np.zeros((n_slots, n_players), dtype=np.int64)
+        self.ignored = np.zeros((n_slots, n_players), dtype=np.int64)
+        self.willing = np.zeros((n_slots, n_players), dtype=bool)
+        # Note that changes the rent, for the player who is moving (see RENT_NOTES)
+        self.rent_note = np.zeros(n_slots, dtype=np.int64)
+
+        # Properties: owner, and the bitmask of each player's properties, houses (HOTEL for a hotel),
+        # bitmask of the mortgaged ones, and the order the owner got them in (the order of Player.owned)
+        self.owner = np.full((n_slots, n_cells), NOBODY, dtype=np.int64)
+        self.owns = np.zeros((n_slots, n_players), dtype=np.int64)
+        self.houses = np.zeros((n_slots, n_cells), dtype=np.int64)
+        self.mortgaged = np.zeros(n_slots, dtype=np.int64)
+        self.acquired = np.zeros((n_slots, n_cells), dtype=np.int64)
+        self.acquisitions = np.zeros(n_slots, dtype=np.int64)
+        # Bank: houses, hotels, Free Parking money
+        self.available_houses = np.zeros(n_slots, dtype=np.int64)
+        self.available_hotels = np.zeros(n_slots, dtype=np.int64)
+        self.free_parking_money = np.zeros(n_slots, dtype=np.float64)
+
+        # Decks: the order of the cards (shuffled once), the next one to draw,
+        # the cards out of the deck (bitmask by place in the deck)
+        self.deck_order = [np.zeros((n_slots, deck.size), dtype=np.int64) for deck in rules.decks]
+        self.deck_pointer = np.zeros((n_slots, 2), dtype=np.int64)
+        self.withheld = np.zeros((n_slots, 2), dtype=np.int64)
+
+        # Bitmasks of the properties the players want to sell and buy, and of their monopolies to build on,
+        # worked out again (update_wishlists) after ownership changes in the game
+        self.wants_to_sell = np.zeros((n_slots, n_players), dtype=np.int64)
+        self.wants_to_buy = np.zeros((n_slots, n_players), dtype=np.int64)
+        self.monopolies = np.zeros((n_slots, n_players), dtype=np.int64)
+        self.lists_stale = np.zeros(n_slots, dtype=bool)
+        # Can the player have a property to improve: not after next_property_to_improve found none,
+        # until the monopolies, buildings, mortgages or the bank's houses change
+        self.may_improve = np.zeros((n_slots, n_players), dtype=bool)
+        # The player's deal (see work_out_deals): the other player (-1 if no deal), price difference,
+        # and {(game, player): (positions to give, positions to receive)}
+        self.deal_other = np.full((n_slots, n_players), -1, dtype=np.int64)
+        self.deal_difference = np.zeros((n_slots, n_players), dtype=np.int64)
+        self.deals = {}
+        self.deals_stale = np.zeros((n_slots, n_players), dtype=bool)
+
+        # Scratch objects to plan liquidations with the Player's logic
+        self.board = Board(rules.config)
+        self.player = Player("", None)
+
+    def play(self, game_numbers) -> List[GameResult]:
+        """ Play the games, as many at a time as there are slots """
+        results = []
+        queue = list(reversed(game_numbers))
+        while True:
+            free_slots = np.flatnonzero(~self.active)[:len(queue)]
+            if free_slots.size:
+                self.start_games(free_slots, [queue.pop() for _ in free_slots])
+            if not self.active.any():
+                break
+            results.extend(self.end_games())
+            for player in range(self.rules.n_players):
+                games = np.flatnonzero(self.active & ~self.bankrupt[:, player])
+                while games.size:
+                    games = self.make_a_move(games, player)
+            self.turn[self.active] += 1
+        results.sort(key=lambda game_result: game_result.game_number)
+        return results
+
+    def start_games(self, games, game_numbers):
+        """ Set up new games in these slots (setup_game and setup_players) """
+        rules, n_players, n_cells = self.rules, self.rules.n_players, self.rules.n_cells
+        mechanics = rules.config.mechanics
+        order = np.tile(np.arange(n_players), (games.size, 1))
+        if rules.config.shuffle_players:
+            order = self.generator.permuted(order, axis=1)
+        self.order[games] = order
+        self.game_number[games] = game_numbers
+        self.turn[games] = 1
+        self.active[games] = True
+        for game in games:
+            self.bankruptcies[game] = []
+
+        self.position[games] = 0
+        self.money[games] = rules.starting_money[order]
+        self.bankrupt[games] = False
+        self.in_jail[games] = False
+        self.days_in_jail[games] = 0
+        self.had_doubles[games] = 0
+        self.get_out_of_jail[games] = -1
+        self.unspendable[games] = rules.unspendable[order]
+        self.ignored[games] = rules.ignored[order]
+        self.willing[games] = rules.willing[order]
+        self.rent_note[games] = NO_NOTE
+
+        self.owner[games] = NOBODY
+        self.owns[games] = 0
+        self.houses[games] = 0
+        self.mortgaged[games] = 0
+        self.acquisitions[games] = 0
+        self.available_houses[games] = mechanics.available_houses
+        self.available_hotels[games] = mechanics.available_hotels
+        self.free_parking_money[games] = 0
+        for deck, deck_tables in enumerate(rules.decks):
+            self.deck_order[deck][games] = self.generator.permuted(
+                np.tile(np.arange(deck_tables.size), (games.size, 1)), axis=1)
+        self.deck_pointer[games] = 0
+        self.withheld[games] = 0
+
+        if any(rules.starting_properties):
+            for game in games:
+                for player in range(n_players):
+                    for position in rules.starting_properties[self.order[game, player]]:
+                        self.set_owner(game, position, player)
+        self.lists_stale[games] = True
+        self.deal_other[games] = -1
+        self.deals_stale[games] = True
+        self.may_improve[games] = True
+
+    def end_games(self) -> List[GameResult]:
+        """ Check the end conditions (_check_end_conditions) at the start of the turn,
+        and free the slots of the games that are over. Return results of these games
+        """
+        config = self.rules.config
+        games = np.flatnonzero(self.active)
+        turn = self.turn[games]
+        alive = ~self.bankrupt[games]
+        turn_limit = turn > config.n_moves
+        one_player_left = ~turn_limit & (alive.sum(axis=1) < 2)
+        all_rich = ~turn_limit & ~one_player_left & \
+            np.all(~alive | (self.money[games] > config.never_bankrupt_cash), axis=1)
+
+        results = [self.game_result(game, EndReason.TURN_LIMIT, config.n_moves) for game in games[turn_limit]]
+        for end_reason, ended in ((EndReason.ONE_PLAYER_LEFT, one_player_left), (EndReason.ALL_RICH, all_rich)):
+            results.extend(self.game_result(game, end_reason, self.turn[game] - 1) for game in games[ended])
+        self.active[games[turn_limit | one_player_left | all_rich]] = False
+        return results
+
+    def game_result(self, game, end_reason, turns) -> GameResult:
+        game_number = int(self.game_number[game])
+        return GameResult(
+            game_number=game_number,
+            # The seed monopoly_game would play this game number with (it is not the same game)
+            game_seed=derive_game_seed(self.master_seed, game_number),
+            turns=int(turns),
+            end_reason=end_reason,
+            bankruptcies=self.bankruptcies[game],
+            net_worth={self.rules.names[self.order[game, player]]:
+                       0 if self.bankrupt[game, player] else self.net_worth(game, player)
+                       for player in range(self.rules.n_players)})
+
+    def make_a_move(self, games, player):
+        """ Player.make_a_move in these games.
+        Return the games where the player rolled a double and goes again
+        """
+        # Before the throwing of the dice: trade, unmortgage, improve
+        self.trade(games, player)
+        self.unmortgage(games, player)
+        self.improve_properties(games, player)
+
+        dice_sum, is_double = self.roll(games.size)
+        # Get doubles for the third time: go to jail
+        third_double = is_double & (self.had_doubles[games, player] == 2)
+        self.go_to_jail(games[third_double], player)
+        moving = ~third_double
+        # Players in jail, some of them stay there
+        in_jail = moving & self.in_jail[games, player]
+        if in_jail.any():
+            moving[in_jail] = ~self.stay_in_jail(games[in_jail], player, is_double[in_jail])
+        games, dice_sum, is_double = games[moving], dice_sum[moving], is_double[moving]
+
+        self.advance_to(games, player, (self.position[games, player] + dice_sum) % self.rules.n_cells)
+        went_to_jail = self.handle_landing(games, player)
+        self.rent_note[games] = NO_NOTE
+
+        bankrupt = ~went_to_jail & self.bankrupt[games, player]
+        for game in games[bankrupt]:
+            self.bankruptcies[game].append((self.rules.names[self.order[game, player]], int(self.turn[game])))
+        done = went_to_jail | bankrupt
+        again = ~done & is_double
+        self.had_doubles[games[again], player] += 1
+        self.had_doubles[games[~done & ~is_double], player] = 0
+        return games[again]
+
+    def roll(self, n_rolls):
+        """ Roll the dice n_rolls times: (dice sums, are they doubles) """
+        cast = self.generator.integers(1, self.dice_sides + 1, size=(n_rolls, self.dice_count))
+        return cast.sum(axis=1), np.all(cast == cast[:, :1], axis=1)
+
+    def go_to_jail(self, games, player):
+        self.position[games, player] = self.rules.jail_position
+        self.in_jail[games, player] = True
+        self.had_doubles[games, player] = 0
+        self.days_in_jail[games, player] = 0
+
+    def stay_in_jail(self, games, player, is_double):
+        """ Player.is_player_stay_in_jail: GOOJF card, double or the fine on the third day get the player out.
+        Return which of them stay in jail
+        """
+        cards = self.get_out_of_jail[games, player]
+        uses_chance_card = cards[:, 0] >= 0
+        uses_chest_card = ~uses_chance_card & (cards[:, 1] >= 0)
+        for deck, uses_card in enumerate((uses_chance_card, uses_chest_card)):
+            card_games = games[uses_card]
+            # The card goes back to the deck
+            self.withheld[card_games, deck] &= ~np.left_shift(1, cards[uses_card, deck])
+            self.get_out_of_jail[card_games, player, deck] = -1
+        leaves = uses_chance_card | uses_chest_card | is_double
+        pays_fine = ~leaves & (self.days_in_jail[games, player] == 2)
+        self.pay(games[pays_fine], player, self.rules.config.mechanics.exit_jail_fine, BANK)
+        leaves |= pays_fine
+        self.in_jail[games[leaves], player] = False
+        self.days_in_jail[games[leaves], player] = 0
+        self.days_in_jail[games[~leaves], player] += 1
+        return ~leaves
+
+    def advance_to(self, games, player, target):
+        """ Board.advance_to: move forward, with the salary if passing GO """
+        passing_go = target <= self.position[games, player]
+        self.money[games[passing_go], player] += self.rules.config.mechanics.salary
+        self.position[games, player] = target
+
+    def handle_landing(self, games, player):
+        """ Player.handle_landing: act on the cells the players are at, and on the cells cards send them to.
+        Return which of the games' moves are over (the player went to jail)
+        """
+        rules, mechanics = self.rules, self.rules.config.mechanics
+        went_to_jail = np.zeros(games.size, dtype=bool)
+        landing = np.arange(games.size)
+        while landing.size:
+            landing_games = games[landing]
+            positions = self.position[landing_games, player]
+            kinds = rules.kind[positions]
+            for kind in np.flatnonzero(np.bincount(kinds, minlength=len(LANDING_KINDS))).tolist():
+                is_kind = kinds == kind
+                kind_games = landing_games[is_kind]
+                if kind == PROPERTY:
+                    self.handle_landing_on_property(kind_games, player, positions[is_kind])
+                elif kind in DECKS:
+                    went_to_jail[landing[is_kind]] |= self.handle_card(kind_games, player, DECKS[kind])
+                elif kind == GO_TO_JAIL:
+                    self.go_to_jail(kind_games, player)
+                    went_to_jail[landing[is_kind]] = True
+                elif kind == LUXURY_TAX:
+                    self.pay(kind_games, player, mechanics.luxury_tax, BANK)
+                elif kind == INCOME_TAX:
+                    self.handle_income_tax(kind_games, player)
+                elif kind == FREE_PARKING and mechanics.free_parking_money:
+                    self.money[kind_games, player] += self.free_parking_money[kind_games]
+                    self.free_parking_money[kind_games] = 0
+            # Cards may send the player to another cell
+            landing = landing[(self.position[landing_games, player] != positions) & ~went_to_jail[landing]]
+        return went_to_jail
+
+    def handle_landing_on_property(self, games, player, positions):
+        """ Buy the property, if nobody owns it and the player is willing to, or pay the rent """
+        owner = self.owner[games, positions]
+        not_owned = owner == NOBODY
+        if not_owned.any():
+            games_buying, positions_buying = games[not_owned], positions[not_owned]
+            money = self.money[games_buying, player]
+            cost = self.rules.cost_base[positions_buying]
+            buys = (money - cost >= self.unspendable[games_buying, player]) & (cost <= money) & \
+                (self.ignored[games_buying, player] & self.rules.bits[positions_buying] == 0)
+            self.money[games_buying[buys], player] -= cost[buys]
+            self.set_owners(games_buying[buys], positions_buying[buys], player)
+
+        pays_rent = (owner >= 0) & (owner != player) & (self.mortgaged[games] & self.rules.bits[positions] == 0)
+        if pays_rent.any():
+            self.pay_rent(games[pays_rent], player, positions[pays_rent], owner[pays_rent])
+
+    def pay_rent(self, games, player, positions, owner):
+        """ Property.calculate_rent, with the rent note of the card, paid to the owner """
+        rules = self.rules
+        houses = self.houses[games, positions]
+        # Rent multiplier by the number of properties of the group the owner has
+        owned_count = np.bitwise_count(self.owns[games, owner] & rules.group_mask[positions])
+        multiplier = rules.multiplier[positions, owned_count]
+        rent = np.where(houses > 0, rules.rent[positions, houses], rules.rent[positions, 0] * multiplier)
+        # Utilities: dice roll * 4/10
+        rolls_dice = (houses == 0) & rules.is_utility[positions]
+        if rolls_dice.any():
+            dice_sum, _ = self.roll(np.count_nonzero(rolls_dice))
+            rent[rolls_dice] = dice_sum * multiplier[rolls_dice]
+        rent_note = self.rent_note[games]
+        rent = np.where(rent_note == DOUBLE_RENT, rent * 2, rent)
+        rent = np.where(rent_note == TEN_TIMES_DICE, rent // multiplier * 10, rent)
+        self.pay(games, player, rent, owner)
+
+    def handle_income_tax(self, games, player):
+        """ The fixed income tax or the share of the net worth (counting mortgaged properties in full),
+        whichever is less
+        """
+        mechanics = self.rules.config.mechanics
+        net_worth = np.trunc(self.money[games, player]).astype(np.int64) + \
+            self.properties_value(games, player, count_mortgaged_as_full_value=True)
+        tax = np.minimum(mechanics.income_tax,
+                         np.trunc(mechanics.income_tax_percentage * net_worth).astype(np.int64))
+        self.pay(games, player, tax, BANK)
+
+    def handle_card(self, games, player, deck):
+        """ Draw a card from the deck (0: Chance, 1: Community Chest), and act on it (Card.apply).
+        Return which of the games' moves are over (the player went to jail)
+        """
+        rules, deck_tables = self.rules, self.rules.decks[deck]
+        places = self.draw(games, deck)
+        cards = self.deck_order[deck][games, places]
+        kinds = deck_tables.kind[cards]
+        went_to_jail = np.zeros(games.size, dtype=bool)
+        for kind in np.flatnonzero(np.bincount(kinds)).tolist():
+            is_kind = kinds == kind
+            kind_games, kind_cards = games[is_kind], cards[is_kind]
+            amount = deck_tables.amount[kind_cards]
+            if kind == ADVANCE_TO:
+                self.advance_to(kind_games, player, deck_tables.target[kind_cards])
+            elif kind == ADVANCE_TO_NEAREST:
+                nearest = rules.nearest[deck_tables.target[kind_cards], self.position[kind_games, player]]
+                self.advance_to(kind_games, player, nearest)
+                self.rent_note[kind_games] = deck_tables.rent_note[kind_cards]
+            elif kind == GO_BACK:
+                self.position[kind_games, player] = (self.position[kind_games, player] - amount) % rules.n_cells
+            elif kind == GO_TO_JAIL_CARD:
+                self.go_to_jail(kind_games, player)
+                went_to_jail[is_kind] = True
+            elif kind == GET_OUT_OF_JAIL:
+                # The player keeps the card, it is out of the deck until used
+                self.withheld[kind_games, deck] |= np.left_shift(1, places[is_kind])
+                self.get_out_of_jail[kind_games, player, deck] = places[is_kind]
+            elif kind == COLLECT:
+                self.money[kind_games, player] += amount
+            elif kind == PAY:
+                self.pay(kind_games, player, amount, BANK)
+            elif kind == REPAIRS:
+                houses = np.where(rules.members(self.owns[kind_games, player]), self.houses[kind_games], 0)
+                repair_cost = np.where(houses == HOTEL, deck_tables.per_hotel[kind_cards, np.newaxis],
+                                       houses * amount[:, np.newaxis]).sum(axis=1)
+                self.pay(kind_games, player, repair_cost, BANK)
+            else:
+                # Pay each other player, or collect from each of them, in their order
+                for other_player in range(rules.n_players):
+                    if other_player == player:
+                        continue
+                    playing = ~self.bankrupt[kind_games, other_player]
+                    if kind == PAY_EACH_PLAYER:
+                        self.pay(kind_games[playing], player, amount[playing], other_player)
+                    else:
+                        self.pay(kind_games[playing], other_player, amount[playing], player)
+        return went_to_jail
+
+    def draw(self, games, deck):
+        """ Deck.draw: places in the deck of the cards drawn (skipping the cards out of the deck) """
+        size = self.rules.decks[deck].size
+        withheld = self.withheld[games, deck]
+        if np.any(withheld == (1 << size) - 1):
+            raise IndexError("Draw from a deck with all cards out of it")
+        places = self.deck_pointer[games, deck]
+        out_of_deck = np.right_shift(withheld, places) & 1 == 1
+        while out_of_deck.any():
+            places[out_of_deck] = (places[out_of_deck] + 1) % size
+            out_of_deck = np.right_shift(withheld, places) & 1 == 1
+        self.deck_pointer[games, deck] = (places + 1) % size
+        return places
+
+    def pay(self, games, player, amount, payee):
+        """ Player.pay_money in these games: the player pays the amount (one for all games, or one per game)
+        to the payee (a player, one for all games or one per game, or BANK)
+        """
+        amount, payee = np.asarray(amount), np.asarray(payee)
+        has_cash = amount < self.money[games, player]
+        if not has_cash.all():
+            short = ~has_cash
+            self.pay_short(games[short], player, np.broadcast_to(amount, games.shape)[short],
+                           np.broadcast_to(payee, games.shape)[short])
+            games = games[has_cash]
+            amount = amount[has_cash] if amount.ndim else amount
+            payee = payee[has_cash] if payee.ndim else payee
+        self.transfer(games, player, amount, payee)
+
+    def transfer(self, games, player, amount, payee):
+        """ The player's cash goes to the payee (or to the bank) in these games """
+        self.money[games, player] -= amount
+        if payee.ndim:
+            to_player = payee != BANK
+            self.money[games[to_player], payee[to_player]] += amount[to_player] if amount.ndim else amount
+            games, amount = games[~to_player], amount[~to_player] if amount.ndim else amount
+        elif payee != BANK:
+            self.money[games, payee] += amount
+            return
+        if self.rules.config.mechanics.free_parking_money:
+            self.free_parking_money[games] += amount
+
+    def pay_short(self, games, player, amounts, payees):
+        """ Payments the player doesn't have the cash for: raise the money first (Player.plan_liquidation),
+        or go bankrupt, in all these games at once
+        """
+        max_raisable_money = self.max_raisable_money(games, player)
+        goes_bankrupt = amounts > max_raisable_money
+        if goes_bankrupt.any():
+            self.go_bankrupt_in(games[goes_bankrupt], player, amounts[goes_bankrupt], payees[goes_bankrupt])
+        raises = amounts < max_raisable_money
+        if raises.any():
+            games_raising, amounts_raising = games[raises], amounts[raises]
+            self.sell_buildings(games_raising, player, amounts_raising)
+            self.mortgage_properties(games_raising, player, amounts_raising)
+            self.transfer(games_raising, player, amounts_raising, payees[raises])
+        # The amount is all the player can raise: the bankruptcy leaves the last property (one game at a time)
+        for game, amount, payee in zip(*(values[amounts == max_raisable_money].tolist()
+                                         for values in (games, amounts, payees))):
+            self.pay_money(game, player, amount, payee)
+
+    def sell_buildings(self, games, player, amounts):
+        """ The buildings part of Player.plan_liquidation in these games: sell a house (a hotel if there are
+        no houses to sell) with the most of its group, the cheapest one that raises the rest of the amount
+        or the most expensive, until there is enough cash
+        """
+        rules = self.rules
+        columns, sale_prices = rules.buildable, rules.cost_house[rules.buildable] // 2
+        padding = np.zeros((games.size, 1), dtype=np.int64)
+        while games.size:
+            houses = self.houses[games][:, columns]
+            can_sell = (houses > 0) & (self.owns[games, player, np.newaxis] & rules.bits[columns] != 0)
+            sells = can_sell.any(axis=1) & (amounts > self.money[games, player])
+            games, amounts, houses, can_sell = games[sells], amounts[sells], houses[sells], can_sell[sells]
+            self.may_improve[games] = True
+            if games.size <= FEW_GAMES:
+                # A step costs about as much for a few games as the whole liquidation of each of them
+                for game, amount in zip(games.tolist(), amounts.tolist()):
+                    self.raise_money(game, player, amount)
+                return
+            most_houses = np.concatenate((houses, padding[:games.size]), axis=1)[:, rules.buildable_groups] \
+                .max(axis=2)[:, rules.buildable_group]
+            can_sell &= houses == most_houses
+            # Selling a hotel is a last resort
+            can_sell &= ~((can_sell & (houses < HOTEL)).any(axis=1)[:, np.newaxis] & (houses == HOTEL))
+            # Sorted by the sale price (then by the order owned), the first one that raises enough or the last one
+            order = np.where(can_sell, sale_prices * ACQUIRED_LIMIT + self.acquired[games][:, columns], KEY_LIMIT) \
+                .argsort(axis=1)
+            raises_enough = can_sell & (sale_prices >= (amounts - self.money[games, player])[:, np.newaxis])
+            n_can_sell = can_sell.sum(axis=1)
+            choice = order[np.arange(games.size), np.minimum(n_can_sell - raises_enough.sum(axis=1), n_can_sell - 1)]
+            positions, sale_price = columns[choice], sale_prices[choice]
+            hotel = houses[np.arange(games.size), choice] == HOTEL
+            # A hotel is replaced with 4 houses, or all of them are sold if the bank doesn't have them
+            replaced = hotel & (self.available_houses[games] >= 4)
+            self.houses[games, positions] = np.where(hotel, np.where(replaced, 4, 0), self.houses[games, positions] - 1)
+            self.available_houses[games] += np.where(hotel, np.where(replaced, -4, 0), 1)
+            self.available_hotels[games] += hotel
+            self.money[games, player] += np.where(hotel & ~replaced, sale_price * 5, sale_price)
+
+    def pay_money(self, game, player, amount, payee):
+        """ Player.pay_money in one game: pay in cash, or raise the money first, or go bankrupt """
+        if amount >= self.money[game, player]:
+            if amount >= self.max_raisable_money(np.array([game]), player)[0]:
+                self.go_bankrupt(game, player, amount, payee)
+                return
+            self.raise_money(game, player, amount)
+        self.money[game, player] -= amount
+        if payee != BANK:
+            self.money[game, payee] += amount
+        elif self.rules.config.mechanics.free_parking_money:
+            self.free_parking_money[game] += amount
+
+    def go_bankrupt(self, game, player, amount, payee):
+        """ The bankruptcy branch of Player.pay_money: raise as much as possible, give it all to the payee,
+        with all the properties
+        """
+        self.bankrupt[game, player] = True
+        self.raise_money(game, player, amount)
+        if payee != BANK:
+            self.money[game, payee] += self.money[game, player]
+        elif self.rules.config.mechanics.free_parking_money:
+            self.free_parking_money[game] += amount
+        self.money[game, player] = 0
+        # Properties are transferred from the last one owned
+        for position in reversed(self.owned(game, player)):
+            if payee != BANK:
+                self.set_owner(game, position, payee)
+            else:
+                self.owner[game, position] = NOBODY
+        if payee == BANK:
+            self.mortgaged[game] &= ~self.owns[game, player]
+            self.owns[game, player] = 0
+        self.lists_stale[game] = True
+
+    def max_raisable_money(self, games, player):
+        """ Cash, half the price of the buildings and the mortgage of unmortgaged properties, in these games """
+        rules = self.rules
+        houses = self.houses[games]
+        buildings_sale_value = np.where(houses == HOTEL, rules.cost_house * 5 // 2, rules.cost_house * houses // 2)
+        mortgageable_value = np.where(rules.members(self.mortgaged[games]), 0, rules.mortgage_price)
+        return self.money[games, player] + np.where(rules.members(self.owns[games, player]),
+                                                    buildings_sale_value + mortgageable_value, 0).sum(axis=1)
+
+    def mortgage_properties(self, games, player, amounts):
+        """ The mortgages part of Player.plan_liquidation in these games: mortgage the cheapest properties first
+        (the last one they got of the same price), until there is enough cash
+        """
+        rules = self.rules
+        short = self.money[games, player] < amounts
+        games, amounts = games[short], amounts[short]
+        mortgageable = rules.members(self.owns[games, player] & ~self.mortgaged[games])
+        key = np.where(mortgageable, rules.mortgage_price * ACQUIRED_LIMIT - self.acquired[games], KEY_LIMIT)
+        order = key.argsort(axis=1)
+        rows = np.arange(games.size)[:, np.newaxis]
+        prices = np.where(mortgageable, rules.mortgage_price, 0)[rows, order]
+        raised_before = prices.cumsum(axis=1) - prices
+        to_mortgage = (key[rows, order] < KEY_LIMIT) & \
+            (self.money[games, player, np.newaxis] + raised_before < amounts[:, np.newaxis])
+        self.mortgaged[games] |= np.where(to_mortgage, rules.bits[order], 0).sum(axis=1)
+        self.money[games, player] += np.where(to_mortgage, prices, 0).sum(axis=1)
+
+    def go_bankrupt_in(self, games, player, amounts, payees):
+        """ go_bankrupt in these games, where the amount is more than the player can raise:
+        all the buildings are sold and all the properties mortgaged
+        """
+        rules, n_cells = self.rules, self.rules.n_cells
+        self.bankrupt[games, player] = True
+        self.may_improve[games] = True
+        owns = self.owns[games, player]
+        owned = rules.members(owns)
+        self.owns[games, player] = 0
+        houses = np.where(owned, self.houses[games], 0)
+        hotels = houses == HOTEL
+        self.available_houses[games] += np.where(hotels, 0, houses).sum(axis=1)
+        self.available_hotels[games] += hotels.sum(axis=1)
+        self.houses[games] -= houses
+        sale_value = np.where(hotels, rules.cost_house // 2 * 5, rules.cost_house // 2 * houses) + \
+            np.where(rules.members(self.mortgaged[games]), 0, rules.mortgage_price)
+        money = self.money[games, player] + np.where(owned, sale_value, 0).sum(axis=1)
+        self.money[games, player] = 0
+        self.lists_stale[games] = True
+
+        # Bank: the properties are unmortgaged
+        to_bank = payees == BANK
+        bank_games, bank_owned = games[to_bank], owned[to_bank]
+        if self.rules.config.mechanics.free_parking_money:
+            self.free_parking_money[bank_games] += amounts[to_bank]
+        self.owner[bank_games] = np.where(bank_owned, NOBODY, self.owner[bank_games])
+        self.mortgaged[bank_games] &= ~owns[to_bank]
+
+        # Player: the properties are mortgaged, and transferred from the last one owned
+        games, owns, owned, payees = games[~to_bank], owns[~to_bank], owned[~to_bank], payees[~to_bank]
+        self.money[games, payees] += money[~to_bank]
+        self.mortgaged[games] |= owns
+        self.owns[games, payees] |= owns
+        order = np.where(owned, -self.acquired[games], KEY_LIMIT).argsort(axis=1)
+        rank = np.empty_like(order)
+        rank[np.arange(games.size)[:, np.newaxis], order] = np.arange(1, n_cells + 1)
+        self.acquired[games] = np.where(owned, self.acquisitions[games, np.newaxis] + rank, self.acquired[games])
+        self.acquisitions[games] += owned.sum(axis=1)
+        self.owner[games] = np.where(owned, payees[:, np.newaxis], self.owner[games])
+
+    def raise_money(self, game, player, amount):
+        """ Player.raise_money: plan the liquidation with the Player's logic (on the scratch board and player
+        loaded with the game's state), and carry it out
+        """
+        board, scratch_player = self.board, self.player
+        houses, mortgaged = self.houses[game], int(self.mortgaged[game])
+        scratch_player.owned = []
+        for position in self.owned(game, player):
+            cell = board.cells[position]
+            cell.has_houses = 0 if houses[position] == HOTEL else int(houses[position])
+            cell.has_hotel = int(houses[position] == HOTEL)
+            cell.is_mortgaged = bool(mortgaged >> position & 1)
+            scratch_player.owned.append(cell)
+        scratch_player.money = float(self.money[game, player])
+        board.available_houses = int(self.available_houses[game])
+        self.may_improve[game] = True
+
+        for action, cell, money_raised in scratch_player.plan_liquidation(amount, board):
+            position = cell.position
+            if action == "house":
+                houses[position] -= 1
+                self.available_houses[game] += 1
+            elif action == "hotel":
+                houses[position] = 4
+                self.available_hotels[game] += 1
+                self.available_houses[game] -= 4
+            elif action == "hotel and houses":
+                houses[position] = 0
+                self.available_hotels[game] += 1
+            else:
+                self.mortgaged[game] |= self.rules.bits[position]
+            self.money[game, player] += money_raised
+
+    def trade(self, games, player):
+        """ Player.do_a_two_way_trade, again while the player makes trades """
+        while games.size:
+            self.update_wishlists(games[self.lists_stale[games]])
+            games = games[(self.wants_to_buy[games, player] != 0) & (self.wants_to_sell[games, player] != 0)]
+            self.work_out_deals(games[self.deals_stale[games, player]], player)
+            games = games[self.deal_other[games, player] >= 0]
+            # The one who gives the cheaper properties pays the difference, if they can
+            other_player, price_difference = self.deal_other[games, player], self.deal_difference[games, player]
+            payer = np.where(price_difference > 0, other_player, player)
+            can_pay = (price_difference == 0) | \
+                (self.money[games, payer] - np.abs(price_difference) >= self.unspendable[games, payer])
+            games = games[can_pay]
+            for game in games.tolist():
+                self.make_trade(game, player)
+
+    def work_out_deals(self, games, player):
+        """ The player's deal in these games: the first other player with a fair deal (Rules.fair_deal)
+        for the properties they want from each other
+        """
+        if not games.size:
+            return
+        wants_to_sell, wants_to_buy = self.wants_to_sell[games], self.wants_to_buy[games]
+        receives = wants_to_buy[:, player, np.newaxis] & wants_to_sell
+        gives = wants_to_sell[:, player, np.newaxis] & wants_to_buy
+        possible = (receives != 0) & (gives != 0) & ((receives | gives) & ~self.rules.not_traded_alone != 0)
+        self.deal_other[games, player] = -1
+        self.deals_stale[games, player] = False
+        # Pairs of (game, other player), by game, then by the other player's order
+        rows, other_players = np.nonzero(possible)
+        order = self.order[games[rows]]
+        pairs = zip(games[rows].tolist(), other_players.tolist(),
+                    gives[rows, other_players].tolist(), receives[rows, other_players].tolist(),
+                    order[:, player].tolist(), order[np.arange(rows.size), other_players].tolist())
+        dealt_game = -1
+        for game, other_player, *key in pairs:
+            if game == dealt_game:
+                continue
+            deal = self.rules.fair_deal(*key)
+            if deal is not None:
+                positions_to_give, positions_to_receive, price_difference = deal
+                self.deal_other[game, player] = other_player
+                self.deal_difference[game, player] = price_difference
+                self.deals[(game, player)] = (positions_to_give, positions_to_receive)
+                dealt_game = game
+
+    def make_trade(self, game, player):
+        """ Carry out the player's deal: pay the price difference, properties change hands """
+        other_player, price_difference = self.deal_other[game, player], self.deal_difference[game, player]
+        positions_to_give, positions_to_receive = self.deals[(game, player)]
+        self.money[game, player] += price_difference
+        self.money[game, other_player] -= price_difference
+        for position in positions_to_receive:
+            self.set_owner(game, position, player)
+        for position in positions_to_give:
+            self.set_owner(game, position, other_player)
+        self.lists_stale[game] = True
+
+    def update_wishlists(self, games):
+        """ Player.update_lists_of_properties_to_trade for all players of these games,
+        and the monopolies they can build on
+        """
+        if not games.size:
+            return
+        owns = self.owns[games]
+        owned = np.bitwise_or.reduce(owns, axis=1)[:, np.newaxis]
+        wants_to_sell = np.zeros_like(owns)
+        wants_to_buy = np.zeros_like(owns)
+        monopolies = np.zeros_like(owns)
+        for positions, group_mask, buildable in self.rules.groups:
+            mine = owns & group_mask
+            owned_count = np.bitwise_count(mine)
+            if buildable:
+                monopolies |= np.where(owned_count == len(positions), group_mask, 0)
+            # If there are properties to buy - no trades
+            all_owned = owned & group_mask == group_mask
+            # If I own 1: I am ready to sell it. If I own the rest: I want to buy it
+            wants_to_sell |= np.where(all_owned & (owned_count == 1), mine, 0)
+            wants_to_buy |= np.where(all_owned & (owned_count == len(positions) - 1), group_mask ^ mine, 0)
+        trading = self.willing[games] & ~self.bankrupt[games]
+        self.wants_to_sell[games] = np.where(trading, wants_to_sell, 0)
+        self.wants_to_buy[games] = np.where(trading, wants_to_buy, 0)
+        self.monopolies[games] = monopolies
+        self.may_improve[games] = True
+        self.lists_stale[games] = False
+        self.deals_stale[games] = True
+
+    def unmortgage(self, games, player):
+        """ Player.unmortgage_a_property, again while the player unmortgages:
+        the first mortgaged property (in the order owned) the player has the money for
+        """
+        rules = self.rules
+        games = games[self.money[games, player] - rules.min_unmortgage_cost >= self.unspendable[games, player]]
+        games = games[self.owns[games, player] & self.mortgaged[games] != 0]
+        while games.size:
+            can_unmortgage = rules.members(self.owns[games, player] & self.mortgaged[games]) & \
+                (self.money[games, player, np.newaxis] - rules.unmortgage_cost >=
+                 self.unspendable[games, player, np.newaxis])
+            acquired = np.where(can_unmortgage, self.acquired[games], ACQUIRED_LIMIT)
+            positions = acquired.argmin(axis=1)
+            unmortgages = acquired[np.arange(games.size), positions] < ACQUIRED_LIMIT
+            games, positions = games[unmortgages], positions[unmortgages]
+            self.money[games, player] -= rules.unmortgage_cost[positions]
+            self.mortgaged[games] &= ~rules.bits[positions]
+            self.may_improve[games] = True
+
+    def improve_properties(self, games, player):
+        """ Player.improve_properties: keep building the cheapest house/hotel while there is money """
+        self.update_wishlists(games[self.lists_stale[games]])
+        games = games[self.may_improve[games, player] & (self.monopolies[games, player] != 0) &
+                      (self.money[games, player] - self.rules.min_cost_house >= self.unspendable[games, player])]
+        while games.size:
+            positions = self.next_property_to_improve(games, player)
+            self.may_improve[games[positions < 0], player] = False
+            improvement_cost = self.rules.cost_house[positions]
+            builds = (positions >= 0) & \
+                (self.money[games, player] - improvement_cost >= self.unspendable[games, player])
+            games, positions, improvement_cost = games[builds], positions[builds], improvement_cost[builds]
+            # A hotel replaces 4 houses
+            hotel = self.houses[games, positions] == 4
+            self.houses[games, positions] += 1
+            self.available_houses[games] += np.where(hotel, 4, -1)
+            self.available_hotels[games] -= hotel
+            self.may_improve[games[hotel]] = True
+            self.money[games, player] -= improvement_cost
+
+    def next_property_to_improve(self, games, player):
+        """ The cheapest property (then the one owned earlier) with the fewest houses of its group,
+        in a monopoly without mortgages, if the bank has the house or hotel for it (-1 if none)
+        """
+        rules = self.rules
+        columns = rules.buildable
+        houses = self.houses[games][:, columns]
+        # Fewest houses and any mortgages in the group of each property
+        # (padded with a hotel and no mortgage: a hotel is the most a property can have)
+        padding = np.full((games.size, 1), HOTEL)
+        fewest_houses = np.concatenate((houses, padding), axis=1)[:, rules.buildable_groups] \
+            .min(axis=2)[:, rules.buildable_group]
+        any_mortgaged = self.mortgaged[games, np.newaxis] & rules.group_mask[columns] != 0
+        in_bank = np.where(fewest_houses == 4, self.available_hotels[games, np.newaxis] > 0,
+                           self.available_houses[games, np.newaxis] > 0)
+        can_improve = (self.monopolies[games, player, np.newaxis] & rules.bits[columns] != 0) & \
+            (houses == fewest_houses) & (fewest_houses < HOTEL) & ~any_mortgaged & in_bank
+        key = np.where(can_improve, rules.cost_house[columns] * ACQUIRED_LIMIT + self.acquired[games][:, columns],
+                       KEY_LIMIT)
+        column = key.argmin(axis=1)
+        return np.where(key[np.arange(games.size), column] < KEY_LIMIT, columns[column], -1)
+
+    def set_owners(self, games, positions, player):
+        """ The player gets the property in these games (one property per game) """
+        self.owner[games, positions] = player
+        self.owns[games, player] |= self.rules.bits[positions]
+        self.acquisitions[games] += 1
+        self.acquired[games, positions] = self.acquisitions[games]
+        self.lists_stale[games] = True
+
+    def set_owner(self, game, position, player):
+        """ The player gets the property (from nobody or from another player) """
+        if self.owner[game, position] != NOBODY:
+            self.owns[game, self.owner[game, position]] &= ~self.rules.bits[position]
+        self.owner[game, position] = player
+        self.owns[game, player] |= self.rules.bits[position]
+        self.acquisitions[game] += 1
+        self.acquired[game, position] = self.acquisitions[game]
+        self.lists_stale[game] = True
+
+    def owned(self, game, player) -> List[int]:
+        """ Positions of the player's properties, in the order they got them (as in Player.owned) """
+        positions = np.flatnonzero(self.owns[game, player] & self.rules.bits)
+        return positions[np.argsort(self.acquired[game, positions])].tolist()
+
+    def properties_value(self, games, player, count_mortgaged_as_full_value=False):
+        """ Value of the player's properties and buildings in these games
+        (mortgaged properties are counted partially, as in Player.net_worth)
+        """
+        rules, houses = self.rules, self.houses[games]
+        value = rules.cost_base + np.where(houses == HOTEL, 1, houses) * rules.cost_house
+        if not count_mortgaged_as_full_value:
+            value = np.where(rules.members(self.mortgaged[games]), rules.mortgaged_worth, value)
+        return np.where(rules.members(self.owns[games, player]), value, 0).sum(axis=1)
+
+    def net_worth(self, game, player) -> int:
+        return int(self.money[game, player]) + int(self.properties_value(np.array([game]), player)[0])
+
+
+def lockstep_games_batch(batch: Tuple[int, int, int, GameConfig]) -> List[GameResult]:
+    """ Play a range of games in one worker task with the lockstep engine,
+    up to SLOTS games at a time. Same parameters and results as monopoly_games_batch:
+    (first_game_number, last_game_number, master_seed, config)
+    """
+    if np is None or not hasattr(np, "bitwise_count"):
+        raise ImportError("The lockstep engine needs NumPy 2.0 or later: pip install \"numpy>=2\", "
+                          "or turn off SimulationSettings.lockstep_engine")
+    first_game_number, last_game_number, master_seed, config = batch
+    n_games = last_game_number - first_game_number + 1
+
+    def play_games():
+        games = Games(Rules(config), master_seed, first_game_number, min(n_games, SLOTS))
+        return games.play(range(first_game_number, last_game_number + 1))
+
+    if config.profile_dir is None:
+        return play_games()
+    profiler = cProfile.Profile()
+    game_results = profiler.runcall(play_games)
+    profiler.dump_stats(os.path.join(config.profile_dir, f"games_{first_game_number}.pstats"))
+    return game_results
@@ -0,0 +1,98 @@
+""" Optional timing of the phases of a game (SimulationSettings.phase_timings).
+Games with timings on use TimedPlayer and TimedDice, which wrap the methods of each phase
+with the game's PhaseTimer. With timings off, the plain Player and Dice are used, so there is no overhead.
+"""
+import time
+from collections import Counter
+
+from monopoly.core.dice import Dice
+from monopoly.core.player import Player
+
+
+class PhaseTimer:
+    """ Wall time and number of calls of each phase of a game.
+    Phases are nested (cards are drawn while landing, money is raised while paying), and the time of a phase
+    does not include the phases inside it, so the times of all phases add up to the time of the game
+    """
+    __slots__ = ("seconds", "calls", "stack", "started")
+
+    def __init__(self):
+        self.seconds = Counter()
+        self.calls = Counter()
+        # Phases started and not stopped yet (the last one is running), and when the running one was resumed
+        self.stack = []
+        self.started = time.perf_counter()
+
+    def start(self, phase):
+        """ Pause the running phase, start a new one """
+        now = time.perf_counter()
+        if self.stack:
+            self.seconds[self.stack[-1]] += now - self.started
+        self.stack.append(phase)
+        self.calls[phase] += 1
+        self.started = now
+
+    def stop(self):
+        """ Stop the running phase, resume the one it was started from """
+        now = time.perf_counter()
+        self.seconds[self.stack.pop()] += now - self.started
+        self.started = now
+
+    def timed(self, phase, function, *args):
+        """ Call the function as the phase """
+        self.start(phase)
+        try:
+            return function(*args)
+        finally:
+            self.stop()
+
+    def results(self):
+        """ {phase: (seconds, calls)} """
+        return {phase: (self.seconds[phase], calls) for phase, calls in self.calls.items()}
+
+
+class TimedPlayer(Player):
+    """ Player that records the phases of its moves in the game's PhaseTimer.
+    Time of a move that is not in the other phases (jail, moving, salary) goes to "move"
+    """
+    __slots__ = ("timer",)
+
+    def __init__(self, name, settings, timer):
+        super().__init__(name, settings)
+        self.timer = timer
+
+    def make_a_move(self, board, players, dice, log):
+        return self.timer.timed("move", super().make_a_move, board, players, dice, log)
+
+    def do_a_two_way_trade(self, players, board, log):
+        return self.timer.timed("trading", super().do_a_two_way_trade, players, board, log)
+
+    def unmortgage_a_property(self, board, log):
+        return self.timer.timed("unmortgaging", super().unmortgage_a_property, board, log)
+
+    def improve_properties(self, board, log):
+        return self.timer.timed("improving", super().improve_properties, board, log)
+
+    def handle_landing(self, board, players, dice, log):
+        return self.timer.timed("landing", super().handle_landing, board, players, dice, log)
+
+    def handle_card(self, deck, deck_name, board, players, log):
+        return self.timer.timed("cards", super().handle_card, deck, deck_name, board, players, log)
+
+    def pay_money(self, amount, payee, board, log):
+        return self.timer.timed("paying", super().pay_money, amount, payee, board, log)
+
+    def raise_money(self, required_amount, board, log):
+        return self.timer.timed("raising money", super().raise_money, required_amount, board, log)
+
+
+class TimedDice(Dice):
+    """ Dice that record rolls in the game's PhaseTimer """
+    __slots__ = ("timer",)
+
+    def __init__(self, seed, dice_count, dice_sides, log, timer, bulk=False):
+        super().__init__(seed, dice_count, dice_sides, log, bulk=bulk)
+        self.timer = timer
+
+    def roll(self):
+        return self.timer.timed("rolling", super().roll)
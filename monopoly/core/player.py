@@ -1,9 +1,7 @@
 """ Player Class
 """
-from monopoly.core.cell import GoToJail, LuxuryTax, IncomeTax, FreeParking, Chance, CommunityChest, Property
-from monopoly.core.constants import INDIGO, BROWN, RAILROADS, UTILITIES
+from monopoly.core.constants import INDIGO, BROWN, UTILITIES
 from monopoly.core.move_result import MoveResult
-from settings import GameMechanics
 
 
 class Player:
@@ -11,6 +9,11 @@ class Player:
     - money, position, owned property
     - actions to buy property of handle Chance cards etc.
     """
+    __slots__ = ("name", "settings", "money", "position",
+                 "in_jail", "had_doubles", "days_in_jail", "get_out_of_jail_chance", "get_out_of_jail_comm_chest",
+                 "owned", "property_value", "buildings_value", "mortgageable_value", "buildings_sale_value",
+                 "mortgaged_discount", "buildable_groups", "wants_to_sell", "wants_to_buy", "is_bankrupt",
+                 "fair_deals", "other_notes", "check_running_totals")
 
     def __init__(self, name, settings):
 
@@ -31,17 +34,40 @@ class Player:
         self.had_doubles = 0
         # number of days in jail each player spent so far
         self.days_in_jail = 0
-        # is the player holding a GOOJF card(s)
-        self.get_out_of_jail_chance = False
-        self.get_out_of_jail_comm_chest = False
+        # GOOJF card(s) the player is holding, with their indices in the deck: (card, index) (None if not)
+        self.get_out_of_jail_chance = None
+        self.get_out_of_jail_comm_chest = None
 
         # Owned properties
         self.owned = []
 
+        # Running totals over the owned properties, kept up to date at every
+        # ownership, mortgage and building change (see count_in_totals)
+        # Total cost of properties
+        self.property_value = 0
+        # Total cost of houses and hotels
+        self.buildings_value = 0
+        # Cash from mortgaging all unmortgaged properties
+        self.mortgageable_value = 0
+        # Cash from selling all houses and hotels
+        self.buildings_sale_value = 0
+        # Value of mortgaged properties that is not counted in net worth
+        self.mortgaged_discount = 0
+
+        # Groups the player has a monopoly in, that can have houses
+        # (not railroads or utilities). Kept up to date by the board
+        self.buildable_groups = set()
+
         # List of properties the player wants to sell / buy
         # through trading with other players
         self.wants_to_sell = set()
         self.wants_to_buy = set()
+        # Deals worked out with other players {(other player, gives, receives): (gives, receives)},
+        # the result of fair_deal() for these wishlists. A deal one side can't pay for comes up again every move,
+        # and fair_deal() depends only on the properties' prices and groups and both players' settings,
+        # which don't change in a game. It is never invalidated: when ownership changes, the wishlists
+        # change too, and the new deal has a new key. The player (and the cache) lasts one game
+        self.fair_deals = {}
 
         # Bankrupt (game ended for this player)
         self.is_bankrupt = False
@@ -49,28 +75,94 @@ class Player:
         # Placeholder for various flags used throughout the game
         self.other_notes = ""
 
+        # Check the running totals against the slow calculations (set up by the simulation)
+        self.check_running_totals = False
+
     def __str__(self):
         return self.name
 
+    def count_in_totals(self, cell, sign):
+        """ Add (sign=1) or remove (sign=-1) the cell's share of the running totals.
+        Called around every change to an owned cell: remove, change the cell, add back
+        """
+        buildings_value = (cell.has_houses + cell.has_hotel) * cell.cost_house
+        self.property_value += sign * cell.cost_base
+        self.buildings_value += sign * buildings_value
+        self.buildings_sale_value += sign * (cell.cost_house * cell.has_houses // 2 +
+                                             cell.cost_house * 5 // 2 * cell.has_hotel)
+        if cell.is_mortgaged:
+            self.mortgaged_discount += sign * (cell.cost_base + buildings_value - cell.mortgaged_worth)
+        else:
+            self.mortgageable_value += sign * cell.mortgage_price
+
+    def add_property(self, cell):
+        """ Add a property to the owned list (the owner itself is set by the board) """
+        self.owned.append(cell)
+        self.count_in_totals(cell, 1)
+
+    def remove_property(self, cell):
+        """ Remove a property from the owned list """
+        self.owned.remove(cell)
+        self.count_in_totals(cell, -1)
+
     def net_worth(self, count_mortgaged_as_full_value=False):
-        """ Calculate player's net worth (cache + property + houses)
+        """ Player's net worth (cache + property + houses), from the running totals
         count_mortgaged_as_full_value determines if we consider property mortgaged status:
         - True: count as full, for Income Tax calculation
         - False: count partially, for net worth statistics
         """
+        net_worth = int(self.money) + self.property_value + self.buildings_value
+        if not count_mortgaged_as_full_value:
+            net_worth -= self.mortgaged_discount
+
+        if self.check_running_totals:
+            assert net_worth == self.recalculate_net_worth(count_mortgaged_as_full_value), \
+                f"{self}'s net worth running total is off"
+        return net_worth
+
+    def recalculate_net_worth(self, count_mortgaged_as_full_value=False):
+        """ Calculate player's net worth going through all owned properties
+        (slow version of net_worth, to check the running totals)
+        """
         net_worth = int(self.money)
 
         for cell in self.owned:
 
             if cell.is_mortgaged and not count_mortgaged_as_full_value:
                 # Partially count mortgaged properties
-                net_worth += int(cell.cost_base * (1 - GameMechanics.mortgage_value))
+                net_worth += cell.mortgaged_worth
             else:
                 net_worth += cell.cost_base
                 net_worth += (cell.has_houses + cell.has_hotel) * cell.cost_house
 
         return net_worth
 
+    def max_raisable_money(self):
+        """ How much cash can a player produce, from the running totals?
+        Used to determine if they should go bankrupt or not.
+        Max raisable money is 1/2 of houses cost + 1/2 of unmortgaged properties cost
+        """
+        max_raisable = self.money + self.buildings_sale_value + self.mortgageable_value
+
+        if self.check_running_totals:
+            assert max_raisable == self.recalculate_max_raisable_money(), \
+                f"{self}'s raisable money running total is off"
+        return max_raisable
+
+    def recalculate_max_raisable_money(self):
+        """ Calculate max raisable money going through all owned properties
+        (slow version of max_raisable_money, to check the running totals)
+        """
+        max_raisable = self.money
+        for cell in self.owned:
+            if cell.has_houses > 0:
+                max_raisable += cell.cost_house * cell.has_houses // 2
+            if cell.has_hotel > 0:
+                max_raisable += cell.cost_house * 5 // 2
+            if not cell.is_mortgaged:
+                max_raisable += cell.mortgage_price
+        return max_raisable
+
     def make_a_move(self, board, players, dice, log) -> MoveResult:
         """ Main function for a player to make a move
         Receives:
@@ -86,8 +178,8 @@ class Player:
         if self.is_bankrupt:
             return MoveResult.BANKRUPT  # check if this is needed or this will writes bankrupt twice
 
-        log.add(f"=== {self.name} (${self.money}, " +
-                f"at {board.cells[self.position].name}) goes: ===")
+        log.add("=== {} (${}, at {}) goes: ===",
+                self.name, self.money, board.cells[self.position].name)
 
         # Before the throwing of the dice:
         # 1. Trade with other players. Keep trading until no trades are possible
@@ -105,7 +197,7 @@ class Player:
 
         # Get doubles for the third time: go to jail
         if is_double and self.had_doubles == 2:
-            self.handle_going_to_jail("rolled 3 doubles in a row", log)
+            self.handle_going_to_jail("rolled 3 doubles in a row", board, log)
             return MoveResult.END_MOVE
 
         # Player is currently in jail
@@ -113,57 +205,14 @@ class Player:
             if self.is_player_stay_in_jail(is_double, board, log):
                 return MoveResult.END_MOVE
 
-        # Player moves to a cell
-        self.position += dice_sum
-        # Get salary if we passed go on the way
-        if self.position >= 40:
-            self.handle_salary(board, log)
-        # Get the correct position if we passed GO
-        self.position %= 40
-        log.add(f"{self.name} goes to: {board.cells[self.position].name}")
+        # Player moves to a cell (and gets salary if passed GO on the way)
+        board.advance_by(self, dice_sum, log)
+        log.add("{} goes to: {}", self.name, board.cells[self.position].name)
 
-        # Handle special cells:
-
-        # Both Chance and Community Chest are processed first, as they may send the player to a property
-        # Chance is before "Community Chest" as Chance can send to Community Chest
-
-        # Player lands on "Chance"
-        if isinstance(board.cells[self.position], Chance):
-            if self.handle_chance(board, players, log) == MoveResult.END_MOVE:
-                return MoveResult.END_MOVE
-
-        # Player lands on "Community Chest"
-        if isinstance(board.cells[self.position], CommunityChest):
-            if self.handle_community_chest(board, players, log) == MoveResult.END_MOVE:
-                return MoveResult.END_MOVE
-
-        # Player lands on a property
-        if isinstance(board.cells[self.position], Property):
-            self.handle_landing_on_property(board, players, dice, log)
-
-        # Player lands on "Go To Jail"
-        if isinstance(board.cells[self.position], GoToJail):
-            self.handle_going_to_jail("landed on Go To Jail", log)
+        # Handle the cell the player landed on (property, chance, taxes etc.)
+        if self.handle_landing(board, players, dice, log) == MoveResult.END_MOVE:
             return MoveResult.END_MOVE
 
-        # Player lands on "Free Parking"
-        if isinstance(board.cells[self.position], FreeParking):
-            # If Free Parking Money house rule is on: get the money
-            if GameMechanics.free_parking_money:
-                log.add(f"{self} gets ${board.free_parking_money} from Free Parking")
-                self.money += board.free_parking_money
-                board.free_parking_money = 0
-
-        # Player lands on "Luxury Tax"
-        if isinstance(board.cells[self.position], LuxuryTax):
-            self.pay_money(GameMechanics.luxury_tax, "bank", board, log)
-            if not self.is_bankrupt:
-                log.add(f"{self} pays Luxury Tax ${GameMechanics.luxury_tax}")
-
-        # Player lands on "Income Tax"
-        if isinstance(board.cells[self.position], IncomeTax):
-            self.handle_income_tax(board, log)
-
         # Reset the other_notes flag
         self.other_notes = ""
 
@@ -173,23 +222,72 @@ class Player:
 
         if is_double:
             self.had_doubles += 1
-            log.add(f"{self} rolled a double ({self.had_doubles} in a row) so they go again.")
+            log.add("{} rolled a double ({} in a row) so they go again.", self, self.had_doubles)
             move_result_of_double_move = self.make_a_move(board, players, dice, log)
             return move_result_of_double_move
         # not a double: Reset doubles count
         self.had_doubles = 0
         return MoveResult.END_MOVE
 
+    def handle_landing(self, board, players, dice, log):
+        """ Act on the cell the player is at, using the board's position-to-handler table.
+        Chance and Community Chest cards may send the player to another cell,
+        which is then handled as well.
+        Return MoveResult.END_MOVE if the move should be over (go to jail)
+        """
+        while True:
+            position = self.position
+            landing_handler = board.landing_handlers[position]
+            # Nothing happens on this cell (GO, Jail)
+            if landing_handler is None:
+                return None
+            if getattr(self, landing_handler)(board, players, dice, log) == MoveResult.END_MOVE:
+                return MoveResult.END_MOVE
+            # The player stayed where they were
+            if self.position == position:
+                return None
+
+    def handle_landing_on_chance(self, board, players, dice, log):
+        """ Player lands on "Chance" """
+        return self.handle_card(board.chance, "Chance", board, players, log)
+
+    def handle_landing_on_community_chest(self, board, players, dice, log):
+        """ Player lands on "Community Chest" """
+        return self.handle_card(board.chest, "Community Chest", board, players, log)
+
+    def handle_landing_on_go_to_jail(self, board, players, dice, log):
+        """ Player lands on "Go To Jail" """
+        self.handle_going_to_jail("landed on Go To Jail", board, log)
+        return MoveResult.END_MOVE
+
+    def handle_landing_on_free_parking(self, board, players, dice, log):
+        """ Player lands on "Free Parking" """
+        # If Free Parking Money house rule is on: get the money
+        if board.settings.mechanics.free_parking_money:
+            log.add("{} gets ${} from Free Parking", self, board.free_parking_money)
+            self.money += board.free_parking_money
+            board.free_parking_money = 0
+
+    def handle_landing_on_luxury_tax(self, board, players, dice, log):
+        """ Player lands on "Luxury Tax" """
+        self.pay_money(board.settings.mechanics.luxury_tax, "bank", board, log)
+        if not self.is_bankrupt:
+            log.add("{} pays Luxury Tax ${}", self, board.settings.mechanics.luxury_tax)
+
+    def handle_landing_on_income_tax(self, board, players, dice, log):
+        """ Player lands on "Income Tax" """
+        self.handle_income_tax(board, log)
+
     def handle_salary(self, board, log):
         """ Adding Salary to the player's money, according to the game's settings """
         self.money += board.settings.mechanics.salary
-        log.add(f" {self.name} receives salary ${board.settings.mechanics.salary}")
+        log.add(" {} receives salary ${}", self.name, board.settings.mechanics.salary)
 
-    def handle_going_to_jail(self, message, log):
+    def handle_going_to_jail(self, message, board, log):
         """ Start the jail time
         """
-        log.add(f"{self} {message}, and goes to Jail.")
-        self.position = 10
+        log.add("{} {}, and goes to Jail.", self, message)
+        self.position = board.jail_position
         self.in_jail = True
         self.had_doubles = 0
         self.days_in_jail = 0
@@ -200,249 +298,62 @@ class Player:
         """
         # Get out of jail on rolling double
         if self.get_out_of_jail_chance or self.get_out_of_jail_comm_chest:
-            log.add(f"{self} uses a GOOJF card")
+            log.add("{} uses a GOOJF card", self)
             self.in_jail = False
             self.days_in_jail = 0
             # Return the card to the deck
             if self.get_out_of_jail_chance:
-                board.chance.add("Get Out of Jail Free")
-                self.get_out_of_jail_chance = False
+                _, card_index = self.get_out_of_jail_chance
+                board.chance.add(card_index)
+                self.get_out_of_jail_chance = None
             else:
-                board.chest.add("Get Out of Jail Free")
-                self.get_out_of_jail_comm_chest = False
+                _, card_index = self.get_out_of_jail_comm_chest
+                board.chest.add(card_index)
+                self.get_out_of_jail_comm_chest = None
 
         # Get out of jail on rolling double
         elif dice_roll_is_double:
-            log.add(f"{self} rolled a double, a leaves jail for free")
+            log.add("{} rolled a double, a leaves jail for free", self)
             self.in_jail = False
             self.days_in_jail = 0
         # Get out of jail and pay a fine
         elif self.days_in_jail == 2:  # It's your third day
-            log.add(f"{self} did not rolled a double for the third time, " +
-                    f"pays {GameMechanics.exit_jail_fine} and leaves jail")
-            self.pay_money(GameMechanics.exit_jail_fine, "bank", board, log)
+            log.add("{} did not rolled a double for the third time, pays {} and leaves jail",
+                    self, board.settings.mechanics.exit_jail_fine)
+            self.pay_money(board.settings.mechanics.exit_jail_fine, "bank", board, log)
             self.in_jail = False
             self.days_in_jail = 0
         # Stay in jail for another turn
         else:
-            log.add(f"{self} stays in jail")
+            log.add("{} stays in jail", self)
             self.days_in_jail += 1
             return True
         return False
 
-    def handle_chance(self, board, players, log):
-        """ Draw and act on a Chance card
-        Return True if the move should be over (go to jail)
-        """
-        card = board.chance.draw()
-        log.add(f"{self} drew Chance card: '{card}'")
-
-        # Cards that send you to a certain location on board
-
-        if card == "Advance to Boardwalk":
-            log.add(f"{self} goes to {board.cells[39]}")
-            self.position = 39
-
-        elif card == "Advance to Go (Collect $200)":
-            log.add(f"{self} goes to {board.cells[0]}")
-            self.position = 0
-            self.handle_salary(board, log)
-
-        elif card == "Advance to Illinois Avenue. If you pass Go, collect $200":
-            log.add(f"{self} goes to {board.cells[24]}")
-            if self.position > 24:
-                self.handle_salary(board, log)
-            self.position = 24
-
-        elif card == "Advance to St. Charles Place. If you pass Go, collect $200":
-            log.add(f"{self} goes to {board.cells[11]}")
-            if self.position > 11:
-                self.handle_salary(board, log)
-            self.position = 11
-
-        elif card == "Take a trip to Reading Railroad. If you pass Go, collect $200":
-            log.add(f"{self} goes to {board.cells[5]}")
-            if self.position > 5:
-                self.handle_salary(board, log)
-            self.position = 5
-
-        # Going backwards
-
-        elif card == "Go Back 3 Spaces":
-            self.position -= 3
-            log.add(f"{self} goes to {board.cells[self.position]}")
-
-        # Sends to a type of location, and affects the rent amount
-
-        elif card == "Advance to the nearest Railroad. " + \
-                "If owned, pay owner twice the rental to which they are otherwise entitled":
-            nearest_railroad = self.position
-            while (nearest_railroad - 5) % 10 != 0:
-                nearest_railroad += 1
-                nearest_railroad %= 40
-            log.add(f"{self} goes to {board.cells[nearest_railroad]}")
-            if self.position > nearest_railroad:
-                self.handle_salary(board, log)
-            self.position = nearest_railroad
-            self.other_notes = "double rent"
-
-        elif card == "Advance token to nearest Utility. " + \
-                "If owned, throw dice and pay owner a total ten times amount thrown.":
-            nearest_utility = self.position
-            while nearest_utility not in (12, 28):
-                nearest_utility += 1
-                nearest_utility %= 40
-            log.add(f"{self} goes to {board.cells[nearest_utility]}")
-            if self.position > nearest_utility:
-                self.handle_salary(board, log)
-            self.position = nearest_utility
-            self.other_notes = "10 times dice"
-
-        # Jail related (go to jail or GOOJF card)
-
-        elif card == "Get Out of Jail Free":
-            log.add(f"{self} now has a 'Get Out of Jail Free' card")
-            self.get_out_of_jail_chance = True
-            # Remove the card from the deck
-            board.chance.remove("Get Out of Jail Free")
-
-        elif card == "Go to Jail. Go directly to Jail, do not pass Go, do not collect $200":
-            self.handle_going_to_jail("got GTJ Chance card", log)
-            return MoveResult.END_MOVE
-
-        # Receiving money
-
-        elif card == "Bank pays you dividend of $50":
-            log.add(f"{self} gets $50")
-            self.money += 50
-
-        elif card == "Your building loan matures. Collect $150":
-            log.add(f"{self} gets $150")
-            self.money += 150
-
-        # Paying money (+ depending on property + to other players)
-
-        elif card == "Speeding fine $15":
-            self.pay_money(15, "bank", board, log)
-
-        elif card == "Make general repairs on all your property. For each house pay $25. " + \
-                "For each hotel pay $100":
-            repair_cost = sum(cell.has_houses * 25 + cell.has_hotel * 100 for cell in self.owned)
-            log.add(f"Repair cost: ${repair_cost}")
-            self.pay_money(repair_cost, "bank", board, log)
-
-        elif card == "You have been elected Chairman of the Board. Pay each player $50":
-            for other_player in players:
-                if other_player != self and not other_player.is_bankrupt:
-                    self.pay_money(50, other_player, board, log)
-                    if not self.is_bankrupt:
-                        log.add(f"{self} pays {other_player} $50")
-
-        return ""
-
-    def handle_community_chest(self, board, players, log):
-        """ Draw and act on a Community Chest card
-        Return True if the move should be over (go to jail)
+    def handle_card(self, deck, deck_name, board, players, log):
+        """ Draw and act on a Chance or Community Chest card
+        Return MoveResult.END_MOVE if the move should be over (go to jail)
         """
-
-        card = board.chest.draw()
-        log.add(f"{self} drew Community Chest card: '{card}'")
-
-        # Moving to Go
-
-        if card == "Advance to Go (Collect $200)":
-            log.add(f"{self} goes to {board.cells[0]}")
-            self.position = 0
-            self.handle_salary(board, log)
-
-        # Jail related
-
-        elif card == "Get Out of Jail Free":
-            log.add(f"{self} now has a 'Get Out of Jail Free' card")
-            self.get_out_of_jail_comm_chest = True
-            # Remove the card from the deck
-            board.chest.remove("Get Out of Jail Free")
-
-        elif card == "Go to Jail. Go directly to Jail, do not pass Go, do not collect $200":
-            self.handle_going_to_jail("got GTJ Community Chest card", log)
-            return MoveResult.END_MOVE
-
-        # Paying money
-
-        elif card == "Doctor's fee. Pay $50":
-            self.pay_money(50, "bank", board, log)
-
-        elif card == "Pay hospital fees of $100":
-            self.pay_money(100, "bank", board, log)
-
-        elif card == "Pay school fees of $50":
-            self.pay_money(50, "bank", board, log)
-
-        elif card == "You are assessed for street repair. $40 per house. $115 per hotel":
-            repair_cost = sum(cell.has_houses * 40 + cell.has_hotel * 115 for cell in self.owned)
-            log.add(f"Repair cost: ${repair_cost}")
-            self.pay_money(repair_cost, "bank", board, log)
-
-        # Receive money
-
-        elif card == "Bank error in your favor. Collect $200":
-            log.add(f"{self} gets $200")
-            self.money += 200
-
-        elif card == "From sale of stock you get $50":
-            log.add(f"{self} gets $50")
-            self.money += 50
-
-        elif card == "Holiday fund matures. Receive $100":
-            log.add(f"{self} gets $100")
-            self.money += 100
-
-        elif card == "Income tax refund. Collect $20":
-            log.add(f"{self} gets $20")
-            self.money += 20
-
-        elif card == "Life insurance matures. Collect $100":
-            log.add(f"{self} gets $100")
-            self.money += 100
-
-        elif card == "Receive $25 consultancy fee":
-            log.add(f"{self} gets $25")
-            self.money += 25
-
-        elif card == "You have won second prize in a beauty contest. Collect $10":
-            log.add(f"{self} gets $10")
-            self.money += 10
-
-        elif card == "You inherit $100""You inherit $100":
-            log.add(f"{self} gets $100")
-            self.money += 100
-
-        # Receiving money from other players
-
-        elif card == "It is your birthday. Collect $10 from every player":
-            for other_player in players:
-                if other_player != self and not other_player.is_bankrupt:
-                    other_player.pay_money(50, self, board, log)
-                    if not other_player.is_bankrupt:
-                        log.add(f"{other_player} pays {self} $10")
-
-        return ""
+        card = deck.draw()
+        log.add("{} drew {} card: '{}'", self, deck_name, card)
+        return card.apply(self, deck, board, players, log)
 
     def handle_income_tax(self, board, log):
         """ Handle Income tax: choose which option
         (fix or %) is less money and go with it
         """
+        mechanics = board.settings.mechanics
         # Choose smaller between fixed rate and percentage
         tax_to_pay = min(
-            GameMechanics.income_tax,
-            int(GameMechanics.income_tax_percentage *
+            mechanics.income_tax,
+            int(mechanics.income_tax_percentage *
                 self.net_worth(count_mortgaged_as_full_value=True)))
 
-        if tax_to_pay == GameMechanics.income_tax:
-            log.add(f"{self} pays fixed Income tax {GameMechanics.income_tax}")
+        if tax_to_pay == mechanics.income_tax:
+            log.add("{} pays fixed Income tax {}", self, mechanics.income_tax)
         else:
-            log.add(f"{self} pays {GameMechanics.income_tax_percentage * 100:.0f}% " +
-                    f"Income tax {tax_to_pay}")
+            log.add("{} pays {:.0f}% Income tax {}",
+                    self, mechanics.income_tax_percentage * 100, tax_to_pay)
         self.pay_money(tax_to_pay, "bank", board, log)
 
     def handle_landing_on_property(self, board, players, dice, log):
@@ -472,9 +383,11 @@ class Player:
         def buy_property(property_to_buy):
             """ Player buys the property
             """
-            property_to_buy.owner = self
-            self.owned.append(property_to_buy)
+            self.add_property(property_to_buy)
             self.money -= property_to_buy.cost_base
+            # Recalculate the group's monopolies and who wants to buy what
+            # (for all players, it may affect their decisions too)
+            board.set_owner(property_to_buy, self)
 
         # This is the property a player landed on
         landed_property = board.cells[self.position]
@@ -486,19 +399,11 @@ class Player:
             if is_willing_to_buy_property(landed_property):
                 # Buy property
                 buy_property(landed_property)
-                log.add(f"{self.name} bought {landed_property} " +
-                        f"for ${landed_property.cost_base}")
-
-                # Recalculate all monopolies / can build flags
-                board.recalculate_monopoly_multipliers(landed_property)
-
-                # Recalculate who wants to buy what
-                # (for all players, it may affect their decisions too)
-                for player in players:
-                    player.update_lists_of_properties_to_trade(board)
+                log.add("{} bought {} for ${}",
+                        self.name, landed_property, landed_property.cost_base)
 
             else:
-                log.add(f"{self.name} landed on a {landed_property}, he refuses to buy it")
+                log.add("{} landed on a {}, he refuses to buy it", self.name, landed_property)
                 # TODO: Bank auctions the property
 
         # Property has an owner
@@ -511,61 +416,59 @@ class Player:
                 log.add("Own property, no rent")
             # Handle rent payments
             else:
-                log.add(f"{self.name} landed on a property, " +
-                        f"owned by {landed_property.owner}")
+                log.add("{} landed on a property, owned by {}",
+                        self.name, landed_property.owner)
                 rent_amount = landed_property.calculate_rent(dice)
                 if self.other_notes == "double rent":
                     rent_amount *= 2
-                    log.add(f"Per Chance card, rent is doubled (${rent_amount}).")
+                    log.add("Per Chance card, rent is doubled (${}).", rent_amount)
                 if self.other_notes == "10 times dice":
                     # Divide by monopoly_coef to restore the dice throw
                     # Multiply that by 10
                     rent_amount = rent_amount // landed_property.monopoly_multiplier * 10
-                    log.add(f"Per Chance card, rent is 10x dice throw (${rent_amount}).")
+                    log.add("Per Chance card, rent is 10x dice throw (${}).", rent_amount)
                 self.pay_money(rent_amount, landed_property.owner, board, log)
                 if not self.is_bankrupt:
-                    log.add(f"{self} pays {landed_property.owner} rent ${rent_amount}")
+                    log.add("{} pays {} rent ${}", self, landed_property.owner, rent_amount)
 
     def improve_properties(self, board, log):
         """ While there is money to spend and properties to improve,
         keep building houses/hotels
         """
 
+        # No monopolies to build on
+        if not self.buildable_groups:
+            return
+        # Order the player got the properties in (it doesn't change while building), to break ties
+        owned_order = {cell: index for index, cell in enumerate(self.owned)}
+
         def get_next_property_to_improve():
             """ Decide what is the next property to improve:
             - it should be eligible for improvement (is monopoly, not mortgaged,
             has not more houses than other cells in the group)
-            - start with cheapest
+            - start with cheapest (then the one owned earlier)
+            Only the groups the player has a monopoly in are checked, not all owned properties
             """
             can_be_improved = []
-            for cell in self.owned:
-                # Property has to be:
-                # - not maxed out (no hotel)
-                # - not mortgaged
-                # - a part of monopoly, but not railway or utility (so the monopoly_multiplier is 2)
-                if (
-                        cell.has_hotel == 0
-                        and not cell.is_mortgaged
-                        and cell.monopoly_multiplier == 2
-                        and cell.group not in (RAILROADS, UTILITIES)
-                ):
-                    # In order for this cell to be able to be improved, it needs that all cells in the group:
-                    # 1. have at least as many houses as this cell (or a hotel)
-                    # 2. not be mortgaged
-                    # 3. available houses/hotel in the bank
-                    for other_cell in board.groups[cell.group]:
-                        if (other_cell.has_houses < cell.has_houses and not other_cell.has_hotel) or other_cell.is_mortgaged:
-                            break
-                    else:
-                        if cell.has_houses != 4 and board.available_houses > 0 or \
-                                cell.has_houses == 4 and board.available_hotels > 0:
-                            can_be_improved.append(cell)
-            # Sort the list by the cost of house
-            can_be_improved.sort(key=lambda x: x.cost_house)
-
-            # Return first (the cheapest) property that can be improved
+            for group in self.buildable_groups:
+                group_cells = board.groups[group]
+                # No building if any property in the group is mortgaged
+                if any(cell.is_mortgaged for cell in group_cells):
+                    continue
+                # Even building: only cells with the fewest houses (and not a hotel) can be improved
+                not_maxed_out = [cell for cell in group_cells if not cell.has_hotel]
+                if not not_maxed_out:
+                    continue
+                fewest_houses = min(cell.has_houses for cell in not_maxed_out)
+                # Available houses/hotel in the bank
+                if fewest_houses != 4 and board.available_houses == 0 or \
+                        fewest_houses == 4 and board.available_hotels == 0:
+                    continue
+                can_be_improved.extend(cell for cell in not_maxed_out if cell.has_houses == fewest_houses)
+
+            # Return the cheapest property that can be improved
             if can_be_improved:
-                return can_be_improved[0]
+                return min(can_be_improved, key=lambda cell: (cell.cost_house, owned_order[cell]))
             return None
 
         while True:
@@ -584,13 +487,14 @@ class Player:
             # Building a house
             ordinal = {1: "1st", 2: "2nd", 3: "3rd", 4: "4th"}
 
+            self.count_in_totals(cell_to_improve, -1)
             if cell_to_improve.has_houses != 4:
                 cell_to_improve.has_houses += 1
                 board.available_houses -= 1
                 # Paying for the improvement
                 self.money -= cell_to_improve.cost_house
-                log.add(f"{self} built {ordinal[cell_to_improve.has_houses]} " +
-                        f"house on {cell_to_improve} for ${cell_to_improve.cost_house}")
+                log.add("{} built {} house on {} for ${}",
+                        self, ordinal[cell_to_improve.has_houses], cell_to_improve, cell_to_improve.cost_house)
 
             # Building a hotel
             elif cell_to_improve.has_houses == 4:
@@ -600,7 +504,8 @@ class Player:
                 board.available_hotels -= 1
                 # Paying for the improvement
                 self.money -= cell_to_improve.cost_house
-                log.add(f"{self} built a hotel on {cell_to_improve}")
+                log.add("{} built a hotel on {}", self, cell_to_improve)
+            self.count_in_totals(cell_to_improve, 1)
 
     def unmortgage_a_property(self, board, log):
         """ Go through the list of properties and unmortgage one,
@@ -610,47 +515,58 @@ class Player:
 
         for cell in self.owned:
             if cell.is_mortgaged:
-                cost_to_unmortgage = \
-                    cell.cost_base * GameMechanics.mortgage_value + \
-                    cell.cost_base * GameMechanics.mortgage_fee
+                cost_to_unmortgage = cell.unmortgage_cost
                 if self.money - cost_to_unmortgage >= self.settings.unspendable_cash:
-                    log.add(f"{self} unmortgages {cell} for ${cost_to_unmortgage}")
+                    log.add("{} unmortgages {} for ${}", self, cell, cost_to_unmortgage)
                     self.money -= cost_to_unmortgage
+                    self.count_in_totals(cell, -1)
                     cell.is_mortgaged = False
-                    self.update_lists_of_properties_to_trade(board)
+                    self.count_in_totals(cell, 1)
                     return True
 
         return False
 
-    def raise_money(self, required_amount, board, log):
-        """ Part of the "Pay money" method. If there is not enough cash, the player has to
-        sell houses, hotels, mortgage property until you get the `required_amount` of money
+    def plan_liquidation(self, required_amount, board):
+        """ Plan how to get the `required_amount` of cash: sell houses, hotels, then
+        mortgage property, until it is enough (or everything is sold and mortgaged).
+        Logic for selling buildings goes as follows:
+        - sell a house is able, otherwise sell a hotel
+        - sell one that would bring you just above the required amount (or the most expensive)
+        Mortgage the cheapest properties first.
+        Nothing is changed here: return the list of steps (action, cell, money raised),
+        for apply_liquidation. Actions are "house", "hotel" (replaced with 4 houses),
+        "hotel and houses" (not enough houses in the bank to replace the hotel) and "mortgage"
         """
+        plan = []
+        money = self.money
+
+        # Buildings on the player's properties, and houses in the bank, as the plan goes
+        houses = {cell: cell.has_houses for cell in self.owned if cell.has_houses or cell.has_hotel}
+        hotels = {cell: cell.has_hotel for cell in houses}
+        available_houses = board.available_houses
 
         def get_next_property_to_downgrade(required_amount):
             """ Get the next property to sell houses/hotel from.
-            Logic goes as follows:
-            - sell a house is able, otherwise sell a hotel
-            - sell one that would bring you just above the required amount (or the most expensive)
             """
 
             # 1. let's see which properties CAN be de-improved
             # The house/hotel count is the highest in the group
             can_be_downgrade = []
             can_be_downgrade_has_houses = False
-            for cell in self.owned:
-                if cell.has_houses > 0 or cell.has_hotel > 0:
-                    # Look at other cells in this group
-                    # Do they have more houses or hotels?
-                    # If so, this property cannot be de-improved
-                    for other_cell in board.groups[cell.group]:
-                        if cell.has_hotel == 0 and (
-                                other_cell.has_houses > cell.has_houses or other_cell.has_hotel > 0):
-                            break
-                    else:
-                        can_be_downgrade.append(cell)
-                        if cell.has_houses > 0:
-                            can_be_downgrade_has_houses = True
+            for cell in houses:
+                if houses[cell] == 0 and hotels[cell] == 0:
+                    continue
+                # Look at other cells in this group
+                # Do they have more houses or hotels?
+                # If so, this property cannot be de-improved
+                if hotels[cell] == 0 and any(
+                        houses.get(other_cell, other_cell.has_houses) > houses[cell] or
+                        hotels.get(other_cell, other_cell.has_hotel) > 0
+                        for other_cell in board.groups[cell.group]):
+                    continue
+                can_be_downgrade.append(cell)
+                if houses[cell] > 0:
+                    can_be_downgrade_has_houses = True
 
             # No further de-improvements possible
             if len(can_be_downgrade) == 0:
@@ -659,7 +575,7 @@ class Player:
             # 2. If there are houses and hotels, remove hotels from the list
             # Selling a hotel is a last resort
             if can_be_downgrade_has_houses:
-                can_be_downgrade = [x for x in can_be_downgrade if x.has_hotel == 0]
+                can_be_downgrade = [x for x in can_be_downgrade if hotels[x] == 0]
 
             # 3. Find one that's just above the required amount (or the most expensive one)
             # Sort potential de-improvements from cheap to expensive
@@ -674,23 +590,10 @@ class Player:
                 # Remove the most expensive option
                 can_be_downgrade.pop()
 
-        def get_list_of_properties_to_mortgage():
-            """ Put together a list of properties a player can sell houses from.
-            """
-            list_to_mortgage = []
-            for cell in self.owned:
-                if not cell.is_mortgaged:
-                    list_to_mortgage.append(
-                        (int(cell.cost_base * GameMechanics.mortgage_value), cell))
-
-            # It will be popped from the end, so first to sell should be last
-            list_to_mortgage.sort(key=lambda x: -x[0])
-            return list_to_mortgage
-
         # Cycle through all possible de-improvements until
         # all houses/hotels are sold or enough money is raised
         while True:
-            money_to_raise = required_amount - self.money
+            money_to_raise = required_amount - money
             cell_to_deimprove = get_next_property_to_downgrade(money_to_raise)
 
             if cell_to_deimprove is None or money_to_raise <= 0:
@@ -699,120 +602,138 @@ class Player:
             sell_price = cell_to_deimprove.cost_house // 2
 
             # Selling a hotel
-            if cell_to_deimprove.has_hotel:
+            if hotels[cell_to_deimprove]:
+                hotels[cell_to_deimprove] = 0
                 # Selling hotel: can replace with 4 houses
-                if board.available_houses >= 4:
-                    cell_to_deimprove.has_hotel = 0
-                    cell_to_deimprove.has_houses = 4
-                    board.available_hotels += 1
-                    board.available_houses -= 4
-                    log.add(f"{self} sells a hotel on {cell_to_deimprove}, raising ${sell_price}")
-                    self.money += sell_price
+                if available_houses >= 4:
+                    houses[cell_to_deimprove] = 4
+                    available_houses -= 4
+                    plan.append(("hotel", cell_to_deimprove, sell_price))
                 # Selling hotel, must tear down all 5 houses from one plot
                 # TODO: I think we need to tear down all 3 hotels in this situation?
                 else:
-                    cell_to_deimprove.has_hotel = 0
-                    cell_to_deimprove.has_houses = 0
-                    board.available_hotels += 1
-                    log.add(f"{self} sells a hotel and all houses on {cell_to_deimprove}, " +
-                            f"raising ${sell_price * 5}")
-                    self.money += sell_price * 5
+                    houses[cell_to_deimprove] = 0
+                    sell_price *= 5
+                    plan.append(("hotel and houses", cell_to_deimprove, sell_price))
 
             # Selling a house
             else:
-                cell_to_deimprove.has_houses -= 1
-                board.available_houses += 1
-                ordinal = {1: "1st", 2: "2nd", 3: "3rd", 4: "4th"}
-                log.add(f"{self} sells {ordinal[cell_to_deimprove.has_houses + 1]} " +
-                        f"house on {cell_to_deimprove}, raising ${sell_price}")
-                self.money += sell_price
+                houses[cell_to_deimprove] -= 1
+                available_houses += 1
+                plan.append(("house", cell_to_deimprove, sell_price))
+            money += sell_price
+
+        # Mortgage properties, starting from the cheapest
+        # (it will be popped from the end, so first to mortgage should be last)
+        list_to_mortgage = [(cell.mortgage_price, cell)
+                            for cell in self.owned if not cell.is_mortgaged]
+        list_to_mortgage.sort(key=lambda x: -x[0])
+
+        while list_to_mortgage and money < required_amount:
+            mortgage_price, cell_to_mortgage = list_to_mortgage.pop()
+            plan.append(("mortgage", cell_to_mortgage, mortgage_price))
+            money += mortgage_price
 
-        # Mortgage properties
-        list_to_mortgage = get_list_of_properties_to_mortgage()
+        return plan
 
-        while list_to_mortgage and self.money < required_amount:
-            # Pick a property to mortgage from the list
-            mortgage_price, cell_to_mortgage = list_to_mortgage.pop()
+    def apply_liquidation(self, plan, board, log):
+        """ Carry out the steps of the plan from plan_liquidation:
+        sell houses/hotels, mortgage property and get the money
+        """
+        ordinal = {1: "1st", 2: "2nd", 3: "3rd", 4: "4th"}
 
-            # Mortgage this property
-            cell_to_mortgage.is_mortgaged = True
-            self.money += mortgage_price
-            log.add(f"{self} mortgages {cell_to_mortgage}, raising ${mortgage_price}")
+        for action, cell, money_raised in plan:
+            self.count_in_totals(cell, -1)
+            if action == "house":
+                cell.has_houses -= 1
+                board.available_houses += 1
+                log.add("{} sells {} house on {}, raising ${}",
+                        self, ordinal[cell.has_houses + 1], cell, money_raised)
+            elif action == "hotel":
+                cell.has_hotel = 0
+                cell.has_houses = 4
+                board.available_hotels += 1
+                board.available_houses -= 4
+                log.add("{} sells a hotel on {}, raising ${}", self, cell, money_raised)
+            elif action == "hotel and houses":
+                cell.has_hotel = 0
+                cell.has_houses = 0
+                board.available_hotels += 1
+                log.add("{} sells a hotel and all houses on {}, raising ${}", self, cell, money_raised)
+            else:
+                cell.is_mortgaged = True
+                log.add("{} mortgages {}, raising ${}", self, cell, money_raised)
+            self.count_in_totals(cell, 1)
+            self.money += money_raised
+
+    def raise_money(self, required_amount, board, log):
+        """ Part of the "Pay money" method. If there is not enough cash, the player has to
+        sell houses, hotels, mortgage property until you get the `required_amount` of money.
+        Return the steps taken (see plan_liquidation)
+        """
+        plan = self.plan_liquidation(required_amount, board)
+        self.apply_liquidation(plan, board, log)
+        return plan
 
     def pay_money(self, amount, payee, board, log):
         """ Function to pay money to another player (or bank)
         This is where Bankruptcy is triggered.
         """
 
-        def count_max_raisable_money():
-            """ How much cash can a player produce?
-            Used to determine if they should go bankrupt or not.
-            Max raisable money is 1/2 of houses cost + 1/2 of unmortgaged properties cost
-            """
-            max_raisable = self.money
-            for cell in self.owned:
-                if cell.has_houses > 0:
-                    max_raisable += cell.cost_house * cell.has_houses // 2
-                if cell.has_hotel > 0:
-                    max_raisable += cell.cost_house * 5 // 2
-                if not cell.is_mortgaged:
-                    max_raisable += int(cell.cost_base * GameMechanics.mortgage_value)
-            return max_raisable
-
         def transfer_all_properties(payee, board, log):
             """ Part of bankruptcy procedure, transfer all mortgaged property to the creditor
             """
 
             while self.owned:
                 cell_to_transfer = self.owned.pop()
+                self.count_in_totals(cell_to_transfer, -1)
 
                 # Transfer to a player
                 # TODO: Unmortgage the property right away, or pay more
                 if isinstance(payee, Player):
-                    cell_to_transfer.owner = payee
-                    payee.owned.append(cell_to_transfer)
+                    payee.add_property(cell_to_transfer)
+                    board.set_owner(cell_to_transfer, payee)
                 # Transfer to the bank
                 # TODO: Auction the property
                 else:
-                    cell_to_transfer.owner = None
+                    board.set_owner(cell_to_transfer, None)
                     cell_to_transfer.is_mortgaged = False
 
-                board.recalculate_monopoly_multipliers(cell_to_transfer)
-                log.add(f"{self} transfers {cell_to_transfer} to {payee}")
+                log.add("{} transfers {} to {}", self, cell_to_transfer, payee)
 
         # Regular transaction
         if amount < self.money:
             self.money -= amount
             if payee != "bank":
                 payee.money += amount
-            elif payee == "bank" and GameMechanics.free_parking_money:
+            elif payee == "bank" and board.settings.mechanics.free_parking_money:
                 board.free_parking_money += amount
             return
 
-        max_raisable_money = count_max_raisable_money()
+        max_raisable_money = self.max_raisable_money()
         # Can pay but need to sell some things first
         if amount < max_raisable_money:
-            log.add(f"{self} has ${self.money}, he can pay ${amount}, " +
-                    "but needs to mortgage/sell some things for that")
+            log.add("{} has ${}, he can pay ${}, but needs to mortgage/sell some things for that",
+                    self, self.money, amount)
             self.raise_money(amount, board, log)
             self.money -= amount
             if payee != "bank":
                 payee.money += amount
-            elif payee == "bank" and GameMechanics.free_parking_money:
+            elif payee == "bank" and board.settings.mechanics.free_parking_money:
                 board.free_parking_money += amount
 
         # Bankruptcy (can't pay even after selling and mortgaging all)
         else:
-            log.add(f"{self} has to pay ${amount}, max they can raise is ${max_raisable_money}")
+            log.add("{} has to pay ${}, max they can raise is ${}", self, amount, max_raisable_money)
             self.is_bankrupt = True
-            log.add(f"{self} is bankrupt")
+            log.add("{} is bankrupt", self)
 
             # Raise as much cash as possible to give payee
             self.raise_money(amount, board, log)
-            log.add(f"{self} gave {payee} all their remaining money (${self.money})")
+            log.add("{} gave {} all their remaining money (${})", self, payee, self.money)
             if payee != "bank":
                 payee.money += self.money
-            elif payee == "bank" and GameMechanics.free_parking_money:
+            elif payee == "bank" and board.settings.mechanics.free_parking_money:
                 board.free_parking_money += amount
 
             self.money = 0
@@ -824,8 +745,10 @@ class Player:
             self.wants_to_sell = set()
             self.wants_to_buy = set()
 
-    def update_lists_of_properties_to_trade(self, board):
-        """ Update list of properties player is willing to sell / buy
+    def update_lists_of_properties_to_trade(self, board, groups=None):
+        """ Update list of properties player is willing to sell / buy.
+        Only `groups` are rechecked (the board calls it for the group where the ownership changed),
+        all groups if None
         """
 
         # If player is not willing to trade, he would
@@ -834,134 +757,145 @@ class Player:
         if not self.settings.is_willing_to_make_trades:
             return
 
-        # Reset the lists
-        self.wants_to_sell = set()
-        self.wants_to_buy = set()
+        if groups is None:
+            groups = board.groups
 
         # Go through each group
-        for group_cells in board.groups.values():
+        for group in groups:
+            group_cells = board.groups[group]
 
-            # Break down all properties within each color group into
-            # "owned by me" / "owned by others" / "not owned"
-            owned_by_me = []
-            owned_by_others = []
-            not_owned = []
+            # Remove the group's old entries
             for cell in group_cells:
-                if cell.owner == self:
-                    owned_by_me.append(cell)
-                elif cell.owner is None:
-                    not_owned.append(cell)
-                else:
-                    owned_by_others.append(cell)
+                self.wants_to_sell.discard(cell)
+                self.wants_to_buy.discard(cell)
+
+            # Use the board's ownership counts for
+            # "owned by me" / "owned by others" / "not owned"
+            owner_counts = board.ownership[group]
 
             # If there are properties to buy - no trades
-            if not_owned:
+            if owner_counts[None]:
                 continue
             # If I own 1: I am ready to sell it
-            if len(owned_by_me) == 1:
-                self.wants_to_sell.add(owned_by_me[0])
+            if owner_counts[self] == 1:
+                self.wants_to_sell.update(cell for cell in group_cells if cell.owner is self)
             # If someone owns 1 (and I own the rest): I want to buy it
-            if len(owned_by_others) == 1:
-                self.wants_to_buy.add(owned_by_others[0])
-
-    def do_a_two_way_trade(self, players, board, log):
-        """ Look for and perform a two-way trade
+            if owner_counts[self] == len(group_cells) - 1:
+                self.wants_to_buy.update(cell for cell in group_cells if cell.owner is not self)
+
+    @staticmethod
+    def get_price_difference(gives, receives):
+        """ Calculate price difference between items player
+        is about to give minus what he is about to receive.
+        >0 means a player gives away more
+        Return both absolute (in $), relative for a giver, relative for a receiver
         """
 
-        def get_price_difference(gives, receives):
-            """ Calculate price difference between items player
-            is about to give minus what he is about to receive.
-            >0 means a player gives away more
-            Return both absolute (in $), relative for a giver, relative for a receiver
-            """
+        cost_gives = sum(cell.cost_base for cell in gives)
+        cost_receives = sum(cell.cost_base for cell in receives)
 
-            cost_gives = sum(cell.cost_base for cell in gives)
-            cost_receives = sum(cell.cost_base for cell in receives)
+        diff_abs = cost_gives - cost_receives
 
-            diff_abs = cost_gives - cost_receives
+        diff_giver, diff_receiver = float("inf"), float("inf")
+        if receives:
+            diff_giver = cost_gives / cost_receives
+        if gives:
+            diff_receiver = cost_receives / cost_gives
 
-            diff_giver, diff_receiver = float("inf"), float("inf")
-            if receives:
-                diff_giver = cost_gives / cost_receives
-            if gives:
-                diff_receiver = cost_receives / cost_gives
+        return diff_abs, diff_giver, diff_receiver
 
-            return diff_abs, diff_giver, diff_receiver
+    @staticmethod
+    def fair_deal(player_gives, player_receives, settings, other_settings):
+        """ Remove properties from to_sell and to_buy to make it as fair as possible,
+        by the trade limits of the player's and the other player's settings.
+        Lists of the deal are sorted and cut in place, return them: (player_gives, player_receives)
+        """
 
         def remove_by_color(cells, color):
             new_cells = [cell for cell in cells if cell.group != color]
             return new_cells
 
-        def fair_deal(player_gives, player_receives, other_player):
-            """ Remove properties from to_sell and to_buy to make it as fair as possible
-            """
+        # First, get all colors in both sides of the deal
+        color_receives = [cell.group for cell in player_receives]
+        color_gives = [cell.group for cell in player_gives]
+
+        # If there are only properties from size-2 groups, no trade
+        both_colors = set(color_receives + color_gives)
+        if both_colors.issubset({UTILITIES, INDIGO, BROWN}):
+            return [], []
+
+        # Look at "Indigo", "Brown", "Utilities". These have 2 properties,
+        # so both players would want to receive them
+        # If they are present, remove it from the guy who has the longer list
+        # If a list has the same length, remove both questionable items
+
+        for questionable_color in [UTILITIES, INDIGO, BROWN]:
+            if questionable_color in color_receives and questionable_color in color_gives:
+                if len(player_receives) > len(player_gives):
+                    player_receives = remove_by_color(player_receives, questionable_color)
+                elif len(player_receives) < len(player_gives):
+                    player_gives = remove_by_color(player_gives, questionable_color)
+                else:
+                    player_receives = remove_by_color(player_receives, questionable_color)
+                    player_gives = remove_by_color(player_gives, questionable_color)
 
-            # First, get all colors in both sides of the deal
-            color_receives = [cell.group for cell in player_receives]
-            color_gives = [cell.group for cell in player_gives]
-
-            # If there are only properties from size-2 groups, no trade
-            both_colors = set(color_receives + color_gives)
-            if both_colors.issubset({UTILITIES, INDIGO, BROWN}):
-                return [], []
-
-            # Look at "Indigo", "Brown", "Utilities". These have 2 properties,
-            # so both players would want to receive them
-            # If they are present, remove it from the guy who has the longer list
-            # If a list has the same length, remove both questionable items
-
-            for questionable_color in [UTILITIES, INDIGO, BROWN]:
-                if questionable_color in color_receives and questionable_color in color_gives:
-                    if len(player_receives) > len(player_gives):
-                        player_receives = remove_by_color(player_receives, questionable_color)
-                    elif len(player_receives) < len(player_gives):
-                        player_gives = remove_by_color(player_gives, questionable_color)
-                    else:
-                        player_receives = remove_by_color(player_receives, questionable_color)
-                        player_gives = remove_by_color(player_gives, questionable_color)
-
-            # Sort, starting from the most expensive
-            player_receives.sort(key=lambda x: -x.cost_base)
-            player_gives.sort(key=lambda x: -x.cost_base)
-
-            # Check the difference in value and make sure it is not larger that player's preference
-            while player_gives and player_receives:
-
-                diff_abs, diff_giver, diff_receiver = \
-                    get_price_difference(player_gives, player_receives)
-
-                # This player gives too much
-                if diff_abs > self.settings.trade_max_diff_absolute or \
-                        diff_giver > self.settings.trade_max_diff_relative:
-                    player_gives.pop()
-                    continue
-                # The Other player gives too much
-                if -diff_abs > other_player.settings.trade_max_diff_absolute or \
-                        diff_receiver > other_player.settings.trade_max_diff_relative:
-                    player_receives.pop()
-                    continue
-                break
+        # Sort, starting from the most expensive
+        player_receives.sort(key=lambda x: -x.cost_base)
+        player_gives.sort(key=lambda x: -x.cost_base)
+
+        # Check the difference in value and make sure it is not larger that player's preference
+        while player_gives and player_receives:
+
+            diff_abs, diff_giver, diff_receiver = \
+                Player.get_price_difference(player_gives, player_receives)
+
+            # This player gives too much
+            if diff_abs > settings.trade_max_diff_absolute or \
+                    diff_giver > settings.trade_max_diff_relative:
+                player_gives.pop()
+                continue
+            # The Other player gives too much
+            if -diff_abs > other_settings.trade_max_diff_absolute or \
+                    diff_receiver > other_settings.trade_max_diff_relative:
+                player_receives.pop()
+                continue
+            break
+
+        return player_gives, player_receives
+
+    def do_a_two_way_trade(self, players, board, log):
+        """ Look for and perform a two-way trade
+        """
 
-            return player_gives, player_receives
+        # Nothing to trade (wishlists are empty for players not willing to trade)
+        if not self.wants_to_buy or not self.wants_to_sell:
+            return False
 
         for other_player in players:
-            # Selling/buying thing matches
-            if self.wants_to_buy.intersection(other_player.wants_to_sell) and \
-                    self.wants_to_sell.intersection(other_player.wants_to_buy):
-                player_receives = list(self.wants_to_buy.intersection(other_player.wants_to_sell))
-                player_gives = list(self.wants_to_sell.intersection(other_player.wants_to_buy))
+            # Selling/buying thing matches (wishlists are kept up to date by the board)
+            player_receives = self.wants_to_buy & other_player.wants_to_sell
+            if not player_receives:
+                continue
+            player_gives = self.wants_to_sell & other_player.wants_to_buy
+            if player_gives:
+                # Put them in the board order, so the deal does not depend on the sets' order
+                player_receives = sorted(player_receives, key=lambda cell: cell.position)
+                player_gives = sorted(player_gives, key=lambda cell: cell.position)
 
                 # Work out a fair deal (don't trade the same color,
                 # get value difference within the limit)
-                player_gives, player_receives = \
-                    fair_deal(player_gives, player_receives, other_player)
+                deal = (other_player, tuple(player_gives), tuple(player_receives))
+                if deal not in self.fair_deals:
+                    self.fair_deals[deal] = self.fair_deal(player_gives, player_receives,
+                                                           self.settings, other_player.settings)
+                player_gives, player_receives = self.fair_deals[deal]
 
                 # If their deal is not empty, go on
                 if player_receives and player_gives:
 
                     # Price difference in traded properties
                     price_difference, _, _ = \
-                        get_price_difference(player_gives, player_receives)
+                        self.get_price_difference(player_gives, player_receives)
 
                     # Player gives await more expensive item, other play has to pay
                     if price_difference > 0:
@@ -982,37 +916,29 @@ class Player:
                         self.money -= abs(price_difference)
 
                     # Property changes hands
+                    # (the board recalculates monopolies and who wants to buy what
+                    # for all players, it may affect their decisions too)
                     for cell_to_receive in player_receives:
-                        cell_to_receive.owner = self
-                        self.owned.append(cell_to_receive)
-                        other_player.owned.remove(cell_to_receive)
+                        self.add_property(cell_to_receive)
+                        other_player.remove_property(cell_to_receive)
+                        board.set_owner(cell_to_receive, self)
                     for cell_to_give in player_gives:
-                        cell_to_give.owner = other_player
-                        other_player.owned.append(cell_to_give)
-                        self.owned.remove(cell_to_give)
+                        other_player.add_property(cell_to_give)
+                        self.remove_property(cell_to_give)
+                        board.set_owner(cell_to_give, other_player)
 
                     # Log the trade and compensation payment
-                    log.add(f"Trade: {self} gives {[str(cell) for cell in player_gives]}, " +
-                            f"receives {[str(cell) for cell in player_receives]} " +
-                            f"from {other_player}")
+                    if log.enabled:
+                        log.add("Trade: {} gives {}, receives {} from {}", self,
+                                [str(cell) for cell in player_gives], [str(cell) for cell in player_receives],
+                                other_player)
 
                     if price_difference > 0:
-                        log.add(f"{self} received " +
-                                f"price difference compensation ${abs(price_difference)} " +
-                                f"from {other_player}")
+                        log.add("{} received price difference compensation ${} from {}",
+                                self, abs(price_difference), other_player)
                     if price_difference < 0:
-                        log.add(f"{other_player} received " +
-                                f"price difference compensation ${abs(price_difference)} " +
-                                f"from {self}")
-
-                    # Recalculate monopoly and improvement status
-                    board.recalculate_monopoly_multipliers(player_gives[0])
-                    board.recalculate_monopoly_multipliers(player_receives[0])
-
-                    # Recalculate who wants to buy what
-                    # (for all players, it may affect their decisions too)
-                    for player in players:
-                        player.update_lists_of_properties_to_trade(board)
+                        log.add("{} received price difference compensation ${} from {}",
+                                other_player, abs(price_difference), self)
 
                     # Return True to run a trading function again
                     return True
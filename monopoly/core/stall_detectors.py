@@ -0,0 +1,193 @@
+""" Stall detectors: end games early that are very unlikely to have any more bankruptcies,
+so they don't run all the way to the turn limit.
+Detectors to use are set in SimulationSettings.stall_detectors, as (class, parameters) pairs.
+Detectors are created for each game (they may keep track of the game's history)
+and checked at the start of every turn. Each has its own EndReason, so the
+Analyzer shows how many games were cut short and by what.
+"""
+import math
+from collections import deque
+
+from monopoly.core.cell import Property
+from monopoly.core.constants import UTILITIES
+from monopoly.core.game_result import EndReason
+
+
+class StallDetector:
+    """ Base class for all stall detectors
+    """
+    end_reason = None
+
+    def is_stalled(self, board, alive, turn_n, turns_left):
+        """ Return True if the game should end.
+        alive is the list of non-bankrupt players, turns_left is how many turns are left until the turn limit
+        """
+        return False
+
+    def describe(self):
+        """ What was detected, for the log """
+        return self.end_reason.name
+
+
+class NoMonopoliesDetector(StallDetector):
+    """ All properties are sold, nobody has a monopoly (so no houses)
+    and no trade can make one, for `turns` turns in a row
+    """
+    end_reason = EndReason.NO_MONOPOLIES
+
+    def __init__(self, turns):
+        self.turns = turns
+        self.stalled_turns = 0
+
+    def is_stalled(self, board, alive, turn_n, turns_left):
+        if self.is_stalled_now(board, alive):
+            self.stalled_turns += 1
+        else:
+            self.stalled_turns = 0
+        return self.stalled_turns >= self.turns
+
+    @staticmethod
+    def is_stalled_now(board, alive):
+        # Properties left to buy
+        if any(owner_counts[None] for owner_counts in board.ownership.values()):
+            return False
+        # Someone has a monopoly
+        if any(player.buildable_groups for player in alive):
+            return False
+        return not is_trade_possible(alive)
+
+    def describe(self):
+        return f"no monopolies and no trades for {self.turns} turns"
+
+
+class CashTrendingUpDetector(StallDetector):
+    """ Cash of every remaining player grew over each of the last `windows` periods of `turns` turns
+    """
+    end_reason = EndReason.CASH_TRENDING_UP
+
+    def __init__(self, turns, windows=3):
+        self.turns = turns
+        self.windows = windows
+        # Players' cash at the start of the last (windows + 1) periods
+        self.history = deque(maxlen=windows + 1)
+
+    def is_stalled(self, board, alive, turn_n, turns_left):
+        if (turn_n - 1) % self.turns:
+            return False
+        self.history.append({player.name: player.money for player in alive})
+        if len(self.history) <= self.windows:
+            return False
+        # Players who went bankrupt in the meantime are not in the latest record
+        history = list(self.history)
+        return all(earlier[name] < later[name]
+                   for earlier, later in zip(history, history[1:])
+                   for name in history[-1])
+
+    def describe(self):
+        return f"cash of all players went up in each of {self.windows} periods of {self.turns} turns"
+
+
+class LowBankruptcyRiskDetector(StallDetector):
+    """ Rough estimate of the chance that someone goes bankrupt before the turn limit is below `max_probability`.
+    Each player's money (all they can raise, see Player.max_raisable_money) is treated as a random walk:
+    every move lands on any cell with the same chance, paying rent or tax there, while getting salary
+    and the rent other players pay them. The chance of the walk dropping below zero before the turn
+    limit is the player's chance to go bankrupt. There are `moves_per_turn` moves per turn (doubles add some).
+    Only checked when all properties are sold and no trade is possible (so no new monopolies);
+    existing monopolies count as if they already had hotels
+    """
+    end_reason = EndReason.LOW_BANKRUPTCY_RISK
+
+    def __init__(self, max_probability, moves_per_turn=1.2):
+        self.max_probability = max_probability
+        self.moves_per_turn = moves_per_turn
+
+    def is_stalled(self, board, alive, turn_n, turns_left):
+        # Properties left to buy, or trades that can make new monopolies
+        if any(owner_counts[None] for owner_counts in board.ownership.values()) or is_trade_possible(alive):
+            return False
+
+        mechanics = board.settings.mechanics
+        n_cells = len(board.cells)
+        # Salary per move: average roll is (sides + 1) / 2 per die
+        salary_per_move = mechanics.salary * mechanics.dice_count * (mechanics.dice_sides + 1) / 2 / n_cells
+
+        # Cost of landing on each cell, for each player
+        landing_costs = {player: [self.max_landing_cost(cell, player, mechanics) for cell in board.cells]
+                         for player in alive}
+        rent_income = {player: 0 for player in alive}
+        for cell in board.cells:
+            if isinstance(cell, Property) and cell.owner in rent_income:
+                for other_player in alive:
+                    rent_income[cell.owner] += landing_costs[other_player][cell.position] / n_cells
+
+        no_bankruptcy_probability = 1
+        for player in alive:
+            costs = landing_costs[player]
+            mean_cost = sum(costs) / n_cells
+            # Money change per turn: average and variance
+            drift = (salary_per_move + rent_income[player] - mean_cost) * self.moves_per_turn
+            variance = (sum(cost ** 2 for cost in costs) / n_cells - mean_cost ** 2) * self.moves_per_turn
+            no_bankruptcy_probability *= 1 - self.ruin_probability(
+                player.max_raisable_money(), drift, variance, turns_left)
+        return 1 - no_bankruptcy_probability < self.max_probability
+
+    @staticmethod
+    def ruin_probability(money, drift, variance, turns):
+        """ Chance that a random walk starting at `money`, with this drift and variance per turn,
+        drops below zero within `turns` turns (Brownian motion approximation)
+        """
+        if money <= 0:
+            return 1
+        if variance == 0:
+            return 1 if money + drift * turns <= 0 else 0
+        spread = math.sqrt(variance * turns)
+        exponent = -2 * drift * money / variance
+        probability = normal_cdf((-money - drift * turns) / spread)
+        # exp() overflows for a large negative drift, but then the first part is ~1 already
+        if exponent < 700:
+            probability += math.exp(exponent) * normal_cdf((-money + drift * turns) / spread)
+        return min(1, probability)
+
+    @staticmethod
+    def max_landing_cost(cell, player, mechanics):
+        """ The most the player may have to pay for landing on the cell (doubled rent cards aside) """
+        if isinstance(cell, Property):
+            if cell.owner is None or cell.owner is player or cell.is_mortgaged:
+                return 0
+            if cell.has_hotel or cell.group in cell.owner.buildable_groups:
+                return cell.rent_house[-1]
+            if cell.has_houses:
+                return cell.rent_house[cell.has_houses - 1]
+            if cell.group == UTILITIES:
+                return mechanics.dice_count * mechanics.dice_sides * cell.monopoly_multiplier
+            return cell.rent_base * cell.monopoly_multiplier
+        if cell.landing_handler == "handle_landing_on_luxury_tax":
+            return mechanics.luxury_tax
+        if cell.landing_handler == "handle_landing_on_income_tax":
+            return mechanics.income_tax
+        return 0
+
+    def describe(self):
+        return f"chance of another bankruptcy is below {self.max_probability}"
+
+
+def normal_cdf(x):
+    """ Standard normal cumulative distribution function """
+    return (1 + math.erf(x / math.sqrt(2))) / 2
+
+
+def is_trade_possible(alive):
+    """ Are there two players who want each other's properties (see Player.do_a_two_way_trade) """
+    for player in alive:
+        for other_player in alive:
+            if other_player is not player and \
+                    player.wants_to_buy & other_player.wants_to_sell and \
+                    other_player.wants_to_buy & player.wants_to_sell:
+                return True
+    return False
+
+
+def create_stall_detectors(stall_detectors_settings):
+    """ Create a game's detectors from the settings: list of (detector class, parameters) """
+    return [detector_class(*parameters) for detector_class, parameters in stall_detectors_settings]
@@ -0,0 +1,283 @@
+""" Structured events log: the same events as the text events log, as compact binary records
+instead of formatted lines. Formatting the text is skipped during the simulation,
+and the text of any game can be rendered later from the records (render_game).
+It saves space, not time: the file is about 3.5 times smaller than the text log,
+but converting and compressing the records costs more than formatting the lines.
+
+An event is one Log.add(template, *args) call. Its record (RECORD, all fields are int64) is:
+- code: the event's template and kinds of arguments, in the block's "events" table
+- game: game number
+- turn: turn of the game when the event happened (0: before the first turn)
+- player: index (in the block's "players" table) of the first player in the arguments, -1 if none
+- args: up to MAX_ARGS arguments, as integers (unused ones are 0), by kind:
+  "i": int as is; "p": player index; "c": cell position (names are in the "cells" table);
+  "f": float and "s": anything else, as an index in the "strings" table
+
+While the game is played, events are only kept (template and arguments, no formatting),
+and converted to records when it is saved: a column of arguments at a time for all the events of a template,
+then packed and compressed once.
+The file starts with FILE_HEADER (magic, length of the first line) and the first line.
+Then each game is one self-contained block: BLOCK_HEADER (game number, number of records,
+length of the metadata, length of the records), the metadata (JSON with the tables),
+and the records (zlib-compressed). Blocks are written as the games finish, so they may be out of order.
+Records of a block can be read with NumPy as np.frombuffer(records, dtype=RECORD_DTYPE),
+and events of a kind selected by their codes, for example all rent payments:
+np.isin(records["code"], event_codes(metadata, "{} pays {} rent ${}")).
+"""
+import json
+import struct
+import sys
+import zlib
+from array import array
+from collections import defaultdict
+from itertools import chain, repeat
+from os import PathLike
+from typing import Iterator, List, Tuple, Union
+
+from monopoly.core.cell import Cell
+from monopoly.core.player import Player
+from monopoly.log import Log
+
+MAGIC = b"MONOEVT1"
+FILE_HEADER = struct.Struct("<8sI")
+BLOCK_HEADER = struct.Struct("<IIII")
+MAX_ARGS = 5
+RECORD_FIELDS = 4 + MAX_ARGS
+RECORD = struct.Struct(f"<{RECORD_FIELDS}q")
+# The same record as a NumPy dtype (a list, so NumPy is not needed here)
+RECORD_DTYPE = [("code", "<i8"), ("game", "<i8"), ("turn", "<i8"), ("player", "<i8"),
+                ("args", "<i8", (MAX_ARGS,))]
+
+
+class Table(dict):
+    """ {value: index} table of a block, a new value gets the next index """
+
+    def __missing__(self, key):
+        index = self[key] = len(self)
+        return index
+
+
+class Converter(dict):
+    """ {argument: its integer in the records}, worked out once per argument by the function """
+
+    def __init__(self, function):
+        super().__init__()
+        self.function = function
+
+    def __missing__(self, arg):
+        value = self[arg] = self.function(arg)
+        return value
+
+
+class TextConverter(Converter):
+    """ Converter of arguments that can't be dict keys (lists), by their text """
+
+    def __getitem__(self, arg):
+        return super().__getitem__(str(arg))
+
+
+class ArgumentKinds(dict):
+    """ {type of an argument: its kind (see argument_kind), or "t" for the arguments
+    that can't be dict keys (lists), they are stored as strings, by their text}
+    """
+
+    def __missing__(self, arg_type):
+        kind = argument_kind(arg_type)
+        if kind == "s" and arg_type.__hash__ is None:
+            kind = "t"
+        self[arg_type] = kind
+        return kind
+
+
+class EventTypes(dict):
+    """ {(template, kinds of the arguments): (code, converters of the arguments (None for ints, stored as is),
+    index of the first player argument or -1)} of a block, worked out for each new kind of events
+    """
+
+    def __init__(self, log):
+        super().__init__()
+        self.log = log
+
+    def __missing__(self, key):
+        data, kinds = key
+        if len(kinds) > MAX_ARGS:
+            raise ValueError(f"Too many arguments for a structured event ({len(kinds)}): {data}")
+        converters = tuple(self.log.converters[kind] for kind in kinds)
+        event = self[key] = (self.log.events[(data, kinds.replace("t", "s"))], converters, kinds.find("p"))
+        return event
+
+
+class StructuredLog(Log):
+    """ Events log of one game, written as a block of binary records (see the module's docstring)
+    """
+
+    def __init__(self, log_file_name: Union[str, PathLike] = "events.bin", game_number: int = 0,
+                 disabled: bool = False):
+        super().__init__(log_file_name, disabled)
+        self.game_number = game_number
+        # Events as they were added: {template: [(turn, arguments)]},
+        # and `content` has the template of each event, in the order of the events
+        self.pending = defaultdict(list)
+        # Tables of the block
+        self.events = Table()
+        self.strings = Table()
+        self.players = Table()
+        # {position: name} of the cells in the events
+        self.cells = {}
+        # Converters of arguments by kind (ints are stored as they are)
+        self.converters = {"i": None, "p": self.players.__getitem__,
+                           "c": Converter(self.cell_position).__getitem__,
+                           "f": Converter(lambda arg: self.strings[repr(arg)]).__getitem__,
+                           "s": Converter(lambda arg: self.strings[str(arg)]).__getitem__,
+                           "t": TextConverter(self.strings.__getitem__).__getitem__}
+        self.argument_kinds = ArgumentKinds()
+        self.event_types = EventTypes(self)
+
+    def add(self, data, *args):
+        """ Add an event: the template and its arguments, converted to a record when the log is saved
+        """
+        if self.disabled:
+            return
+        self.pending[data].append((self.turn, args))
+        self.content.append(data)
+
+    def cell_position(self, cell):
+        """ Position of a new cell in the events, its name goes to the "cells" table """
+        self.cells[cell.position] = cell.name
+        return cell.position
+
+    def metadata(self):
+        """ Tables of the block, to decode its records """
+        return {"events": list(self.events),
+                "strings": list(self.strings),
+                "players": [player.name for player in self.players],
+                "cells": list(self.cells.items())}
+
+    def records(self) -> array:
+        """ Records of the events, in their order. The events of a template are converted
+        an argument at a time for all of them
+        """
+        records = {data: iter(self.template_records(data, events)) for data, events in self.pending.items()}
+        return array("q", list(chain.from_iterable(map(next, map(records.__getitem__, self.content)))))
+
+    def template_records(self, data, events):
+        """ Records of the template's events (as tuples of RECORD_FIELDS integers), in their order """
+        kind_of = self.argument_kinds.__getitem__
+        turns, arg_lists = zip(*events)
+        columns = list(zip(*arg_lists))
+        column_kinds = [set(map(kind_of, set(map(type, column)))) for column in columns]
+        if len(set(map(len, arg_lists))) == 1 and all(len(kinds) == 1 for kinds in column_kinds):
+            kinds = "".join(kinds.pop() for kinds in column_kinds)
+            return self.convert(self.event_types[(data, kinds)], turns, columns)
+        # Arguments of different kinds (ints and floats), or numbers of them:
+        # the events of each kind of arguments together, then back in their order
+        event_kinds = ["".join(map(kind_of, map(type, args))) for args in arg_lists]
+        events_of_kinds = defaultdict(list)
+        for kinds, event in zip(event_kinds, events):
+            events_of_kinds[kinds].append(event)
+        records = {}
+        for kinds, kind_events in events_of_kinds.items():
+            kind_turns, kind_arg_lists = zip(*kind_events)
+            records[kinds] = self.convert(self.event_types[(data, kinds)], kind_turns, list(zip(*kind_arg_lists)))
+        return map(next, map(records.__getitem__, event_kinds))
+
+    def convert(self, event, turns, columns):
+        """ Records of the events of this kind: their turns and columns of arguments """
+        code, converters, first_player = event
+        values = [column if converter is None else list(map(converter, column))
+                  for converter, column in zip(converters, columns)]
+        player = values[first_player] if first_player >= 0 else repeat(-1)
+        return zip(repeat(code), repeat(self.game_number), turns, player, *values,
+                   *(repeat(0),) * (MAX_ARGS - len(values)))
+
+    def save(self):
+        """ Convert the events to records, pack and compress them, and write them out as one block
+        """
+        if self.disabled:
+            return
+        records = self.records()
+        metadata = json.dumps(self.metadata()).encode("utf-8")
+        if sys.byteorder == "big":
+            records.byteswap()
+        compressed = zlib.compress(records.tobytes(), 1)
+        with self.lock:
+            with open(self.log_file_name, "ab") as logfile:
+                logfile.write(BLOCK_HEADER.pack(self.game_number, len(records) // RECORD_FIELDS,
+                                                len(metadata), len(compressed)))
+                logfile.write(metadata)
+                logfile.write(compressed)
+
+    def flush(self):
+        """ Write out the block and empty the log """
+        super().flush()
+        self.pending.clear()
+
+    def reset(self, first_line=""):
+        """ Empty the log file, write the file header and first_line
+        """
+        first_line = first_line.encode("utf-8")
+        with self.lock:
+            with open(self.log_file_name, "wb") as logfile:
+                logfile.write(FILE_HEADER.pack(MAGIC, len(first_line)))
+                logfile.write(first_line)
+
+
+def argument_kind(arg_type):
+    """ Kind of the event's argument (by its type), how it is stored in the record """
+    if arg_type is int:
+        return "i"
+    if issubclass(arg_type, Player):
+        return "p"
+    if issubclass(arg_type, Cell):
+        return "c"
+    if arg_type is float:
+        return "f"
+    return "s"
+
+
+def read_blocks(file_name) -> Iterator[Tuple[int, dict, bytes]]:
+    """ Blocks of a structured events log, in the order they were written:
+    (game number, metadata, records as bytes)
+    """
+    with open(file_name, "rb") as logfile:
+        magic, first_line_length = FILE_HEADER.unpack(logfile.read(FILE_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{file_name} is not a structured events log")
+        logfile.read(first_line_length)
+        while True:
+            header = logfile.read(BLOCK_HEADER.size)
+            if not header:
+                return
+            game_number, _, metadata_length, records_length = BLOCK_HEADER.unpack(header)
+            metadata = json.loads(logfile.read(metadata_length).decode("utf-8"))
+            yield game_number, metadata, zlib.decompress(logfile.read(records_length))
+
+
+def event_codes(metadata, template) -> List[int]:
+    """ Codes of the block's events with this template (to select its records) """
+    return [code for code, (event_template, _) in enumerate(metadata["events"]) if event_template == template]
+
+
+def render_block(metadata, records) -> List[str]:
+    """ Text lines of a block, as the text events log has them """
+    cells = dict(metadata["cells"])
+    decoders = {"i": lambda value: value,
+                "p": lambda value: metadata["players"][value],
+                "c": lambda value: cells[value],
+                "f": lambda value: float(metadata["strings"][value]),
+                "s": lambda value: metadata["strings"][value]}
+    lines = []
+    for code, _, _, _, *values in RECORD.iter_unpack(records):
+        template, kinds = metadata["events"][code]
+        if kinds:
+            template = template.format(*(decoders[kind](value) for kind, value in zip(kinds, values)))
+        lines.append(template)
+    return lines
+
+
+def render_game(file_name, game_number) -> List[str]:
+    """ Text lines of the game's events (empty if the game is not in the log) """
+    return [line
+            for block_game_number, metadata, records in read_blocks(file_name)
+            if block_game_number == game_number
+            for line in render_block(metadata, records)]
@@ -20,12 +20,26 @@ class Log:
         self.log_file_name = log_file_name
         self.content = []
         self.disabled = disabled
+        # Current turn of the game (set by the game, used by the structured log)
+        self.turn = 0
 
-    def add(self, data):
+    @property
+    def enabled(self):
+        """ Cheap check for call sites that need to do extra work
+        (loops, net worth calculation) only to produce log lines
+        """
+        return not self.disabled
+
+    def add(self, data, *args):
         """ Add a line to a Log
+        If args are provided, data is a str.format() template that is only
+        rendered when the log is enabled, so a disabled log does no string formatting:
+        log.add("{} pays ${}", player, amount)
         """
         if self.disabled:
             return
+        if args:
+            data = data.format(*args)
         self.content.append(data)
 
     def save(self):
@@ -39,6 +53,12 @@ class Log:
                 if self.content:
                     logfile.write("\n")
 
+    def flush(self):
+        """ Write out the log and empty it (for logs that are written out several times)
+        """
+        self.save()
+        self.content = []
+
     def reset(self, first_line=""):
         """ Empty the log file, write first_line if provided
         """
@@ -1,5 +1,6 @@
 from pathlib import Path
 
+from monopoly.event_stream import StructuredLog
 from monopoly.log import Log
 
 project_root = Path(__file__).resolve().parent
@@ -8,19 +9,43 @@ results_dir = project_root.parent / "results"
 
 class LogSettings:
     KEEP_GAME_LOG = True
+    # Write bankruptcies.tsv at the end of the simulation (results are aggregated in memory either way)
+    KEEP_BANKRUPTCIES_LOG = True
     EVENTS_LOG_PATH = results_dir / "events.log"
+    # Keep the events log as binary records (events.bin) instead of text, readable with NumPy;
+    # render_events.py turns a game of it into text. It only saves space (about 3.5x smaller file),
+    # it is slower than the text log: 2.5 s vs 1.3 s for 100 games (0.9 s with no events log)
+    STRUCTURED_EVENTS_LOG = False
+    STRUCTURED_EVENTS_LOG_PATH = results_dir / "events.bin"
     BANKRUPTCIES_PATH = results_dir / "bankruptcies.tsv"
+    # Simulation checkpoint, to resume an interrupted simulation
+    CHECKPOINT_PATH = results_dir / "checkpoint.pickle"
+    # Results table of a parameter sweep
+    SWEEP_RESULTS_PATH = results_dir / "sweep.tsv"
+    # Full events log of a single replayed game
+    REPLAY_LOG_PATH = results_dir / "replay.log"
+    # Profile of the simulation (merged from all workers)
+    PROFILE_PATH = results_dir / "profile.pstats"
+    # Benchmark results, and the saved results to compare them with
+    BENCHMARK_RESULTS_PATH = results_dir / "benchmark.json"
+    BENCHMARK_BASELINE_PATH = results_dir / "benchmark_baseline.json"
 
     @classmethod
-    def init_logs(cls):
-        """Initiate & reset both logs; return (events_log, bankruptcies_log)."""
+    def init_logs(cls, reset=True):
+        """Initiate & reset both logs; return (events_log, bankruptcies_log).
+        With reset=False (resuming a simulation) the existing logs are kept and added to."""
 
         # 1) events log
-        events_log = Log(cls.EVENTS_LOG_PATH, disabled=not cls.KEEP_GAME_LOG)
-        events_log.reset("Events log")
+        if cls.STRUCTURED_EVENTS_LOG:
+            events_log = StructuredLog(cls.STRUCTURED_EVENTS_LOG_PATH, disabled=not cls.KEEP_GAME_LOG)
+        else:
+            events_log = Log(cls.EVENTS_LOG_PATH, disabled=not cls.KEEP_GAME_LOG)
+        if reset:
+            events_log.reset("Events log")
 
         # 2) bankruptcies summary log
-        bankruptcies_log = Log(cls.BANKRUPTCIES_PATH)
-        bankruptcies_log.reset("game_number\tplayer_bankrupt\tturn")
+        bankruptcies_log = Log(cls.BANKRUPTCIES_PATH, disabled=not cls.KEEP_BANKRUPTCIES_LOG)
+        if reset:
+            bankruptcies_log.reset("game_number\tplayer_bankrupt\tturn")
 
         return events_log, bankruptcies_log
@@ -0,0 +1,200 @@
+""" Analytic model of moving around the board (a Markov chain): how often players land on each cell,
+and the expected rent of properties, computed from the rules without simulating any games.
+States of the chain are the player's situations before a dice roll: (position, doubles rolled this turn),
+or (JAILED, days spent in jail). The model follows the simulation's rules:
+- three doubles in a row, Go To Jail and jail cards send the player to jail;
+- a player in jail leaves on a double (and rolls again) or pays the fine on the third day;
+- Chance and Community Chest cards are drawn with equal chances, and cards that move the player
+  (AdvanceToCard, AdvanceToNearestCard, GoBackCard, GoToJailCard) are followed to the next cell.
+Not modeled: Get Out of Jail Free cards being held by players (they are treated as cards without a move).
+Results depend on the layout, the decks and the dice only, so they are computed once per rule set (cached).
+"""
+from collections import defaultdict
+from functools import lru_cache
+
+from monopoly.core.board import Board, movement_tables
+from monopoly.core.card import AdvanceToCard, AdvanceToNearestCard, GoBackCard, GoToJailCard
+from monopoly.core.cell import Chance, CommunityChest, GoToJail, Property
+from monopoly.core.constants import RAILROADS, UTILITIES
+from monopoly.core.dice import all_possible_rolls
+
+# Instead of a position: the player is in jail
+JAILED = "jailed"
+# Power iteration stops when no probability changes more than this
+TOLERANCE = 1e-12
+MAX_ITERATIONS = 10_000
+
+
+def landing_frequencies(config):
+    """ Expected landings on each cell per player's turn, by position, for the rules of the GameConfig """
+    return landings_per_turn(config.board_layout, tuple(config.chance_cards), tuple(config.community_chest_cards),
+                             config.mechanics.dice_count, config.mechanics.dice_sides)
+
+
+@lru_cache(maxsize=None)
+def landings_per_turn(board_layout, chance_cards, community_chest_cards, dice_count, dice_sides):
+    """ Expected landings on each cell per player's turn, by position.
+    Landings are the cells where the player ends up after a roll, including the cells passed through by cards;
+    being sent to jail counts as landing on the jail
+    """
+    cells = [cell_class(*parameters) for cell_class, parameters in board_layout]
+    jail_position, nearest_in_group = movement_tables(board_layout)
+    decks = {Chance: chance_cards, CommunityChest: community_chest_cards}
+    outcomes = [landing_outcomes(cells, position, decks, jail_position, nearest_in_group)
+                for position in range(len(cells))]
+
+    # Probability of each (dice sum, is it a double)
+    rolls = defaultdict(float)
+    for _, dice_sum, is_double in all_possible_rolls(dice_count, dice_sides):
+        rolls[(dice_sum, is_double)] += 1 / dice_sides ** dice_count
+
+    # For each state: {next state: probability} and {cell landed on: probability}
+    transitions = {}
+    landings = {}
+
+    def add_move(state, start, dice_sum, probability, doubles):
+        """ Move by dice_sum from start, then follow what happens on the cell """
+        visits, finals = outcomes[(start + dice_sum) % len(cells)]
+        for position, visit_probability in visits.items():
+            landings[state][position] += probability * visit_probability
+        for final, final_probability in finals.items():
+            next_state = (JAILED, 0) if final == JAILED else (final, doubles)
+            transitions[state][next_state] += probability * final_probability
+
+    for position in range(len(cells)):
+        for doubles in range(3):
+            state = (position, doubles)
+            transitions[state], landings[state] = defaultdict(float), defaultdict(float)
+            for (dice_sum, is_double), probability in rolls.items():
+                if is_double and doubles == 2:
+                    # Third double in a row: go to jail
+                    transitions[state][(JAILED, 0)] += probability
+                    landings[state][jail_position] += probability
+                else:
+                    add_move(state, position, dice_sum, probability, doubles + 1 if is_double else 0)
+
+    for days in range(3):
+        state = (JAILED, days)
+        transitions[state], landings[state] = defaultdict(float), defaultdict(float)
+        for (dice_sum, is_double), probability in rolls.items():
+            if is_double:
+                # Leave on a double, and roll again
+                add_move(state, jail_position, dice_sum, probability, 1)
+            elif days == 2:
+                # Pay the fine on the third day and leave
+                add_move(state, jail_position, dice_sum, probability, 0)
+            else:
+                transitions[state][(JAILED, days + 1)] += probability
+
+    distribution = stationary_distribution(transitions)
+    # Every turn starts with the first roll (no doubles yet) or in jail
+    turns_per_roll = sum(probability for (position, doubles), probability in distribution.items()
+                         if position == JAILED or doubles == 0)
+    frequencies = [0.0] * len(cells)
+    for state, probability in distribution.items():
+        for position, landing_probability in landings[state].items():
+            frequencies[position] += probability * landing_probability / turns_per_roll
+    return tuple(frequencies)
+
+
+def landing_outcomes(cells, position, decks, jail_position, nearest_in_group):
+    """ What happens after landing on the cell at the position, following cards to other cells:
+    ({position visited: probability}, {final position or JAILED: probability})
+    """
+    visits = defaultdict(float)
+    finals = defaultdict(float)
+
+    def land(position, probability):
+        visits[position] += probability
+        cell = cells[position]
+        if isinstance(cell, GoToJail):
+            go_to_jail(probability)
+        elif type(cell) in decks:
+            deck = decks[type(cell)]
+            for card in deck:
+                card_probability = probability / len(deck)
+                if isinstance(card, GoToJailCard):
+                    go_to_jail(card_probability)
+                elif isinstance(card, AdvanceToCard):
+                    move(position, card.target, card_probability)
+                elif isinstance(card, AdvanceToNearestCard):
+                    move(position, nearest_in_group[card.group][position], card_probability)
+                elif isinstance(card, GoBackCard):
+                    move(position, (position - card.spaces) % len(cells), card_probability)
+                else:
+                    finals[position] += card_probability
+        else:
+            finals[position] += probability
+
+    def move(position, target, probability):
+        # Staying on the same cell does not handle it again (see Player.handle_landing)
+        if target == position:
+            finals[position] += probability
+        else:
+            land(target, probability)
+
+    def go_to_jail(probability):
+        visits[jail_position] += probability
+        finals[JAILED] += probability
+
+    land(position, 1)
+    return visits, finals
+
+
+def stationary_distribution(transitions):
+    """ Long-run probability of each state of the chain {state: {next state: probability}} (power iteration) """
+    distribution = {state: 1 / len(transitions) for state in transitions}
+    for _ in range(MAX_ITERATIONS):
+        next_distribution = dict.fromkeys(transitions, 0.0)
+        for state, probability in distribution.items():
+            for next_state, transition_probability in transitions[state].items():
+                next_distribution[next_state] += probability * transition_probability
+        change = max(abs(next_distribution[state] - distribution[state]) for state in transitions)
+        distribution = next_distribution
+        if change < TOLERANCE:
+            break
+    return distribution
+
+
+def expected_rent(board, frequencies=None):
+    """ Expected rent each opponent pays per turn for each property {cell: $},
+    with the board's current owners, houses and mortgages.
+    Rent is as in Property.calculate_rent, with the average roll for utilities.
+    Rent changes from cards (double rent, ten times the dice) are not counted
+    """
+    if frequencies is None:
+        frequencies = landing_frequencies(board.settings)
+    mechanics = board.settings.mechanics
+    average_roll = mechanics.dice_count * (mechanics.dice_sides + 1) / 2
+    rents = {}
+    for cell in board.cells:
+        if isinstance(cell, Property) and cell.owner is not None and not cell.is_mortgaged:
+            rent = average_roll * cell.monopoly_multiplier if cell.group == UTILITIES else cell.calculate_rent(None)
+            rents[cell] = frequencies[cell.position] * rent
+    return rents
+
+
+def rent_table(config):
+    """ Landings per 100 turns for each cell and, for properties, the expected rent an opponent pays
+    per turn if the owner has the whole group, with each number of houses (a list of rows, "-" if no rent)
+    """
+    frequencies = landing_frequencies(config)
+    board = Board(config)
+    average_roll = config.mechanics.dice_count * (config.mechanics.dice_sides + 1) / 2
+    levels = ("whole group", "1 house", "2 houses", "3 houses", "4 houses", "hotel")
+    rows = []
+    for cell in board.cells:
+        row = {"position": cell.position, "cell": cell.name,
+               "landings per 100 turns": round(frequencies[cell.position] * 100, 2),
+               **dict.fromkeys(levels, "-")}
+        if isinstance(cell, Property):
+            group_size = len(board.groups[cell.group])
+            multiplier = Board.monopoly_multipliers_by_count(cell.group, group_size)[group_size]
+            rents = [average_roll * multiplier if cell.group == UTILITIES else cell.rent_base * multiplier]
+            # Railroads and utilities can't have houses
+            if cell.group not in (RAILROADS, UTILITIES):
+                rents.extend(cell.rent_house)
+            for level, rent in zip(levels, rents):
+                row[level] = round(frequencies[cell.position] * rent, 2)
+        rows.append(row)
+    return rows
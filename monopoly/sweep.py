@@ -0,0 +1,83 @@
+""" Parameter sweeps: simulate several variants of the settings in one go.
+A variant is a dict of settings overrides {"Class.attribute": value}, for example
+{"GameMechanics.salary": 100, "HeroPlayerSettings.unspendable_cash": 0}.
+Each variant is a GameConfig (see GameConfig.with_overrides) sent along with its batches
+of games, so all (variant, games) tasks go to one process pool. Every variant plays
+the same game seeds (common random numbers), so differences between variants
+come from the settings, not from the luck of the dice.
+"""
+import csv
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Any, Dict, List, Tuple
+
+from tqdm import tqdm
+
+from monopoly.analytics import Analyzer
+from monopoly.core.game import monopoly_games_batch
+from monopoly.core.game_config import GameConfig
+
+
+def settings_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """ All combinations of the values: {"Class.attribute": [value1, value2...]} -> list of variants """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in product(*grid.values())]
+
+
+def run_sweep(variants: List[Dict[str, Any]], config) -> List[Tuple[Dict[str, Any], Analyzer]]:
+    """ Simulate config.n_games games for each variant, in one process pool.
+    Return the list of (variant, Analyzer with its results)
+    """
+    base_config = GameConfig.from_settings(config)
+    variant_configs = [base_config.with_overrides(variant) for variant in variants]
+    batch_size = max(1, config.batch_size)
+    batches = [(first_game, min(first_game + batch_size - 1, config.n_games), config.seed)
+               for first_game in range(1, config.n_games + 1, batch_size)]
+    # Interleave variants, so all of them progress at the same pace
+    tasks = [(variant_n, batch) for batch in batches for variant_n in range(len(variants))]
+
+    # Each variant's results are analyzed with its own settings (players, turn limit)
+    analyzers = [Analyzer(variant_config) for variant_config in variant_configs]
+    with ProcessPoolExecutor(max_workers=config.multi_process) as executor, \
+            tqdm(total=config.n_games * len(variants), desc="Simulating settings variants") as progress_bar:
+        results = executor.map(monopoly_games_batch,
+                               [(*batch, variant_configs[variant_n]) for variant_n, batch in tasks])
+        for (variant_n, _), batch_results in zip(tasks, results):
+            for game_result in batch_results:
+                analyzers[variant_n].add_game_result(game_result)
+            progress_bar.update(len(batch_results))
+
+    return list(zip(variants, analyzers))
+
+
+def sweep_table(sweep_results: List[Tuple[Dict[str, Any], Analyzer]]) -> List[Dict[str, Any]]:
+    """ Tidy table of the sweep's results: one row per variant and player,
+    with the variant's settings in the first columns
+    """
+    return [{**{name: format_setting(value) for name, value in variant.items()}, **row}
+            for variant, analyzer in sweep_results
+            for row in analyzer.summary()]
+
+
+def format_setting(value):
+    """ Settings value for the table (sets as comma-separated values) """
+    if isinstance(value, (set, frozenset)):
+        return ",".join(sorted(value)) or "-"
+    return value
+
+
+def save_table(table: List[Dict[str, Any]], file_name):
+    """ Save the table as a tab-separated file """
+    with open(file_name, "w", encoding="utf-8", newline="") as table_file:
+        writer = csv.DictWriter(table_file, fieldnames=list(table[0]), delimiter="\t")
+        writer.writeheader()
+        writer.writerows(table)
+
+
+def print_table(table: List[Dict[str, Any]]):
+    """ Print the table with aligned columns """
+    columns = list(table[0])
+    widths = {column: max(len(column), *(len(str(row[column])) for row in table)) for column in columns}
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for row in table:
+        print("  ".join(str(row[column]).ljust(widths[column]) for column in columns))
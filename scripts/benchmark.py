@@ -0,0 +1,45 @@
+import argparse
+import os
+import shutil
+import sys
+
+from monopoly.benchmark import run_benchmarks, save_results, load_results, compare_results
+from monopoly.log_settings import LogSettings
+from monopoly.sweep import print_table
+from settings import SimulationSettings
+
+
+def run_benchmark_suite(n_games: int, max_workers: int, number: int, repeat: int,
+                        tolerance: float, save_baseline: bool) -> bool:
+    """Run the benchmarks, save the results and compare them with the baseline (if there is one).
+    Return False if any benchmark got worse than the baseline by more than `tolerance`."""
+    results = run_benchmarks(n_games, max_workers, number, repeat)
+    save_results(results, LogSettings.BENCHMARK_RESULTS_PATH)
+    print(f"Results saved to {LogSettings.BENCHMARK_RESULTS_PATH}")
+
+    if save_baseline:
+        shutil.copyfile(LogSettings.BENCHMARK_RESULTS_PATH, LogSettings.BENCHMARK_BASELINE_PATH)
+        print(f"Saved as the baseline: {LogSettings.BENCHMARK_BASELINE_PATH}")
+    baseline = load_results(LogSettings.BENCHMARK_BASELINE_PATH) \
+        if os.path.exists(LogSettings.BENCHMARK_BASELINE_PATH) else []
+
+    table = compare_results(results, baseline, tolerance)
+    print_table(table)
+    return all(row["status"] != "REGRESSION" for row in table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the simulator (fixed settings and seeds)")
+    parser.add_argument("--games", type=int, default=200, help="games to play for each throughput benchmark")
+    parser.add_argument("--workers", type=int, default=SimulationSettings.multi_process,
+                        help="maximum number of worker processes")
+    parser.add_argument("--number", type=int, default=200, help="calls per round of a micro-benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="rounds of a micro-benchmark (the best one counts)")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="slowdown against the baseline to report as a regression (a share, 0.1 is 10%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="save these results as the new baseline")
+    args = parser.parse_args()
+
+    if not run_benchmark_suite(args.games, args.workers, args.number, args.repeat,
+                               args.tolerance, args.save_baseline):
+        sys.exit(1)
@@ -0,0 +1,16 @@
+from typing import Type
+
+from monopoly.core.game_config import GameConfig
+from monopoly.markov import rent_table
+from monopoly.sweep import print_table
+from settings import SimulationSettings, GameSettings
+
+
+def print_landing_probabilities(config: Type[SimulationSettings], game_settings: Type[GameSettings]) -> None:
+    """Print how often players land on each cell, and the expected rent of properties per opponent's turn
+    (for the board, decks and dice in the settings), computed without simulating games."""
+    print_table(rent_table(GameConfig.from_settings(config, game_settings)))
+
+
+if __name__ == "__main__":
+    print_landing_probabilities(SimulationSettings, GameSettings)
@@ -0,0 +1,33 @@
+import argparse
+import sys
+
+from monopoly.event_stream import render_game
+from monopoly.log_settings import LogSettings
+
+
+def render_events(game_number: int, file_name, output_file_name=None) -> bool:
+    """Render one game of the structured events log as text (as the text events log has it),
+    to the output file or to the console. Return False if the game is not in the log."""
+    lines = render_game(file_name, game_number)
+    if not lines:
+        return False
+    text = "\n".join(lines) + "\n"
+    if output_file_name is None:
+        sys.stdout.write(text)
+    else:
+        with open(output_file_name, "w", encoding="utf-8") as output_file:
+            output_file.write(text)
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a game of the structured events log as text")
+    parser.add_argument("game_number", type=int, metavar="GAME_NUMBER")
+    parser.add_argument("--log", default=LogSettings.STRUCTURED_EVENTS_LOG_PATH,
+                        help="structured events log to read")
+    parser.add_argument("--output", help="text file to write (instead of the console)")
+    args = parser.parse_args()
+
+    if not render_events(args.game_number, args.log, args.output):
+        print(f"Game {args.game_number} is not in {args.log}", file=sys.stderr)
+        sys.exit(1)
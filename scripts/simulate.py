@@ -1,31 +1,186 @@
-import random
+import argparse
+import dataclasses
+import os
+import pstats
+import shutil
+import tempfile
+from collections import deque
+from glob import glob
+from concurrent.futures import ProcessPoolExecutor
 from typing import Type
 
-from tqdm.contrib.concurrent import process_map
+from tqdm import tqdm
 
-from monopoly.analytics import Analyzer
-from monopoly.core.game import monopoly_game
+from monopoly.analytics import Analyzer, PhaseTimings
+from monopoly.checkpoint import Checkpoint, save_checkpoint, load_checkpoint
+from monopoly.core.game import monopoly_game, monopoly_games_batch, derive_game_seed
+from monopoly.core.game_config import GameConfig
+from monopoly.log import Log
 from monopoly.log_settings import LogSettings
 from settings import SimulationSettings
 
+# Batches submitted to the pool ahead of the results, per worker: enough to keep the workers busy,
+# without holding the tasks and results of the whole simulation at once
+PENDING_BATCHES_PER_WORKER = 4
 
-def run_simulation(config: Type[SimulationSettings]) -> None:
-    """Simulate N games in parallel, then print an analysis."""
-    LogSettings.init_logs()
 
-    master_rng = random.Random(config.seed)
-    game_seed_pairs = [(i + 1, master_rng.getrandbits(32)) for i in range(config.n_games)]
+def run_simulation(config: Type[SimulationSettings], resume: bool = False) -> None:
+    """Simulate N games in parallel, then print an analysis.
+    With resume, continue from the last checkpoint (games already played are skipped).
+    The events log is not rolled back on resume, so it may have some games twice.
+    With config.target_margin, games are played in waves and the simulation stops
+    as soon as the target survival rate is known within that margin."""
+    # Workers save profiles of their batches to a temporary directory, they are merged at the end
+    profile_dir = tempfile.mkdtemp() if config.profile else None
+    game_config = dataclasses.replace(GameConfig.from_settings(config), profile_dir=profile_dir)
+    analyzer, games_done = Analyzer(game_config), 0
+    checkpoint = None
+    if resume and os.path.exists(LogSettings.CHECKPOINT_PATH):
+        checkpoint = load_checkpoint(LogSettings.CHECKPOINT_PATH, config.seed, game_config)
+        analyzer, games_done = checkpoint.analyzer, checkpoint.games_done
+        print(f"Resuming after {games_done} games")
+    elif resume:
+        print("No checkpoint to resume from, starting from the beginning")
+    _, bankruptcies_log = LogSettings.init_logs(reset=checkpoint is None)
+    # Drop bankruptcies of the games played after the checkpoint
+    if checkpoint is not None and os.path.exists(LogSettings.BANKRUPTCIES_PATH):
+        os.truncate(LogSettings.BANKRUPTCIES_PATH, checkpoint.bankruptcies_log_size)
 
-    process_map(
-        monopoly_game,
-        game_seed_pairs,
-        max_workers=config.multi_process,
-        total=config.n_games,
-        desc="Simulating Monopoly games",
-    )
+    phase_timings = PhaseTimings()
+    batch_size = max(1, config.batch_size)
+    # Without sequential stopping, all games are one wave
+    wave_size = max(1, config.wave_size) if config.target_margin else config.n_games
+    if config.target_margin:
+        print(f"Sequential stopping: until the 95% margin of {target_name(config)} is below " +
+              f"{config.target_margin * 100:.1f}%, checked every {wave_size} games, at most {config.n_games} games")
 
-    Analyzer().run_all()
+    def make_checkpoint():
+        """ Write out the bankruptcies so far and save the checkpoint """
+        bankruptcies_log.flush()
+        bankruptcies_log_size = 0
+        if os.path.exists(LogSettings.BANKRUPTCIES_PATH):
+            bankruptcies_log_size = os.path.getsize(LogSettings.BANKRUPTCIES_PATH)
+        save_checkpoint(Checkpoint(config.seed, game_config, analyzer.n_games, analyzer, bankruptcies_log_size),
+                        LogSettings.CHECKPOINT_PATH)
+
+    # Workers return GameResults, which are folded into the analyzer as they come
+    # (in the order of game numbers), and the bankruptcies log is written
+    # every wave_size games, at checkpoints and at the end
+    next_report = (games_done // config.interim_report_every + 1) * config.interim_report_every \
+        if config.interim_report_every else 0
+    next_checkpoint = (games_done // config.checkpoint_every + 1) * config.checkpoint_every \
+        if config.checkpoint_every else 0
+    flush_every = max(1, config.wave_size)
+    next_flush = (games_done // flush_every + 1) * flush_every
+    max_pending = max(1, config.multi_process) * PENDING_BATCHES_PER_WORKER
+    with ProcessPoolExecutor(max_workers=config.multi_process) as executor, \
+            tqdm(total=config.n_games, initial=games_done, desc="Simulating Monopoly games") as progress_bar:
+        for wave_start in range(games_done + 1, config.n_games + 1, wave_size):
+            wave_end = min(wave_start + wave_size - 1, config.n_games)
+            # Split the wave into batches of (first_game, last_game, master_seed, game_config):
+            # each worker task plays the whole range and derives game seeds by itself
+            batches = ((first_game, min(first_game + batch_size - 1, wave_end), config.seed, game_config)
+                       for first_game in range(wave_start, wave_end + 1, batch_size))
+            for batch_results in map_in_order(executor, monopoly_games_batch, batches, max_pending):
+                for game_result in batch_results:
+                    analyzer.add_game_result(game_result)
+                    phase_timings.add_game_result(game_result)
+                    for player_name, turn in game_result.bankruptcies:
+                        bankruptcies_log.add("{}\t{}\t{}", game_result.game_number, player_name, turn)
+                progress_bar.update(len(batch_results))
+
+                if config.checkpoint_every and analyzer.n_games >= next_checkpoint:
+                    make_checkpoint()
+                    next_checkpoint += config.checkpoint_every
+                if analyzer.n_games >= next_flush:
+                    bankruptcies_log.flush()
+                    next_flush = (analyzer.n_games // flush_every + 1) * flush_every
+
+                if config.interim_report_every and analyzer.n_games >= next_report:
+                    with progress_bar.external_write_mode():
+                        print(f"\n== Interim results after {analyzer.n_games} games ==")
+                        analyzer.run_all()
+                    next_report += config.interim_report_every
+
+            if config.target_margin and target_estimate(analyzer, config)[1] < config.target_margin:
+                break
+    if config.checkpoint_every:
+        make_checkpoint()
+    else:
+        bankruptcies_log.save()
+
+    if config.target_margin:
+        estimate, margin = target_estimate(analyzer, config)
+        outcome = "reached" if margin < config.target_margin else "not reached, out of games"
+        print(f"Sequential stopping: {target_name(config)} is {estimate * 100:.1f} +- {margin * 100:.1f}% " +
+              f"after {analyzer.n_games} games (target margin {config.target_margin * 100:.1f}% {outcome})")
+    analyzer.run_all()
+    phase_timings.report()
+    if profile_dir is not None:
+        merge_profiles(profile_dir, LogSettings.PROFILE_PATH)
+
+
+def map_in_order(executor, function, tasks, max_pending):
+    """Like executor.map(function, tasks): results in the order of the tasks, but the tasks
+    are submitted as the results come, with at most max_pending of them in the pool at a time."""
+    pending = deque()
+    for task in tasks:
+        if len(pending) == max_pending:
+            yield pending.popleft().result()
+        pending.append(executor.submit(function, task))
+    while pending:
+        yield pending.popleft().result()
+
+
+def merge_profiles(profile_dir: str, file_name) -> None:
+    """Merge the profiles saved by the workers into one file, remove the workers' files."""
+    profile_files = sorted(glob(os.path.join(profile_dir, "*.pstats")))
+    if profile_files:
+        pstats.Stats(*profile_files).dump_stats(file_name)
+        print(f"Profile of all workers saved to {file_name} (see it with: python -m pstats {file_name})")
+    shutil.rmtree(profile_dir)
+
+
+def target_name(config: Type[SimulationSettings]) -> str:
+    """What sequential stopping is tracking, for the output"""
+    if config.target_difference:
+        return f"{config.target_player}'s survival rate minus the other players' average"
+    return f"{config.target_player}'s survival rate"
+
+
+def target_estimate(analyzer: Analyzer, config: Type[SimulationSettings]):
+    """Current estimate of the value sequential stopping is tracking: (value, 95% margin)"""
+    if config.target_difference:
+        return analyzer.survival_difference(config.target_player)
+    _, survival_rate, margin = analyzer.survival_rates()[config.target_player]
+    return survival_rate, margin
+
+
+def replay_game(config: Type[SimulationSettings], game_number: int) -> None:
+    """Play one game of the simulation again (same seed as in the simulation), with the full events log."""
+    if config.lockstep_engine:
+        print("Games of the lockstep engine can't be replayed one by one")
+        return
+    game_config = dataclasses.replace(GameConfig.from_settings(config),
+                                      keep_game_log=True, events_log_path=LogSettings.REPLAY_LOG_PATH,
+                                      structured_events_log=False)
+    Log(LogSettings.REPLAY_LOG_PATH).reset(f"Replay of game {game_number}")
+
+    game_result = monopoly_game((game_number, derive_game_seed(config.seed, game_number)), game_config)
+    print(f"Game {game_number} (seed = {game_result.game_seed}): {game_result.end_reason.name} " +
+          f"after {game_result.turns} turns, bankruptcies: {game_result.bankruptcies}")
+    print(f"Events log: {LogSettings.REPLAY_LOG_PATH}")
 
 
 if __name__ == "__main__":
-    run_simulation(SimulationSettings)
+    parser = argparse.ArgumentParser(description="Simulate Monopoly games (settings are in settings.py)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue an interrupted simulation from the last checkpoint")
+    parser.add_argument("--replay", type=int, metavar="GAME_NUMBER",
+                        help="play one game of the simulation again, with the full events log")
+    args = parser.parse_args()
+
+    if args.replay is not None:
+        replay_game(SimulationSettings, args.replay)
+    else:
+        run_simulation(SimulationSettings, resume=args.resume)
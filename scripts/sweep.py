@@ -0,0 +1,19 @@
+from typing import Type
+
+from monopoly.log_settings import LogSettings
+from monopoly.sweep import settings_grid, run_sweep, sweep_table, save_table, print_table
+from settings import SimulationSettings, SweepSettings
+
+
+def run_settings_sweep(config: Type[SimulationSettings], sweep: Type[SweepSettings]) -> None:
+    """Simulate N games for every combination of the settings in the sweep grid,
+    then print and save the table of results."""
+    variants = settings_grid(sweep.grid)
+    table = sweep_table(run_sweep(variants, config))
+    print_table(table)
+    save_table(table, LogSettings.SWEEP_RESULTS_PATH)
+    print(f"Results saved to {LogSettings.SWEEP_RESULTS_PATH}")
+
+
+if __name__ == "__main__":
+    run_settings_sweep(SimulationSettings, SweepSettings)
@@ -1,6 +1,10 @@
 """ Config file for monopoly simulation """
 from dataclasses import dataclass
-from typing import FrozenSet
+from typing import FrozenSet, Tuple
+
+from monopoly.core.card import CHANCE_CARDS, COMMUNITY_CHEST_CARDS
+from monopoly.core.cell import BOARD_LAYOUT
+from monopoly.core.constants import INDIGO
 
 HERO = "Hero"
 PLAYER_2 = "Alice"
@@ -11,20 +15,23 @@ PLAYER_4 = "Charly"
 @dataclass(frozen=True)
 class GameMechanics:
     # Houses and hotel available for development
-    available_houses = 36
-    available_hotels = 12
-    salary = 200  # Passing Go salary
-    luxury_tax = 100
+    available_houses: int = 36
+    available_hotels: int = 12
+    salary: int = 200  # Passing Go salary
+    luxury_tax: int = 100
     # Income tax (cash or share of net worth)
-    income_tax = 200
-    income_tax_percentage = .1
-    mortgage_value = 0.5  # how much cash a player gets for mortgaging a property (Default is 0.5)
-    mortgage_fee = 0.1  # The extra a player needs to pay to unmortgage (Default is 0.1)
-    exit_jail_fine = 50  # Fine to get out of jail without rolling doubles
-    free_parking_money = False  # Controversial house rule to collect fines on Free Parking and give to whoever lands there
+    income_tax: int = 200
+    income_tax_percentage: float = .1
+    mortgage_value: float = 0.5  # how much cash a player gets for mortgaging a property (Default is 0.5)
+    mortgage_fee: float = 0.1  # The extra a player needs to pay to unmortgage (Default is 0.1)
+    exit_jail_fine: int = 50  # Fine to get out of jail without rolling doubles
+    # Controversial house rule to collect fines on Free Parking and give to whoever lands there
+    free_parking_money: bool = False
     # Dice settings
-    dice_count = 2
-    dice_sides = 6
+    dice_count: int = 2
+    dice_sides: int = 6
+    # Draw dice rolls in bulk (faster, but games are different from the legacy one-die-at-a-time rolls)
+    bulk_dice: bool = False
     
 
 @dataclass(frozen=True)
@@ -33,12 +40,46 @@ class SimulationSettings:
     n_moves: int = 1000  # Max Number of moves per game
     seed: int = 0  # Random seed to start simulation with
     multi_process: int = 4  # Number of parallel processes to use in the simulation
+    # Number of games each worker plays per task. Larger batches cut the per-task overhead
+    # (pickling, IPC, progress bar updates); 1 means a separate task for every game
+    batch_size: int = 100
+    interim_report_every: int = 0  # Print interim analysis every N games (0: only at the end)
+    # Save a checkpoint every N games (0: never), to continue an interrupted simulation with --resume
+    checkpoint_every: int = 10_000
+    # Sequential stopping: play games in waves of `wave_size` and stop as soon as the 95% margin
+    # of `target_player`'s survival rate (or, with `target_difference`, of the difference between
+    # their survival rate and the average of the other players) is below `target_margin`.
+    # n_games is then the maximum number of games to play. 0: play all n_games.
+    # The bankruptcies log is also written out every `wave_size` games, with or without sequential stopping
+    target_margin: float = 0
+    target_player: str = HERO
+    target_difference: bool = False
+    wave_size: int = 1000
+    # Time the phases of the games (trading, improving, rolling, landing, paying...) and print
+    # where the time goes, with the slowest games. Adds some overhead
+    phase_timings: bool = False
+    # Profile all games with cProfile, and save the profiles of all workers merged to profile.pstats. Slow
+    profile: bool = False
+    # Debug: cross-check players' running totals (net worth, raisable money)
+    # against a full recalculation every time they are used. Slow
+    check_running_totals: bool = False
+    # Play each batch of games with the lockstep engine (see monopoly/core/lockstep.py): all games of the batch
+    # at once, in NumPy arrays. Needs NumPy 2.0 or later, and large batches (tens of thousands of games).
+    # On one core with batches of 50,000 games: about 6.6x the games per second of the regular engine
+    # (short of the 10x it was aimed at). Results are comparable statistically, but the games are not the same
+    # and can't be replayed. There is no events log: turn off KEEP_GAME_LOG in monopoly/log_settings.py
+    lockstep_engine: bool = False
     
     # Cash that will be considered cannot go bankrupt. See this paper that estimates the probability that the game
     # will last forever. https://www.researchgate.net/publication
     # /224123876_Estimating_the_probability_that_the_game_of_Monopoly_never_ends
     never_bankrupt_cash: int = 5000
 
+    # End "stalled" games early (see monopoly/core/stall_detectors.py), saves time on games that run
+    # to the turn limit, but may cut some late bankruptcies. A tuple of (detector, parameters), for example:
+    # ((NoMonopoliesDetector, (200,)), (CashTrendingUpDetector, (50, 3)), (LowBankruptcyRiskDetector, (0.01,)))
+    stall_detectors: Tuple[Tuple[type, tuple], ...] = ()
+
 
 @dataclass(frozen=True)
 class StandardPlayerSettings:
@@ -82,6 +123,15 @@ class GameSettings:
         PLAYER_4: 1500
     }
     
+    # Board: cell class and its parameters for each position, see BOARD_LAYOUT in monopoly/core/cell.py.
+    # Custom layouts need a Jail, and Chance/Community Chest cards pointing to the right positions
+    board_layout = BOARD_LAYOUT
+
+    # Chance and Community Chest decks: lists of cards, see monopoly/core/card.py
+    # for the available card types, to put together a custom or a house-rule deck
+    chance_cards = CHANCE_CARDS
+    community_chest_cards = COMMUNITY_CHEST_CARDS
+
     # Initial properties (a dictionary with player names as keys and a list of property numbers as values)
     # Property numbers correspond to indices in `board.cells`
     starting_properties = {
@@ -90,4 +140,15 @@ class GameSettings:
         PLAYER_3: [],
         PLAYER_4: []
     }
-    
\ No newline at end of file
+    
+
+
+class SweepSettings:
+    """ Settings variants to compare with scripts/sweep.py: every combination of these values
+    is simulated (with SimulationSettings). Keys are "Class.attribute" of the settings above
+    """
+    grid = {
+        "GameMechanics.salary": [200, 100],
+        "HeroPlayerSettings.unspendable_cash": [200, 0],
+        "HeroPlayerSettings.ignore_property_groups": [frozenset(), frozenset({INDIGO})],
+    }